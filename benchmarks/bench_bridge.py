@@ -0,0 +1,123 @@
+"""
+benchmarks/bench_bridge.py — per-call spawn vs resident py_bridge.py worker
+
+Builds a synthetic index, then times `ping_python` and `search_gcn_circulars`
+through both bridge modes:
+  - spawn:    a fresh `py_bridge.py` process per call (the old behaviour)
+  - resident: one `py_bridge.py --serve` process answering every call
+
+Usage:
+    python benchmarks/bench_bridge.py [--calls 50] [--records 2000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.indexer import ingest_path
+
+BRIDGE_SCRIPT = REPO_ROOT / "leanmcp_bridge" / "py_bridge.py"
+
+CALLS = [
+    ("ping_python", {}),
+    ("search_gcn_circulars", {"query": "optical counterpart", "limit": 10}),
+]
+
+
+def build_db(db_path: Path, n_records: int) -> None:
+    records = [
+        {
+            "circularId": i,
+            "subject": f"GRB {260000 + i % 1000}A: optical counterpart candidate",
+            "eventId": f"GRB {260000 + i % 1000}A",
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": f"We report an optical counterpart for circular {i} with redshift z = {i % 7}.",
+        }
+        for i in range(1, n_records + 1)
+    ]
+    json_path = db_path.with_suffix(".json")
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+
+def time_spawn(tool: str, arguments: dict, calls: int, env: dict) -> list[float]:
+    payload = json.dumps({"tool": tool, "arguments": arguments})
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, str(BRIDGE_SCRIPT)],
+            input=payload,
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        timings.append(time.perf_counter() - start)
+        assert json.loads(proc.stdout)["ok"], proc.stdout
+    return timings
+
+
+def time_resident(tool: str, arguments: dict, calls: int, env: dict) -> list[float]:
+    proc = subprocess.Popen(
+        [sys.executable, str(BRIDGE_SCRIPT), "--serve"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    timings = []
+    try:
+        # Warm-up call pays the import cost once, as the TS bridge does at startup.
+        for request_id in range(calls + 1):
+            start = time.perf_counter()
+            proc.stdin.write(json.dumps({"id": request_id, "tool": tool, "arguments": arguments}) + "\n")
+            proc.stdin.flush()
+            response = json.loads(proc.stdout.readline())
+            elapsed = time.perf_counter() - start
+            assert response["ok"] and response["id"] == request_id, response
+            if request_id:
+                timings.append(elapsed)
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return timings
+
+
+def describe(timings: list[float]) -> str:
+    ms = sorted(t * 1000 for t in timings)
+    return f"mean {statistics.mean(ms):8.2f} ms  p50 {ms[len(ms) // 2]:8.2f} ms  p95 {ms[int(len(ms) * 0.95) - 1]:8.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--records", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.sqlite"
+        build_db(db_path, args.records)
+        env = dict(os.environ, GCN_DB_PATH=str(db_path))
+
+        for tool, arguments in CALLS:
+            spawn = time_spawn(tool, arguments, args.calls, env)
+            resident = time_resident(tool, arguments, args.calls, env)
+            print(f"{tool}")
+            print(f"  spawn     {describe(spawn)}")
+            print(f"  resident  {describe(resident)}")
+            print(f"  speedup   {statistics.mean(spawn) / statistics.mean(resident):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+benchmarks/bench_bulk_load.py — full rebuild with ingest_path vs bulk_load
+
+Writes a synthetic JSONL archive and builds an index from it from scratch
+twice: with ingest_path on a new file (WAL, synchronous=NORMAL, indexes and
+FTS maintained row by row) and with bulk_load (no journal or fsync, indexes
+and FTS built once after the rows are in, then swapped into place). Both
+indexes are checked to hold the same circulars.
+
+Usage:
+    python benchmarks/bench_bulk_load.py [--records 200000] [--body-words 200] [--repeat 1]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import bulk_load, ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def write_archive(path: Path, n_records: int, body_words: int) -> None:
+    rng = random.Random(42)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(1, n_records + 1):
+            event = f"GRB {260000 + i % 5000}A"
+            record = {
+                "circularId": i,
+                "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+                "eventId": event,
+                "createdOn": 1_700_000_000_000 + i * 1000,
+                "submitter": "Bench",
+                "format": "text/plain",
+                "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def fingerprint(db_path: Path) -> list[tuple]:
+    connection = get_connection(db_path)
+    rows = connection.execute(
+        "SELECT circular_id_raw, record_hash FROM circulars ORDER BY circular_id_raw"
+    ).fetchall()
+    connection.close()
+    return [tuple(row) for row in rows]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive.jsonl"
+        write_archive(archive, args.records, args.body_words)
+
+        runs = [
+            ("ingest_path", lambda db: ingest_path(db, archive)),
+            ("bulk_load", lambda db: bulk_load(db, archive)),
+        ]
+        best = {label: float("inf") for label, _ in runs}
+        indexes = {}
+        for attempt in range(args.repeat):
+            for label, run in runs:
+                db_path = Path(tmp) / f"{label}_{attempt}.sqlite"
+                best[label] = min(best[label], timed(lambda: run(db_path)))
+                indexes[label] = fingerprint(db_path)
+                for path in Path(tmp).glob(f"{db_path.name}*"):
+                    path.unlink()
+
+        if indexes["ingest_path"] != indexes["bulk_load"]:
+            raise SystemExit("bulk_load built a different index")
+
+        print(f"{args.records} records, {args.body_words} body words each")
+        for label, seconds in best.items():
+            print(f"  {label:<12} {seconds:8.1f} s {args.records / seconds:8.0f} r/s")
+        print(f"  speedup {best['ingest_path'] / best['bulk_load']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
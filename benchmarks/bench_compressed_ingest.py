@@ -0,0 +1,138 @@
+"""
+benchmarks/bench_compressed_ingest.py — ingest from extracted files vs compressed archives
+
+Writes the same synthetic circulars four ways: extracted, one .json file per
+circular as in the GCN export, and packed into a single .jsonl.gz, .tar.gz
+and .zip. Each input is ingested into a fresh database with ingest_path and
+checked to build the same index. Reports the files and bytes each input
+takes on disk (what has to be stored, then read and stat'ed at ingest) and
+the best of --repeat ingest times.
+
+Usage:
+    python benchmarks/bench_compressed_ingest.py [--records 20000] [--body-words 200] [--repeat 3]
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import random
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def make_records(n_records: int, body_words: int) -> list[dict]:
+    rng = random.Random(42)
+    records = []
+    for i in range(1, n_records + 1):
+        event = f"GRB {260000 + i % 5000}A"
+        records.append({
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+        })
+    return records
+
+
+def write_inputs(directory: Path, records: list[dict]) -> dict[str, Path]:
+    extracted = directory / "archive"
+    extracted.mkdir()
+    for record in records:
+        (extracted / f"{record['circularId']}.json").write_text(json.dumps(record), encoding="utf-8")
+
+    jsonl_gz = directory / "circulars.jsonl.gz"
+    with gzip.open(jsonl_gz, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    tar_gz = directory / "circulars.tar.gz"
+    with tarfile.open(tar_gz, "w:gz") as archive:
+        for record in records:
+            data = json.dumps(record).encode("utf-8")
+            info = tarfile.TarInfo(f"archive/{record['circularId']}.json")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    zip_path = directory / "circulars.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for record in records:
+            archive.writestr(f"archive/{record['circularId']}.json", json.dumps(record))
+
+    return {"files": extracted, ".jsonl.gz": jsonl_gz, ".tar.gz": tar_gz, ".zip": zip_path}
+
+
+def disk_usage(path: Path) -> tuple[int, int]:
+    if path.is_file():
+        return 1, os.stat(path).st_blocks * 512
+    files = list(os.scandir(path))
+    return len(files), sum(entry.stat().st_blocks * 512 for entry in files)
+
+
+def fingerprint(db_path: Path) -> list[tuple]:
+    connection = get_connection(db_path)
+    rows = connection.execute(
+        "SELECT circular_id_raw, record_hash FROM circulars ORDER BY circular_id_raw"
+    ).fetchall()
+    connection.close()
+    return [tuple(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = write_inputs(Path(tmp), make_records(args.records, args.body_words))
+
+        print(f"{args.records} records, {args.body_words} body words each")
+        print(f"  {'input':<11} {'files':>6} {'on disk':>10} {'ingest':>9} {'throughput':>12}")
+        reference = None
+        for name, input_path in inputs.items():
+            best = float("inf")
+            for attempt in range(args.repeat):
+                db_path = Path(tmp) / f"index_{attempt}.sqlite"
+                start = time.perf_counter()
+                ingest_path(db_path, input_path)
+                best = min(best, time.perf_counter() - start)
+
+                index = fingerprint(db_path)
+                if reference is None:
+                    reference = index
+                elif index != reference:
+                    raise SystemExit(f"{name} built a different index")
+                for path in Path(tmp).glob(f"index_{attempt}.sqlite*"):
+                    path.unlink()
+
+            files, size = disk_usage(input_path)
+            print(
+                f"  {name:<11} {files:6d} {size / 2**20:7.1f} MB {best:8.2f}s"
+                f" {args.records / best:8.0f} r/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
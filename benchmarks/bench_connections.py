@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_connections.py — queries/second with and without cached connections
+
+Compares the old per-query pattern (open, PRAGMAs, schema script, query,
+close) against reusing this thread's cached connection, for a primary-key
+lookup and for the full search_circulars path.
+
+Usage:
+    python benchmarks/bench_connections.py [--seconds 2] [--records 5000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Every query must reach SQLite, not the search result cache.
+os.environ["GCN_SEARCH_CACHE_SIZE"] = "0"
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import db
+import search
+from src.indexer import ingest_path
+
+LOOKUP_SQL = "SELECT subject FROM circulars WHERE circular_id_int = ?"
+
+
+def build_db(db_path: Path, n_records: int) -> None:
+    records = [
+        {
+            "circularId": i,
+            "subject": f"GRB {260000 + i % 1000}A: optical counterpart candidate",
+            "eventId": f"GRB {260000 + i % 1000}A",
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": f"We report an optical counterpart for circular {i}.",
+        }
+        for i in range(1, n_records + 1)
+    ]
+    json_path = db_path.with_suffix(".json")
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+
+def queries_per_second(fn, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        fn(count)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--records", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.sqlite"
+        build_db(db_path, args.records)
+
+        def lookup_reopen(i):
+            connection = db.get_connection(db_path)
+            connection.execute(LOOKUP_SQL, (i % args.records + 1,)).fetchone()
+            connection.close()
+
+        def lookup_cached(i):
+            db.get_cached_connection(db_path).execute(LOOKUP_SQL, (i % args.records + 1,)).fetchone()
+
+        def search_reopen(i):
+            original = search.get_cached_connection
+            search.get_cached_connection = lambda path, read_only=False: db.get_connection(path)
+            try:
+                search.search_circulars(db_path, query="", event=f"GRB {260000 + i % 1000}A", limit=10)
+            finally:
+                search.get_cached_connection = original
+
+        def search_cached(i):
+            search.search_circulars(db_path, query="", event=f"GRB {260000 + i % 1000}A", limit=10)
+
+        for label, before, after in [
+            ("primary-key lookup", lookup_reopen, lookup_cached),
+            ("search_circulars (event)", search_reopen, search_cached),
+        ]:
+            qps_before = queries_per_second(before, args.seconds)
+            qps_after = queries_per_second(after, args.seconds)
+            print(f"{label}")
+            print(f"  reopen per query  {qps_before:10.0f} q/s")
+            print(f"  cached connection {qps_after:10.0f} q/s")
+            print(f"  speedup           {qps_after / qps_before:10.1f}x")
+
+        db.close_cached_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+benchmarks/bench_extract.py — per-pattern vs single-pass event extraction
+
+Runs the old extract_matches (one re.finditer per EVENT_PATTERNS entry, then
+sort and de-dupe) and the current single-alternation one over the subject
+and body of every record, checks that both return identical events for
+every text, and reports the cost per record.
+
+Point --data at the downloaded archive (see src/fetch_circulars.py) to run
+over the real corpus; without it a synthetic corpus is generated.
+
+Usage:
+    python benchmarks/bench_extract.py [--data data] [--records 20000] [--repeat 3]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.indexer import iter_json_records
+from src.utils import EVENT_PATTERNS, extract_matches, normalize_event
+
+FILLER = (
+    "we report optical afterglow observations of the source with the telescope "
+    "at magnitude in filter exposure the error circle of the Swift BAT trigger "
+    "contains one candidate no new source is detected upper limit redshift"
+).split()
+
+DESIGNATIONS = [
+    "GRB 260120B", "GRB260101A", "EP260119a", "EP 250304b", "AT 2023abc",
+    "AT2024xyz", "SN 2024ggi", "IceCube-231004A", "ICECUBE 240105A",
+    "Swift J1234.5+6789.0", "SWIFT J0101-2020",
+]
+
+
+def legacy_extract_matches(text: str) -> list[str]:
+    found = []
+
+    for pattern in EVENT_PATTERNS:
+        for match in re.finditer(pattern, text, flags=re.IGNORECASE):
+            norm = normalize_event(match.group(1))
+            if norm:
+                found.append((match.start(), norm))
+    found.sort(key=lambda x: x[0])
+
+    results = []
+    seen = set()
+    for _, norm in found:
+        if norm not in seen:
+            seen.add(norm)
+            results.append(norm)
+    return results
+
+
+def synthetic_texts(n_records: int) -> list[str]:
+    rng = random.Random(42)
+    texts = []
+    for _ in range(n_records):
+        subject = [rng.choice(DESIGNATIONS), ":"] + rng.sample(FILLER, 5)
+        body = [rng.choice(FILLER) for _ in range(rng.randint(60, 600))]
+        for _ in range(rng.randint(0, 4)):
+            body.insert(rng.randrange(len(body)), rng.choice(DESIGNATIONS))
+        texts.append(" ".join(subject))
+        texts.append(" ".join(body))
+    return texts
+
+
+def corpus_texts(data_path: Path) -> list[str]:
+    texts = []
+    for record in iter_json_records(data_path):
+        texts.append(record.get("subject") or "")
+        texts.append(record.get("body") or "")
+    return texts
+
+
+def time_per_record(fn, texts: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    # Two texts (subject and body) per record.
+    return best / (len(texts) / 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", type=Path, help="JSON/JSONL file or directory of circulars")
+    parser.add_argument("--records", type=int, default=20000, help="synthetic records when --data is not given")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = corpus_texts(args.data) if args.data else synthetic_texts(args.records)
+    source = str(args.data) if args.data else "synthetic corpus"
+    print(f"{len(texts) // 2} records from {source}")
+
+    mismatches = [text for text in texts if legacy_extract_matches(text) != extract_matches(text)]
+    if mismatches:
+        print(f"OUTPUT DIFFERS for {len(mismatches)} texts, first: {mismatches[0][:200]!r}")
+        raise SystemExit(1)
+    print("  outputs identical for every subject and body")
+
+    before = time_per_record(legacy_extract_matches, texts, args.repeat)
+    after = time_per_record(extract_matches, texts, args.repeat)
+    print(f"  per-pattern scans   {before * 1e6:8.1f} us/record")
+    print(f"  single alternation  {after * 1e6:8.1f} us/record")
+    print(f"  speedup             {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
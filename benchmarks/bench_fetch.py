@@ -0,0 +1,134 @@
+"""
+benchmarks/bench_fetch.py — sequential vs concurrent circular downloads
+
+Serves synthetic circulars from a local HTTP server that adds --latency
+seconds to every response (standing in for the round trip to gcn.nasa.gov)
+and answers a --error-rate share of requests with 503. Downloads --count
+IDs the way the old script did (requests.get per ID without a session, a
+0.2 s pause after each, no retries) and with CircularFetcher at each of
+--workers, with the default rate limit and without one. Reports wall time,
+circulars downloaded and connections opened.
+
+Usage:
+    python benchmarks/bench_fetch.py [--count 200] [--latency 0.05] [--error-rate 0.02] [--workers 1,4,8,16]
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.fetch_circulars import DEFAULT_RATE, CircularFetcher
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, a kept-alive
+    # connection waits out the client's delayed ACK before the body.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            failed = self.server.rng.random() < self.server.error_rate
+        circular_id = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+        if failed:
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, json.dumps({
+                "circularId": circular_id,
+                "subject": f"GRB 260101A: circular {circular_id}",
+                "body": "optical afterglow " * 100,
+            }).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(latency: float, error_rate: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.rng = random.Random(42)
+    server.latency = latency
+    server.error_rate = error_rate
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_sequential(base_url: str, ids: range) -> int:
+    downloaded = 0
+    for i in ids:
+        try:
+            r = requests.get(f"{base_url}/{i}.json", timeout=10)
+            r.raise_for_status()
+            downloaded += 1
+            time.sleep(0.2)
+        except requests.RequestException:
+            pass
+    return downloaded
+
+
+def fetch_concurrent(base_url: str, ids: range, workers: int, rate: float | None) -> int:
+    with CircularFetcher(base_url, workers=workers, rate=rate, backoff=0.05) as fetcher:
+        return sum(
+            1 for _, response, _ in fetcher.fetch_many(ids)
+            if response is not None and response.ok
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--workers", default="1,4,8,16")
+    args = parser.parse_args()
+
+    ids = range(1, args.count + 1)
+    print(f"{args.count} circulars, {args.latency * 1000:g} ms latency, {args.error_rate:.0%} 503s")
+    print(f"  {'method':<28} {'time':>8} {'ok':>5} {'conns':>6} {'r/s':>7}")
+
+    runs = [("sequential, old script", None, None)]
+    for workers in (int(w) for w in args.workers.split(",")):
+        runs.append((f"{workers} workers, {DEFAULT_RATE:g} r/s limit", workers, DEFAULT_RATE))
+        runs.append((f"{workers} workers, no limit", workers, None))
+
+    for name, workers, rate in runs:
+        server = start_server(args.latency, args.error_rate)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/circulars"
+        start = time.perf_counter()
+        if workers is None:
+            downloaded = fetch_sequential(base_url, ids)
+        else:
+            downloaded = fetch_concurrent(base_url, ids, workers, rate)
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+        print(
+            f"  {name:<28} {elapsed:7.2f}s {downloaded:5d} {server.connections:6d}"
+            f" {args.count / elapsed:7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+benchmarks/bench_fetch_ingest.py — fetching to files then ingesting vs fetching straight into the index
+
+Serves --count synthetic circulars from a local HTTP server that adds
+--latency seconds to every response, and gets them into a fresh index
+three ways with the fetch_circulars command line: downloading to one .json
+file each and then running ingest_path over the directory, and with
+--ingest, without and with --archive. A reader polls the index while each
+runs and reports when the first circular, half of them and all of them
+became searchable, along with the bytes left on disk besides the index.
+
+Usage:
+    python benchmarks/bench_fetch_ingest.py [--count 2000] [--latency 0.01] [--workers 8]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.fetch_circulars import main as fetch_main
+from src.indexer import ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        circular_id = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+        body = self.server.bodies.get(circular_id, b"")
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_bodies(count: int) -> dict[int, bytes]:
+    rng = random.Random(42)
+    bodies = {}
+    for i in range(1, count + 1):
+        event = f"GRB {260000 + i % 5000}A"
+        bodies[i] = json.dumps({
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(200)),
+        }).encode("utf-8")
+    return bodies
+
+
+def watch_progress(db_path: Path, total: int, start: float, stop: threading.Event) -> dict[str, float]:
+    """
+    Polls the index every 20 ms from a thread of its own; returns seconds
+    from start until the first, half and all circulars were searchable.
+    """
+    marks: dict[str, float] = {}
+
+    def poll() -> None:
+        while not stop.is_set():
+            count = 0
+            if db_path.exists():
+                try:
+                    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+                    count = connection.execute("SELECT COUNT(*) FROM circulars").fetchone()[0]
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            now = time.perf_counter() - start
+            for name, needed in (("first", 1), ("half", total // 2), ("all", total)):
+                if count >= needed:
+                    marks.setdefault(name, now)
+            time.sleep(0.02)
+
+    threading.Thread(target=poll, daemon=True).start()
+    return marks
+
+
+def disk_usage(path: Path) -> int:
+    if not path.exists():
+        return 0
+    return sum(entry.stat().st_blocks * 512 for entry in os.scandir(path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.latency = args.latency
+    server.bodies = make_bodies(args.count)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/circulars"
+
+    print(f"{args.count} circulars, {args.latency * 1000:g} ms latency, {args.workers} workers, no rate limit")
+    print(f"  {'method':<26} {'first':>8} {'half':>8} {'all':>8} {'total':>8} {'extra disk':>11}")
+    for name in ("files, then ingest_path", "--ingest", "--ingest --archive"):
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp) / "data"
+            archive = Path(tmp) / "archive"
+            db_path = Path(tmp) / "gcn.sqlite"
+            flags = [
+                str(data_dir), "--base-url", base_url, "--rate", "0",
+                "--workers", str(args.workers), "--count", str(args.count + 1),
+            ]
+            if name != "files, then ingest_path":
+                flags += ["--db", str(db_path), "--ingest"]
+            if name == "--ingest --archive":
+                flags += ["--archive", str(archive)]
+
+            stop = threading.Event()
+            start = time.perf_counter()
+            marks = watch_progress(db_path, args.count, start, stop)
+            with redirect_stdout(io.StringIO()):
+                fetch_main(flags)
+            if name == "files, then ingest_path":
+                ingest_path(db_path, data_dir)
+            total = time.perf_counter() - start
+            time.sleep(0.1)
+            stop.set()
+
+            extra = disk_usage(data_dir) + disk_usage(archive)
+            print(
+                f"  {name:<26} {marks.get('first', total):7.2f}s {marks.get('half', total):7.2f}s"
+                f" {marks.get('all', total):7.2f}s {total:7.2f}s {extra / 2**20:8.1f} MB"
+            )
+
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+benchmarks/bench_fetch_refresh.py — finding holes and refreshing held circulars
+
+Lays out --held circulars as data/<id>.json with a --hole-rate share of IDs
+missing, then:
+
+  1. builds the set of held IDs from the directory as a Python set of ints
+     and as an IdBitmap, and lists the holes below the highest ID from
+     each, reporting memory and time;
+  2. serves the same circulars from a local HTTP server (--latency seconds
+     per response, --edited share of them changed since download) and
+     refreshes every held circular twice: with plain GETs, and with
+     conditional GETs from the validators kept in fetch_state. Reports
+     time, response bytes and files rewritten.
+
+Usage:
+    python benchmarks/bench_fetch_refresh.py [--held 2000] [--hole-rate 0.01] [--edited 0.01] [--latency 0.01] [--workers 8]
+"""
+
+import argparse
+import email.utils
+import hashlib
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.fetch_circulars import (
+    CircularFetcher,
+    FileSink,
+    existing_ids,
+    fetch_into,
+    load_fetch_state,
+    save_circular,
+)
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+MODIFIED = email.utils.formatdate(1769000000, usegmt=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        circular_id = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+        body = self.server.bodies.get(circular_id)
+        if body is None:
+            status, body, etag = 404, b"", None
+        else:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            status = 304 if self.headers.get("If-None-Match") == etag else 200
+            if status == 304:
+                body = b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+
+def make_body(rng: random.Random, circular_id: int) -> bytes:
+    return json.dumps({
+        "circularId": circular_id,
+        "subject": f"GRB {260000 + circular_id % 5000}A: " + " ".join(rng.sample(WORDS, 4)),
+        "body": " ".join(rng.choice(WORDS) for _ in range(200)),
+    }).encode("utf-8")
+
+
+def measure_holes(data_dir: Path) -> None:
+    for name in ("set", "IdBitmap"):
+        tracemalloc.start()
+        start = time.perf_counter()
+        if name == "set":
+            held = {int(p.stem) for p in data_dir.glob("*.json")}
+            holes = [i for i in range(1, max(held) + 1) if i not in held]
+        else:
+            held = existing_ids(data_dir)
+            holes = list(held.missing(1, held.max()))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:<10} {len(holes):6d} holes {elapsed * 1000:8.1f} ms  peak {peak / 1024:8.1f} KB")
+
+
+def refresh(server, data_dir: Path, db_path: Path, conditional: bool, workers: int, report: bool = True) -> None:
+    connection = get_connection(db_path)
+    validators = load_fetch_state(connection)[0] if conditional else None
+    held = existing_ids(data_dir)
+    counts = {"downloaded": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0}
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/circulars"
+    server.bytes_sent = 0
+    start = time.perf_counter()
+    with CircularFetcher(base_url, workers=workers, rate=None) as fetcher, redirect_stdout(io.StringIO()):
+        fetch_into(fetcher, held, FileSink(data_dir), held, counts, connection, validators)
+    elapsed = time.perf_counter() - start
+    connection.close()
+    if not report:
+        return
+    name = "conditional GET" if conditional else "plain GET"
+    print(
+        f"  {name:<16} {elapsed:7.2f}s {server.bytes_sent / 2**20:7.2f} MB"
+        f"  rewritten {counts['updated']:5d}  unchanged {counts['unchanged']:5d}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--held", type=int, default=2000)
+    parser.add_argument("--hole-rate", type=float, default=0.01)
+    parser.add_argument("--edited", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        data_dir.mkdir()
+        bodies = {}
+        for circular_id in range(1, args.held + 1):
+            bodies[circular_id] = make_body(rng, circular_id)
+            if rng.random() >= args.hole_rate:
+                save_circular(data_dir, circular_id, bodies[circular_id].decode("utf-8"))
+
+        print(f"Holes below the highest of {len(existing_ids(data_dir))} held circulars")
+        measure_holes(data_dir)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.latency = args.latency
+        server.bodies = bodies
+        server.bytes_sent = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # A first pass records validators in fetch_state; then a few
+        # circulars are edited and each refresh starts from a copy of the
+        # directory and index as they were.
+        db_path = Path(tmp) / "gcn.sqlite"
+        refresh(server, data_dir, db_path, conditional=False, workers=args.workers, report=False)
+        for circular_id in rng.sample(sorted(bodies), int(args.held * args.edited)):
+            bodies[circular_id] = make_body(rng, circular_id)
+
+        print(f"Refresh with {args.edited:.0%} edited, {args.latency * 1000:g} ms latency, {args.workers} workers")
+        for conditional in (False, True):
+            run_dir = Path(tmp) / f"run_{conditional}"
+            shutil.copytree(data_dir, run_dir / "data")
+            shutil.copy(db_path, run_dir / "gcn.sqlite")
+            refresh(server, run_dir / "data", run_dir / "gcn.sqlite", conditional, args.workers)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+benchmarks/bench_hash.py — record hashing cost per record
+
+Times the version 1 record hash (SHA1 over the whole record re-serialised
+with json.dumps) against the version 2 hash (BLAKE2b over the cleaned
+indexed fields, as identify_circular computes it) on the same records.
+Records come from --data (a JSON/JSONL file or directory, e.g. data/) when
+given, otherwise from a synthetic set.
+
+Usage:
+    python benchmarks/bench_hash.py [--data data] [--records 20000] [--body-words 200] [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.indexer import identify_circular, iter_json_records
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def synthetic_records(n_records: int, body_words: int) -> list[dict]:
+    rng = random.Random(42)
+    records = []
+    for i in range(1, n_records + 1):
+        event = f"GRB {260000 + i % 5000}A"
+        records.append({
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+        })
+    return records
+
+
+def legacy_hash(record: dict) -> str:
+    text = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def best_of(repeat: int, fn, records: list[dict]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in records:
+            fn(record)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", help="JSON/JSONL file or directory of real circulars")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.data:
+        records = list(iter_json_records(args.data))[:args.records]
+        source = args.data
+    else:
+        records = synthetic_records(args.records, args.body_words)
+        source = f"synthetic, {args.body_words} body words"
+
+    runs = [
+        ("v1 sha1(json.dumps)", legacy_hash),
+        ("v2 blake2b(fields)", identify_circular),
+    ]
+    print(f"{len(records)} records ({source})")
+    timings = {label: best_of(args.repeat, fn, records) for label, fn in runs}
+    for label, seconds in timings.items():
+        print(f"  {label:<22} {seconds / len(records) * 1e6:7.2f} us/record")
+    legacy, current = timings.values()
+    print(f"  speedup {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
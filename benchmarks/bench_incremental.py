@@ -0,0 +1,97 @@
+"""
+benchmarks/bench_incremental.py — nightly re-ingest with and without the file manifest
+
+Writes a synthetic archive with one .json file per circular, indexes it, then
+adds --new fresh circulars and re-ingests the directory twice: once with
+force=True, which parses and hashes every record as before the manifest
+existed, and once incrementally, which skips unchanged files from their
+size and mtime. Archive files are backdated past the manifest's racy window
+so the incremental run sees them as a nightly job would.
+
+Usage:
+    python benchmarks/bench_incremental.py [--records 20000] [--body-words 200] [--new 20] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.indexer import ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+DAY_NS = 86_400 * 1_000_000_000
+
+
+def write_circulars(directory: Path, ids: range, body_words: int, age_ns: int = 0) -> None:
+    rng = random.Random(42)
+    for i in ids:
+        event = f"GRB {260000 + i % 5000}A"
+        record = {
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+        }
+        path = directory / f"{i}.json"
+        path.write_text(json.dumps(record), encoding="utf-8")
+        if age_ns:
+            mtime_ns = path.stat().st_mtime_ns - age_ns
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--new", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive"
+        archive.mkdir()
+        write_circulars(archive, range(1, args.records + 1), args.body_words, age_ns=DAY_NS)
+        base_db = Path(tmp) / "base.sqlite"
+        ingest_path(base_db, archive)
+
+        write_circulars(archive, range(args.records + 1, args.records + args.new + 1), args.body_words)
+
+        best = {"force": float("inf"), "manifest": float("inf")}
+        for attempt in range(args.repeat):
+            for label, force in (("force", True), ("manifest", False)):
+                db_path = Path(tmp) / f"{label}_{attempt}.sqlite"
+                shutil.copy(base_db, db_path)
+                best[label] = min(best[label], timed(lambda: ingest_path(db_path, archive, force=force)))
+                db_path.unlink()
+
+        print(f"{args.records} indexed files + {args.new} new, {args.body_words} body words each")
+        for label, seconds in best.items():
+            print(f"  {label:<9} {seconds * 1000:9.1f} ms")
+        print(f"  speedup   {best['force'] / best['manifest']:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+benchmarks/bench_ingest.py — per-record vs batched ingest throughput
+
+Writes a synthetic JSONL archive, then builds a fresh index from it with the
+per-record path (upsert_circular for every record, one statement at a time)
+and with ingest_path at several batch sizes, and re-ingests the unchanged
+archive into each to time the record-hash skip path (force=True, so the
+source file manifest does not skip the archive outright). Each figure is
+the best of --repeat runs on a fresh database, since a shared machine is
+noisy.
+
+Usage:
+    python benchmarks/bench_ingest.py [--records 20000] [--body-words 200] [--batch-sizes 1,100,500,2000] [--repeat 3]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import ingest_path, iter_json_records, upsert_circular
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def write_archive(path: Path, n_records: int, body_words: int) -> None:
+    rng = random.Random(42)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(1, n_records + 1):
+            event = f"GRB {260000 + i % 5000}A"
+            record = {
+                "circularId": i,
+                "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+                "eventId": event,
+                "createdOn": 1_700_000_000_000 + i * 1000,
+                "submitter": "Bench",
+                "format": "text/plain",
+                "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def ingest_per_record(db_path: Path, input_path: Path) -> int:
+    connection = get_connection(db_path)
+    count = 0
+    with connection:
+        for record in iter_json_records(input_path):
+            upsert_circular(connection, record)
+            count += 1
+    connection.close()
+    return count
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--batch-sizes", default="1,100,500,2000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive.jsonl"
+        write_archive(archive, args.records, args.body_words)
+
+        runs = [("per-record", lambda db: ingest_per_record(db, archive))]
+        runs += [
+            (f"batch {size}", lambda db, size=size: ingest_path(db, archive, batch_size=size, force=True))
+            for size in batch_sizes
+        ]
+
+        print(f"{args.records} records, {args.body_words} body words each")
+        print(f"  {'path':<12} {'fresh':>12} {'unchanged':>12}")
+        best = {label: [float("inf"), float("inf")] for label, _ in runs}
+        for attempt in range(args.repeat):
+            for label, run in runs:
+                db_path = Path(tmp) / f"{label.replace(' ', '_')}_{attempt}.sqlite"
+                fresh = timed(lambda: run(db_path))
+                again = timed(lambda: run(db_path))
+                best[label][0] = min(best[label][0], fresh)
+                best[label][1] = min(best[label][1], again)
+                db_path.unlink()
+
+        for label, (fresh, again) in best.items():
+            print(
+                f"  {label:<12} {args.records / fresh:8.0f} r/s {args.records / again:8.0f} r/s"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+benchmarks/bench_parallel_ingest.py — ingest throughput across worker counts
+
+Writes a synthetic archive laid out like the GCN export (one .json file per
+circular) and builds a fresh index from it with ingest_path at each worker
+count, then re-ingests the unchanged archive with force=True to time the
+record-hash skip path. Every run is checked to produce the same index as the
+serial one. Each figure is the best of --repeat runs on a fresh database.
+Scaling is bounded by the cores available and by the single SQLite writer.
+
+Usage:
+    python benchmarks/bench_parallel_ingest.py [--records 20000] [--body-words 200] [--workers 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def write_archive(directory: Path, n_records: int, body_words: int) -> None:
+    rng = random.Random(42)
+    directory.mkdir()
+    for i in range(1, n_records + 1):
+        event = f"GRB {260000 + i % 5000}A"
+        record = {
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+        }
+        (directory / f"{i}.json").write_text(json.dumps(record), encoding="utf-8")
+
+
+def fingerprint(db_path: Path) -> list[tuple]:
+    connection = get_connection(db_path)
+    rows = connection.execute(
+        "SELECT circular_id_raw, record_hash FROM circulars ORDER BY circular_id_raw"
+    ).fetchall()
+    connection.close()
+    return [tuple(row) for row in rows]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--body-words", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive"
+        write_archive(archive, args.records, args.body_words)
+
+        print(f"{args.records} files, {args.body_words} body words each, {os.cpu_count()} CPUs")
+        print(f"  {'workers':<8} {'fresh':>12} {'unchanged':>12} {'speedup':>8}")
+        best = {workers: [float("inf"), float("inf")] for workers in worker_counts}
+        reference = None
+        for attempt in range(args.repeat):
+            for workers in worker_counts:
+                db_path = Path(tmp) / f"workers{workers}_{attempt}.sqlite"
+                fresh = timed(lambda: ingest_path(db_path, archive, workers=workers, force=True))
+                again = timed(lambda: ingest_path(db_path, archive, workers=workers, force=True))
+                best[workers][0] = min(best[workers][0], fresh)
+                best[workers][1] = min(best[workers][1], again)
+
+                index = fingerprint(db_path)
+                if reference is None:
+                    reference = index
+                elif index != reference:
+                    raise SystemExit(f"{workers} workers built a different index")
+                db_path.unlink()
+
+        baseline = best[worker_counts[0]][0]
+        for workers, (fresh, again) in best.items():
+            print(
+                f"  {workers:<8} {args.records / fresh:8.0f} r/s {args.records / again:8.0f} r/s"
+                f" {baseline / fresh:7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+benchmarks/bench_readonly.py — read-write vs read-only memory-mapped search connections
+
+Builds a large synthetic index (long bodies so the file is well beyond
+SQLite's default page cache), then runs the same mix of event and keyword
+queries through a cached read-write connection and a cached read-only,
+memory-mapped connection.
+
+Usage:
+    python benchmarks/bench_readonly.py [--records 50000] [--seconds 3] [--db path]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Every query must reach SQLite, not the search result cache.
+os.environ["GCN_SEARCH_CACHE_SIZE"] = "0"
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import db
+import search
+from src.indexer import ingest_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def build_db(db_path: Path, n_records: int, body_words: int) -> None:
+    rng = random.Random(42)
+    json_path = db_path.with_suffix(".jsonl")
+    with json_path.open("w", encoding="utf-8") as f:
+        for i in range(1, n_records + 1):
+            event = f"GRB {200000 + i % 5000:06d}A"
+            f.write(json.dumps({
+                "circularId": i,
+                "subject": f"{event}: {' '.join(rng.choices(WORDS, k=6))}",
+                "eventId": event,
+                "createdOn": 1_500_000_000_000 + i * 60_000,
+                "submitter": "Bench",
+                "format": "text/plain",
+                "body": " ".join(rng.choices(WORDS, k=body_words)),
+            }) + "\n")
+    ingest_path(db_path, json_path)
+    json_path.unlink()
+
+
+def run_queries(db_path: Path, read_only: bool, seconds: float) -> float:
+    rng = random.Random(7)
+    original = search.get_cached_connection
+    search.get_cached_connection = lambda path, read_only=False, _mode=read_only: original(path, read_only=_mode)
+    try:
+        count = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            if count % 2:
+                search.search_circulars(db_path, query="", event=f"GRB {200000 + rng.randrange(5000):06d}A")
+            else:
+                search.search_circulars(db_path, query=" ".join(rng.sample(WORDS, 2)))
+            count += 1
+        return count / (time.perf_counter() - start)
+    finally:
+        search.get_cached_connection = original
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--body-words", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--db", type=Path, help="reuse (or create) this database instead of a temp file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or Path(tmp) / "bench.sqlite"
+        if not db_path.exists():
+            start = time.perf_counter()
+            build_db(db_path, args.records, args.body_words)
+            print(f"built {db_path.stat().st_size / 1e6:.0f} MB database in {time.perf_counter() - start:.1f}s")
+
+        for label, read_only in [("read-write", False), ("read-only mmap", True)]:
+            run_queries(db_path, read_only, 0.5)  # warm page cache
+            qps = run_queries(db_path, read_only, args.seconds)
+            print(f"  {label:15s} {qps:8.1f} q/s")
+        db.close_cached_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+benchmarks/bench_stream_ingest.py — streaming circulars over a Unix socket vs dropping files
+
+A fake producer holds synthetic circulars in memory and gets them into a
+fresh index three ways: by writing each one as a .json file into a watched
+directory and rerunning ingest_path, by streaming NDJSON to a
+StreamIngestServer at full speed (throughput at each --batch-sizes), and by
+streaming them one at a time, waiting for each acknowledgement (latency
+until the record is committed and searchable).
+
+Usage:
+    python benchmarks/bench_stream_ingest.py [--records 20000] [--trickle 200] [--batch-sizes 1,50,500] [--max-delay 0]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.indexer import ingest_path
+from src.stream_ingest import IndexWriter, StreamIngestServer
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def make_records(n_records: int, first_id: int = 1) -> list[dict]:
+    rng = random.Random(first_id)
+    records = []
+    for i in range(first_id, first_id + n_records):
+        event = f"GRB {260000 + i % 5000}A"
+        records.append({
+            "circularId": i,
+            "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+            "eventId": event,
+            "createdOn": 1_700_000_000_000 + i * 1000,
+            "submitter": "Bench",
+            "format": "text/plain",
+            "body": " ".join(rng.choice(WORDS) for _ in range(200)),
+        })
+    return records
+
+
+def serving(db_path: Path, batch_size: int, max_delay: float):
+    writer = IndexWriter(db_path)
+    socket_path = os.path.join(tempfile.gettempdir(), f"gcn-bench-{os.getpid()}.sock")
+    server = StreamIngestServer(socket_path, writer, batch_size, max_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop() -> None:
+        server.shutdown()
+        server.server_close()
+        writer.close()
+
+    return socket_path, stop
+
+
+def stream_all(socket_path: str, records: list[dict]) -> float:
+    start = time.perf_counter()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        sender = threading.Thread(
+            target=lambda: (
+                conn.sendall("".join(json.dumps(r) + "\n" for r in records).encode("utf-8")),
+                conn.shutdown(socket.SHUT_WR),
+            )
+        )
+        sender.start()
+        with conn.makefile("r", encoding="utf-8") as responses:
+            acked = sum(json.loads(line)["records"] for line in responses)
+        sender.join()
+    if acked != len(records):
+        raise SystemExit(f"only {acked} of {len(records)} records acknowledged")
+    return time.perf_counter() - start
+
+
+def stream_one_at_a_time(socket_path: str, records: list[dict]) -> list[float]:
+    latencies = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        with conn.makefile("r", encoding="utf-8") as responses:
+            for record in records:
+                start = time.perf_counter()
+                conn.sendall((json.dumps(record) + "\n").encode("utf-8"))
+                json.loads(responses.readline())
+                latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def drop_files(directory: Path, db_path: Path, records: list[dict]) -> list[float]:
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        (directory / f"{record['circularId']}.json").write_text(json.dumps(record), encoding="utf-8")
+        ingest_path(db_path, directory)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--trickle", type=int, default=200)
+    parser.add_argument("--batch-sizes", default="1,50,500")
+    parser.add_argument("--max-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    records = make_records(args.records)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Bulk: {args.records} records streamed into a fresh index")
+        for batch_size in batch_sizes:
+            db_path = Path(tmp) / f"bulk_{batch_size}.sqlite"
+            socket_path, stop = serving(db_path, batch_size, args.max_delay)
+            elapsed = stream_all(socket_path, records)
+            stop()
+            print(f"  batch size {batch_size:<6} {elapsed:7.2f}s {args.records / elapsed:8.0f} r/s")
+
+        print(f"Trickle: {args.trickle} new circulars into an index of {args.records}, one at a time")
+        trickle = make_records(args.trickle, first_id=args.records + 1)
+        db_path = Path(tmp) / f"bulk_{batch_sizes[-1]}.sqlite"
+
+        socket_path, stop = serving(db_path, batch_sizes[-1], args.max_delay)
+        latencies = stream_one_at_a_time(socket_path, trickle[: args.trickle // 2])
+        stop()
+        print(
+            f"  {'socket, ack':<22} median {statistics.median(latencies) * 1000:7.1f} ms"
+            f"  max {max(latencies) * 1000:7.1f} ms  (max delay {args.max_delay * 1000:g} ms)"
+        )
+
+        directory = Path(tmp) / "data"
+        directory.mkdir()
+        for record in records:
+            (directory / f"{record['circularId']}.json").write_text(json.dumps(record), encoding="utf-8")
+        ingest_path(db_path, directory)
+        latencies = drop_files(directory, db_path, trickle[args.trickle // 2:])
+        print(
+            f"  {'file + ingest_path':<22} median {statistics.median(latencies) * 1000:7.1f} ms"
+            f"  max {max(latencies) * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
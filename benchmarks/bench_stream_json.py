@@ -0,0 +1,120 @@
+"""
+benchmarks/bench_stream_json.py — peak memory of reading and ingesting a large JSON array file
+
+Writes one .json file holding a single array of circulars (a few hundred MB
+at the defaults) and reads every record from it twice: once with json.load,
+as iter_file_records does for small files, and once with the streaming
+iter_json_array path it uses for files of STREAM_JSON_MIN_SIZE and up. Both
+paths are checked to yield the same records. Then runs ingest_path on the
+file into a fresh index, which also hashes it for the source manifest, and
+checks every record was written. Peak Python heap is measured with
+tracemalloc, which slows everything down, so the timings are only
+comparable with each other.
+
+Usage:
+    python benchmarks/bench_stream_json.py [--records 150000] [--body-words 200]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import ingest_path, iter_json_array
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+
+def write_array(path: Path, n_records: int, body_words: int) -> None:
+    rng = random.Random(42)
+    with path.open("w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(1, n_records + 1):
+            event = f"GRB {260000 + i % 5000}A"
+            record = {
+                "circularId": i,
+                "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+                "eventId": event,
+                "createdOn": 1_700_000_000_000 + i * 1000,
+                "submitter": "Bench",
+                "format": "text/plain",
+                "body": " ".join(rng.choice(WORDS) for _ in range(body_words)),
+            }
+            f.write(json.dumps(record))
+            f.write(",\n" if i < n_records else "\n]\n")
+
+
+def digest_records(records) -> str:
+    digest = hashlib.sha1()
+    for record in records:
+        digest.update(f"{record['circularId']}:{record['body']}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_loaded(path: Path) -> str:
+    with path.open("r", encoding="utf-8") as f:
+        return digest_records(json.load(f))
+
+
+def read_streamed(path: Path) -> str:
+    with path.open("r", encoding="utf-8") as f:
+        return digest_records(iter_json_array(f))
+
+
+def measure(fn, path: Path) -> tuple[str, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    digest = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return digest, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=150000)
+    parser.add_argument("--body-words", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "circulars.json"
+        write_array(path, args.records, args.body_words)
+        size_mb = path.stat().st_size / 2**20
+
+        print(f"{args.records} records in one array, {size_mb:.0f} MB")
+        print(f"  {'reader':<11} {'peak heap':>12} {'time':>9}")
+        digests = set()
+        for name, fn in [("json.load", read_loaded), ("streamed", read_streamed)]:
+            digest, elapsed, peak = measure(fn, path)
+            digests.add(digest)
+            print(f"  {name:<11} {peak / 2**20:9.1f} MB {elapsed:8.2f}s")
+
+        if len(digests) != 1:
+            raise SystemExit("streamed reader yielded different records")
+
+        db_path = Path(tmp) / "gcn.sqlite"
+        written, elapsed, peak = measure(lambda p: ingest_path(db_path, p), path)
+        print(f"  {'ingest_path':<11} {peak / 2**20:9.1f} MB {elapsed:8.2f}s")
+        connection = get_connection(db_path)
+        indexed = connection.execute("SELECT COUNT(*) FROM circulars").fetchone()[0]
+        connection.close()
+        if written != args.records or indexed != args.records:
+            raise SystemExit(f"ingest_path wrote {written} of {args.records} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+benchmarks/bench_watch.py — search freshness with watch mode vs rerunning ingest
+
+Writes a synthetic archive laid out like the GCN export (one .json file per
+circular) and indexes it. Then drops --new-files new circulars into it one
+at a time and measures how long each takes to become searchable: by
+rerunning ingest_path over the whole tree after each arrival, and with
+watch_path running on the inotify and polling backends. For the watchers,
+CPU time used while idle is reported as well, which for polling is the cost
+of its stat scans.
+
+Usage:
+    python benchmarks/bench_watch.py [--records 20000] [--new-files 10] [--debounce 0.2] [--poll-interval 2]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.db import get_connection
+from src.indexer import ingest_path, watch_path
+
+WORDS = (
+    "optical afterglow redshift spectroscopic counterpart detection fading source "
+    "xray flux gamma burst observations telescope magnitude filter exposure "
+    "candidate transient localization error circle upper limit photometry"
+).split()
+
+rng = random.Random(42)
+
+
+def write_circular(directory: Path, circular_id: int) -> None:
+    event = f"GRB {260000 + circular_id % 5000}A"
+    record = {
+        "circularId": circular_id,
+        "subject": f"{event}: " + " ".join(rng.sample(WORDS, 4)),
+        "eventId": event,
+        "createdOn": 1_700_000_000_000 + circular_id * 1000,
+        "submitter": "Bench",
+        "format": "text/plain",
+        "body": " ".join(rng.choice(WORDS) for _ in range(200)),
+    }
+    (directory / f"{circular_id}.json").write_text(json.dumps(record), encoding="utf-8")
+
+
+def is_indexed(db_path: Path, circular_id: int) -> bool:
+    connection = get_connection(db_path)
+    try:
+        return connection.execute(
+            "SELECT 1 FROM circulars WHERE circular_id_raw = ?", (str(circular_id),)
+        ).fetchone() is not None
+    finally:
+        connection.close()
+
+
+def wait_until_indexed(db_path: Path, circular_id: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not is_indexed(db_path, circular_id):
+        if time.monotonic() > deadline:
+            raise SystemExit(f"circular {circular_id} never became searchable")
+        time.sleep(0.005)
+
+
+def measure_rerun(archive: Path, db_path: Path, ids: list[int]) -> list[float]:
+    latencies = []
+    for circular_id in ids:
+        start = time.perf_counter()
+        write_circular(archive, circular_id)
+        ingest_path(db_path, archive)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure_watch(
+    archive: Path,
+    db_path: Path,
+    ids: list[int],
+    backend: str,
+    debounce: float,
+    poll_interval: float,
+) -> tuple[list[float], float]:
+    stop = threading.Event()
+    started = threading.Event()
+    thread = threading.Thread(
+        target=watch_path,
+        args=(db_path, archive),
+        kwargs={
+            "debounce": debounce,
+            "poll_interval": poll_interval,
+            "backend": backend,
+            "report": lambda message: started.set(),
+            "stop": stop,
+        },
+    )
+    thread.start()
+    started.wait()
+
+    # Idle cost: CPU used by the whole process while nothing changes.
+    cpu_start = time.process_time()
+    time.sleep(5 * max(poll_interval, 1.0))
+    idle_cpu = (time.process_time() - cpu_start) / (5 * max(poll_interval, 1.0))
+
+    latencies = []
+    for circular_id in ids:
+        start = time.perf_counter()
+        write_circular(archive, circular_id)
+        wait_until_indexed(db_path, circular_id)
+        latencies.append(time.perf_counter() - start)
+
+    stop.set()
+    thread.join()
+    return latencies, idle_cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--new-files", type=int, default=10)
+    parser.add_argument("--debounce", type=float, default=0.2)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive"
+        archive.mkdir()
+        for circular_id in range(1, args.records + 1):
+            write_circular(archive, circular_id)
+        db_path = Path(tmp) / "gcn.sqlite"
+        ingest_path(db_path, archive)
+
+        print(f"{args.records} files indexed, {args.new_files} new circulars each, {os.cpu_count()} CPUs")
+        print(f"  {'method':<16} {'median':>9} {'max':>9} {'idle CPU':>9}")
+        next_id = args.records + 1
+        runs = [("rerun ingest", None), ("watch inotify", "inotify"), ("watch poll", "poll")]
+        for name, backend in runs:
+            ids = list(range(next_id, next_id + args.new_files))
+            next_id += args.new_files
+            if backend is None:
+                latencies, idle = measure_rerun(archive, db_path, ids), None
+            else:
+                latencies, idle = measure_watch(
+                    archive, db_path, ids, backend, args.debounce, args.poll_interval
+                )
+            idle_text = "-" if idle is None else f"{idle:8.1%}"
+            print(
+                f"  {name:<16} {statistics.median(latencies):8.3f}s {max(latencies):8.3f}s"
+                f" {idle_text:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 export type PythonBridgeRequest = {
+    id?: number;
     tool: string;
-    agruments?: Record<string, unknown>;
+    arguments?: Record<string, unknown>;
 }
 
 export type PythonBridgeSuccess = {
+    id?: number | null;
     ok: true;
     result: unknown;
 }
 
 export type PythonBridgeFailure = {
+    id?: number | null;
     ok: false;
     error: string;
 }
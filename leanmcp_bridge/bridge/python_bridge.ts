@@ -1,4 +1,4 @@
-import { spawn } from "node:child_process";
+import { spawn, type ChildProcessWithoutNullStreams } from "node:child_process";
 import { fileURLToPath } from "node:url";
 import { dirname, resolve } from "node:path";
 import type {
@@ -14,21 +14,303 @@ import {
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
+// Only the tail of a worker's stderr is kept for error messages.
+const MAX_STDERR_CHARS = 4096;
+
+const DEFAULT_POOL_SIZE = 1;
+const DEFAULT_WORKER_CONCURRENCY = 4;
+const DEFAULT_MAX_PENDING = 64;
+
+function pythonBin(): string {
+  return process.env.GCN_PYTHON_BIN ?? "python";
+}
+
+function bridgeScript(): string {
+  return process.env.GCN_PYTHON_BRIDGE_SCRIPT ?? resolve(__dirname, "../py_bridge.py");
+}
+
+function positiveIntFromEnv(name: string, fallback: number): number {
+  const raw = process.env[name];
+  if (raw === undefined || raw === "") {
+    return fallback;
+  }
+
+  const value = Number(raw);
+  if (!Number.isInteger(value) || value < 1) {
+    throw new PythonBridgeLaunchError(
+      `${name} must be a positive integer, got "${raw}"`
+    );
+  }
+  return value;
+}
+
+export type PythonWorkerOptions = {
+  concurrency: number;
+  maxPending: number;
+};
+
+function settleResponse(
+  parsed: PythonBridgeResponse,
+  resolvePromise: (value: unknown) => void,
+  rejectPromise: (reason: Error) => void
+): void {
+  if (!parsed.ok) {
+    rejectPromise(new PythonBridgeError(`Python tool error: ${parsed.error}`));
+    return;
+  }
+
+  resolvePromise(parsed.result);
+}
+
+type PendingCall = {
+  resolve: (value: unknown) => void;
+  reject: (reason: Error) => void;
+};
+
+/*
+ * One resident `py_bridge.py --serve` process. Requests are written as
+ * newline-delimited JSON tagged with an id, and responses are matched back
+ * to their caller by that id, so they may complete in any order. The worker
+ * itself runs up to `concurrency` requests at once and rejects new ones once
+ * `maxPending` are outstanding.
+ */
+export class PythonWorker {
+  private readonly child: ChildProcessWithoutNullStreams;
+  private readonly pending = new Map<number, PendingCall>();
+  private nextId = 1;
+  private stdoutBuffer = "";
+  private stderrTail = "";
+  private exited = false;
+
+  constructor(options: PythonWorkerOptions) {
+    const args = [
+      bridgeScript(),
+      "--serve",
+      "--concurrency",
+      String(options.concurrency),
+      "--max-pending",
+      String(options.maxPending),
+    ];
+    this.child = spawn(pythonBin(), args, {
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+
+    this.child.stdout.setEncoding("utf-8");
+    this.child.stderr.setEncoding("utf-8");
+
+    this.child.stdout.on("data", (data: string) => this.onStdout(data));
+    this.child.stderr.on("data", (data: string) => {
+      this.stderrTail = (this.stderrTail + data).slice(-MAX_STDERR_CHARS);
+    });
+
+    this.child.on("error", (err) => {
+      this.fail(
+        new PythonBridgeLaunchError(
+          `Failed to launch Python process: ${err.message}`
+        )
+      );
+    });
+
+    // A worker that dies between calls makes the next write fail with EPIPE;
+    // without a listener that error would take down the whole server.
+    this.child.stdin.on("error", (err) => {
+      this.fail(
+        new PythonBridgeLaunchError(
+          `Failed to write to Python worker: ${err.message}. Stderr: ${this.stderrTail.trim()}`
+        )
+      );
+      this.child.kill();
+    });
+
+    // Refuse new calls as soon as the process is gone; responses it already
+    // wrote are still read until "close", which rejects whatever is left.
+    this.child.on("exit", () => {
+      this.exited = true;
+    });
+
+    this.child.on("close", (code) => {
+      this.fail(
+        new PythonBridgeLaunchError(
+          `Python worker exited with code ${code}. Stderr: ${this.stderrTail.trim()}`
+        )
+      );
+    });
+  }
+
+  get alive(): boolean {
+    return !this.exited;
+  }
+
+  get inFlight(): number {
+    return this.pending.size;
+  }
+
+  call(tool: string, args: Record<string, unknown>): Promise<unknown> {
+    if (this.exited) {
+      return Promise.reject(
+        new PythonBridgeLaunchError("Python worker is no longer running")
+      );
+    }
+
+    const id = this.nextId++;
+    const payload: PythonBridgeRequest = {
+      id,
+      tool,
+      arguments: args,
+    };
+
+    return new Promise((resolvePromise, rejectPromise) => {
+      this.pending.set(id, { resolve: resolvePromise, reject: rejectPromise });
+      this.child.stdin.write(JSON.stringify(payload) + "\n");
+    });
+  }
+
+  close(): void {
+    this.child.stdin.end();
+  }
+
+  private onStdout(data: string): void {
+    this.stdoutBuffer += data;
+
+    let newline = this.stdoutBuffer.indexOf("\n");
+    while (newline !== -1) {
+      const line = this.stdoutBuffer.slice(0, newline).trim();
+      this.stdoutBuffer = this.stdoutBuffer.slice(newline + 1);
+      if (line) {
+        this.onLine(line);
+      }
+      newline = this.stdoutBuffer.indexOf("\n");
+    }
+  }
+
+  private onLine(line: string): void {
+    let parsed: PythonBridgeResponse;
+    try {
+      parsed = JSON.parse(line) as PythonBridgeResponse;
+    } catch (parseErr) {
+      // Without an id the line cannot be routed, so the worker is unusable.
+      this.fail(
+        new PythonBridgeParseError(
+          `Failed to parse Python output as JSON. Output: ${line}. Stderr: ${this.stderrTail.trim()}. Parse error: ${
+            (parseErr as Error).message
+          }`
+        )
+      );
+      this.child.kill();
+      return;
+    }
+
+    const call = typeof parsed.id === "number" ? this.pending.get(parsed.id) : undefined;
+    if (!call) {
+      return;
+    }
+
+    this.pending.delete(parsed.id as number);
+    settleResponse(parsed, call.resolve, call.reject);
+  }
+
+  private fail(error: Error): void {
+    this.exited = true;
+    for (const call of this.pending.values()) {
+      call.reject(error);
+    }
+    this.pending.clear();
+  }
+}
+
+/*
+ * Fixed-size set of resident workers. Each call goes to the live worker with
+ * the fewest requests in flight; dead workers are replaced on demand.
+ */
+export class PythonWorkerPool {
+  private readonly workers: (PythonWorker | null)[];
+
+  constructor(
+    readonly size: number,
+    private readonly options: PythonWorkerOptions
+  ) {
+    this.workers = new Array(size).fill(null);
+  }
+
+  call(tool: string, args: Record<string, unknown>): Promise<unknown> {
+    return this.pickWorker().call(tool, args);
+  }
+
+  get inFlight(): number {
+    return this.workers.reduce((total, worker) => total + (worker?.inFlight ?? 0), 0);
+  }
+
+  close(): void {
+    for (const worker of this.workers) {
+      worker?.close();
+    }
+    this.workers.fill(null);
+  }
+
+  private pickWorker(): PythonWorker {
+    let best = 0;
+    for (let i = 0; i < this.workers.length; i++) {
+      const worker = this.workers[i];
+      if (!worker || !worker.alive) {
+        this.workers[i] = new PythonWorker(this.options);
+      }
+      if (this.workers[i]!.inFlight < this.workers[best]!.inFlight) {
+        best = i;
+      }
+    }
+    return this.workers[best]!;
+  }
+}
+
+let sharedPool: PythonWorkerPool | null = null;
+
+function getPool(): PythonWorkerPool {
+  if (!sharedPool) {
+    sharedPool = new PythonWorkerPool(
+      positiveIntFromEnv("GCN_PYTHON_POOL_SIZE", DEFAULT_POOL_SIZE),
+      {
+        concurrency: positiveIntFromEnv(
+          "GCN_PYTHON_WORKER_CONCURRENCY",
+          DEFAULT_WORKER_CONCURRENCY
+        ),
+        maxPending: positiveIntFromEnv("GCN_PYTHON_MAX_PENDING", DEFAULT_MAX_PENDING),
+      }
+    );
+  }
+  return sharedPool;
+}
+
+export function shutdownPythonWorkers(): void {
+  sharedPool?.close();
+  sharedPool = null;
+}
+
 export async function callPythonTool(
   tool: string,
   args: Record<string, unknown> = {}
 ): Promise<unknown> {
-  const pythonBin = process.env.GCN_PYTHON_BIN ?? "python";
-  const bridgeScript =
-    process.env.GCN_PYTHON_BRIDGE_SCRIPT ?? resolve(__dirname, "../py_bridge.py");
+  if (process.env.GCN_PYTHON_BRIDGE_MODE === "spawn") {
+    return spawnPythonTool(tool, args);
+  }
+
+  return getPool().call(tool, args);
+}
 
+/*
+ * Run a single tool call in a fresh `py_bridge.py` process. Slower than the
+ * resident worker but fully isolated; selected with GCN_PYTHON_BRIDGE_MODE=spawn.
+ */
+export async function spawnPythonTool(
+  tool: string,
+  args: Record<string, unknown> = {}
+): Promise<unknown> {
   const payload: PythonBridgeRequest = {
     tool,
     arguments: args,
   };
 
   return new Promise((resolvePromise, rejectPromise) => {
-    const child = spawn(pythonBin, [bridgeScript], {
+    const child = spawn(pythonBin(), [bridgeScript()], {
       stdio: ["pipe", "pipe", "pipe"],
     });
 
@@ -81,15 +363,14 @@ export async function callPythonTool(
         return;
       }
 
-      if (!parsed.ok) {
-        rejectPromise(new PythonBridgeError(`Python tool error: ${parsed.error}`));
-        return;
-      }
-
-      resolvePromise(parsed.result);
+      settleResponse(parsed, resolvePromise, rejectPromise);
     });
 
+    // If the process dies before reading its request, the write fails with
+    // EPIPE; the "close" handler above reports that.
+    child.stdin.on("error", () => {});
+
     child.stdin.write(JSON.stringify(payload));
     child.stdin.end();
   });
-}
\ No newline at end of file
+}
@@ -6,6 +6,9 @@ import { EmptyInput,
          SearchGcnCircularsInput,
          CheckForGrbRegexInput,
        } from "./input_schema.js"
+
+const NEXT_CURSOR_PREFIX = "Next cursor: ";
+
 function unwrapPythonTextItems(result: unknown): string[] {
   const items = Array.isArray(result) ? result : [result];
 
@@ -53,6 +56,15 @@ export class GcnService {
     };
   }
 
+  @Tool({
+    description: "Report hit/miss/eviction counters and occupancy of the Python search result cache",
+    inputClass: EmptyInput,
+  })
+  async search_cache_stats(_: EmptyInput) {
+    const texts = unwrapPythonTextItems(await callPythonTool("search_cache_stats", {}));
+    return JSON.parse(texts[0]);
+  }
+
   @Tool({
     description: "Load raw GCN circular JSON files by local file index range",
     inputClass: FetchGcnCircularsInput,
@@ -82,12 +94,23 @@ export class GcnService {
         query: input.query,
         event: input.event,
         limit: input.limit,
+        sort: input.sort,
+        cursor: input.cursor,
       })
     );
 
+    // The Python tool appends the cursor for the next page as a last item.
+    let nextCursor: string | null = null;
+    const last = texts[texts.length - 1];
+    if (last !== undefined && last.startsWith(NEXT_CURSOR_PREFIX)) {
+      nextCursor = last.slice(NEXT_CURSOR_PREFIX.length);
+      texts.pop();
+    }
+
     return {
       count: texts.length,
       results: texts,
+      next_cursor: nextCursor,
     };
   }
 
@@ -44,6 +44,20 @@ export class SearchGcnCircularsInput {
     default: 10,
   })
   limit?: number;
+
+  @Optional()
+  @SchemaConstraint({
+    description: "Result order: relevance (default) or date (newest first)",
+    enum: ["relevance", "date"],
+    default: "relevance",
+  })
+  sort?: string;
+
+  @Optional()
+  @SchemaConstraint({
+    description: "next_cursor from a previous call with the same query, event and sort; returns the following page",
+  })
+  cursor?: string;
 }
 
 export class FetchAndCheckCircularForGrbInput {
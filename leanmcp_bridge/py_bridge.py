@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
 import asyncio
 import json
 import sys
 import types
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Awaitable, Callable, TextIO
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_PENDING = 64
+
+Handler = Callable[[Any], Awaitable[dict[str, Any]]]
 
 
 def repo_root() -> Path:
@@ -41,45 +49,181 @@ def ensure_ollama_stub_if_missing() -> None:
         sys.modules["ollama"] = stub
 
 
-async def main_async() -> int:
-    raw = sys.stdin.read()
+def ensure_src_on_path() -> None:
+    src_dir = repo_root() / "src"
 
-    if not raw.strip():
-        print(json.dumps({"ok": False, "error": "No input provided"}))
-        return 1
+    if str(src_dir) not in sys.path:
+        sys.path.insert(0, str(src_dir))
 
-    try:
-        payload = json.loads(raw)
-    except Exception as exc:
-        print(json.dumps({"ok": False, "error": f"Invalid JSON payload: {exc}"}))
-        return 1
+
+async def handle_payload(payload: Any) -> dict[str, Any]:
+    """
+    Run one decoded request and build its response envelope.
+    """
+    if not isinstance(payload, dict):
+        return {"ok": False, "error": "Payload must be a JSON object"}
 
     tool = payload.get("tool")
     arguments = payload.get("arguments", {}) or {}
 
     if not tool:
-        print(json.dumps({"ok": False, "error": "Missing required field: tool"}))
-        return 1
-
-    root = repo_root()
-    src_dir = root / "src"
-
-    if str(src_dir) not in sys.path:
-        sys.path.insert(0, str(src_dir))
+        return {"ok": False, "error": "Missing required field: tool"}
 
     try:
+        ensure_src_on_path()
         ensure_ollama_stub_if_missing()
 
         from tools import call_tool
 
         result = await call_tool(str(tool), dict(arguments))
-        print(json.dumps({"ok": True, "result": normalize_result(result)}, ensure_ascii=False))
+        return {"ok": True, "result": normalize_result(result)}
+
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+def run_handler_in_thread(handler: Handler, payload: Any) -> dict[str, Any]:
+    """
+    Tools do blocking SQLite / Ollama work, so each request gets its own event
+    loop on a pool thread instead of sharing the serve loop.
+    """
+    return asyncio.run(handler(payload))
+
+
+async def serve_async(
+    input_stream: TextIO,
+    output_stream: TextIO,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_pending: int = DEFAULT_MAX_PENDING,
+    handler: Handler = handle_payload,
+) -> int:
+    """
+    Resident worker loop: one JSON request per line in, one JSON response per line out.
+
+    Each request may carry an "id" which is echoed back on its response so the
+    caller can correlate them. Up to `concurrency` requests run at once on a
+    thread pool and responses are written as they finish, so a slow tool does
+    not hold up quick ones. Once `max_pending` requests are outstanding, new
+    ones are rejected straight away. Malformed lines are answered with an
+    error and the loop keeps going; EOF on input drains outstanding requests
+    and ends the worker.
+    """
+    loop = asyncio.get_running_loop()
+    reader = ThreadPoolExecutor(max_workers=1)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending: set[asyncio.Task] = set()
+
+    def write_response(request_id: Any, response: dict[str, Any]) -> None:
+        # Only ever called from the event loop thread, so lines never interleave.
+        output_stream.write(json.dumps({"id": request_id, **response}, ensure_ascii=False) + "\n")
+        output_stream.flush()
+
+    async def dispatch(request_id: Any, payload: Any) -> None:
+        try:
+            response = await loop.run_in_executor(executor, run_handler_in_thread, handler, payload)
+        except Exception as exc:
+            response = {"ok": False, "error": str(exc)}
+        write_response(request_id, response)
+
+    try:
+        while True:
+            line = await loop.run_in_executor(reader, input_stream.readline)
+            if not line:
+                break
+
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                payload = json.loads(line)
+            except Exception as exc:
+                write_response(None, {"ok": False, "error": f"Invalid JSON payload: {exc}"})
+                continue
+
+            request_id = payload.get("id") if isinstance(payload, dict) else None
+
+            if len(pending) >= max_pending:
+                write_response(request_id, {
+                    "ok": False,
+                    "error": f"Worker queue is full ({max_pending} requests pending)",
+                })
+                continue
+
+            task = asyncio.create_task(dispatch(request_id, payload))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending)
         return 0
 
+    finally:
+        reader.shutdown(wait=False)
+        executor.shutdown(wait=True)
+
+
+async def main_async() -> int:
+    raw = sys.stdin.read()
+
+    if not raw.strip():
+        print(json.dumps({"ok": False, "error": "No input provided"}))
+        return 1
+
+    try:
+        payload = json.loads(raw)
     except Exception as exc:
-        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        print(json.dumps({"ok": False, "error": f"Invalid JSON payload: {exc}"}))
         return 1
 
+    response = await handle_payload(payload)
+    print(json.dumps(response, ensure_ascii=False))
+    return 0 if response["ok"] else 1
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="GCNMCP Python bridge")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="stay resident and answer newline-delimited JSON requests",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="requests run at the same time in --serve mode",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help="outstanding requests accepted before new ones are rejected in --serve mode",
+    )
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.max_pending < 1:
+        parser.error("--concurrency and --max-pending must be at least 1")
+
+    return args
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+
+    if args.serve:
+        # Responses own stdout; anything a tool prints goes to stderr instead.
+        output_stream = sys.stdout
+        sys.stdout = sys.stderr
+        return asyncio.run(serve_async(
+            sys.stdin,
+            output_stream,
+            concurrency=args.concurrency,
+            max_pending=args.max_pending,
+        ))
+
+    return asyncio.run(main_async())
+
 
 if __name__ == "__main__":
-    raise SystemExit(asyncio.run(main_async()))
\ No newline at end of file
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional time-to-live.
+
+    Holds at most max_size entries; storing into a full cache evicts the
+    least recently used one. Entries older than ttl seconds are treated as
+    missing. Entries can also be tagged with a group and a generation:
+    seeing a newer generation for a group drops everything cached for it.
+    Counters for hits, misses, evictions, expirations and invalidations are
+    kept for sizing.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Hashable, Any]] = OrderedDict()
+        self._generations: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def observe_generation(self, group: Hashable, generation: int) -> None:
+        """
+        Record the current generation of a group, dropping its entries if it moved.
+        """
+        with self._lock:
+            known = self._generations.get(group)
+            if known == generation:
+                return
+            self._generations[group] = generation
+            if known is None:
+                return
+
+            stale = [key for key, (_, key_group, _) in self._entries.items() if key_group == group]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            stored_at, _, value = entry
+            if self.ttl is not None and self._clock() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, group: Hashable = None) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock(), group, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -1,56 +1,535 @@
+import hashlib
+import math
+import os
+import re
 import sqlite3
+import threading
 from pathlib import Path
+from typing import Any, Callable, Optional, Union
 
-SCHEMA_SQL = """
-CREATE TABLE IF NOT EXISTS circulars (
-    circular_id_raw TEXT PRIMARY KEY,
-    circular_id_int INTEGER,
-    subject TEXT,
-    body TEXT,
-    created_on INTEGER,
-    submitter TEXT,
-    format TEXT,
-    raw_event_id TEXT,
-    primary_event_raw TEXT,
-    primary_event_norm TEXT,
-    extraction_source TEXT,
-    llm_confidence REAL,
-    record_hash TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS circular_events (
-    circular_id_raw TEXT NOT NULL,
-    event_norm TEXT NOT NULL,
-    is_primary INTEGER NOT NULL DEFAULT 0,
-    UNIQUE(circular_id_raw, event_norm),
-    FOREIGN KEY(circular_id_raw) REFERENCES circulars(circular_id_raw)
-);
-
-CREATE INDEX IF NOT EXISTS idx_circulars_circular_id_int
-    ON circulars(circular_id_int);
-
-CREATE INDEX IF NOT EXISTS idx_circulars_primary_event_norm
-    ON circulars(primary_event_norm);
-
-CREATE INDEX IF NOT EXISTS idx_circular_events_event_norm
-    ON circular_events(event_norm);
-
-CREATE INDEX IF NOT EXISTS idx_circulars_created_on
-    ON circulars(created_on);
-
-CREATE VIRTUAL TABLE IF NOT EXISTS circulars_fts USING fts5(
-    circular_id_raw UNINDEXED,
-    subject,
-    body
-);
-"""
+# Prepared statements kept per connection; search builds a handful of query
+# shapes, so this comfortably holds all of them.
+STATEMENT_CACHE_SIZE = 512
 
-def get_connection(db_path: str | Path) -> sqlite3.Connection:
+# Read-only search connection tuning. mmap_size is in bytes; a negative
+# cache_size is in KiB, per SQLite convention. GCN_SQLITE_IMMUTABLE=1 is only
+# safe for snapshot deployments where nothing writes to the file.
+READ_ONLY_MMAP_SIZE = int(os.environ.get("GCN_SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+READ_ONLY_CACHE_SIZE = int(os.environ.get("GCN_SQLITE_CACHE_SIZE", -64 * 1024))
+READ_ONLY_IMMUTABLE = os.environ.get("GCN_SQLITE_IMMUTABLE", "") == "1"
+
+# Page cache for bulk loads, in KiB. Large enough to keep the hot upper
+# levels of every B-tree in memory while a full archive is written.
+BULK_CACHE_SIZE = -256 * 1024
+
+# Seconds replace_database waits for readers before the WAL checkpoint.
+REPLACE_BUSY_TIMEOUT = 5.0
+
+# Version prefix of record hashes. Version 1 (unprefixed SHA1 of the whole
+# record re-serialised as JSON) is rewritten to this by schema migration 6.
+RECORD_HASH_VERSION = "2"
+
+# Text that SQLite's INTEGER (and NUMERIC) affinity converts to a number:
+# a decimal integer or real literal, with optional surrounding whitespace.
+SQLITE_SPACE = " \t\n\v\f\r"
+NUMERIC_TEXT = re.compile(r"[ \t\n\v\f\r]*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[ \t\n\v\f\r]*")
+INTEGER_TEXT = re.compile(r"[+-]?\d+")
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+def integer_affinity(value: Any) -> Any:
     """
-    Open a SQLite connection, configure it, and ensure that the schema is correct
+    The value SQLite stores when value is written to an INTEGER column.
+
+    Numeric text becomes a number, reals without a fractional part that fit
+    in 64 bits become integers, NaN becomes NULL; other values are kept.
+    Hashing this instead of the raw value makes a record's hash match the
+    one rehash_records computes from the stored row.
     """
-    db_path = str(db_path)
-    connection = sqlite3.connect(db_path)
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str) and NUMERIC_TEXT.fullmatch(value):
+        text = value.strip(SQLITE_SPACE)
+        if INTEGER_TEXT.fullmatch(text) and INT64_MIN <= int(text) <= INT64_MAX:
+            return int(text)
+        value = float(text)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer() and INT64_MIN <= value <= INT64_MAX:
+            return int(value)
+    return value
+
+
+def hash_indexed_fields(
+    circular_id_raw: str,
+    subject: str,
+    body: str,
+    created_on: Any,
+    submitter: str,
+    format: str,
+    raw_event_id: Optional[str],
+) -> str:
+    """
+    Hash a circular's indexed fields, as they are stored in the circulars table.
+
+    Each value is fed to BLAKE2b as a type tag, its byte length and its bytes,
+    so no two field lists collide by shifting text between fields. Taking the
+    stored values means existing rows can be rehashed from the table alone;
+    callers hashing a record pass created_on through integer_affinity first.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in (circular_id_raw, subject, body, created_on, submitter, format, raw_event_id):
+        if value is None:
+            digest.update(b"n;")
+            continue
+        tag = b"i" if isinstance(value, int) else b"s"
+        data = str(value).encode("utf-8", errors="surrogatepass")
+        digest.update(tag + str(len(data)).encode() + b":")
+        digest.update(data)
+    return f"{RECORD_HASH_VERSION}:{digest.hexdigest()}"
+
+
+def rehash_records(connection: sqlite3.Connection) -> None:
+    """
+    Migration step: recompute every record_hash from the stored columns.
+    Only record_hash is written, so the FTS triggers do not fire.
+    """
+    connection.create_function("hash_indexed_fields", 7, hash_indexed_fields, deterministic=True)
+    connection.execute(
+        """
+        UPDATE circulars SET record_hash = hash_indexed_fields(
+            circular_id_raw, subject, body, created_on, submitter, format, raw_event_id
+        )
+        """
+    )
+
+
+# A migration step is a SQL statement or a function run on the connection.
+MigrationStep = Union[str, Callable[[sqlite3.Connection], None]]
+
+# Ordered schema migrations. Entry N (1-based) upgrades a database from
+# user_version N-1 to N and runs in its own transaction. Shipped entries must
+# never be edited; change the schema by appending a new one.
+MIGRATIONS: list[tuple[MigrationStep, ...]] = [
+    # 1: initial schema. IF NOT EXISTS lets databases created before
+    # versioning (user_version 0) adopt it without changes.
+    (
+        """
+        CREATE TABLE IF NOT EXISTS circulars (
+            circular_id_raw TEXT PRIMARY KEY,
+            circular_id_int INTEGER,
+            subject TEXT,
+            body TEXT,
+            created_on INTEGER,
+            submitter TEXT,
+            format TEXT,
+            raw_event_id TEXT,
+            primary_event_raw TEXT,
+            primary_event_norm TEXT,
+            extraction_source TEXT,
+            llm_confidence REAL,
+            record_hash TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS circular_events (
+            circular_id_raw TEXT NOT NULL,
+            event_norm TEXT NOT NULL,
+            is_primary INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(circular_id_raw, event_norm),
+            FOREIGN KEY(circular_id_raw) REFERENCES circulars(circular_id_raw)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_circulars_circular_id_int
+            ON circulars(circular_id_int)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_circulars_primary_event_norm
+            ON circulars(primary_event_norm)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_circular_events_event_norm
+            ON circular_events(event_norm)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_circulars_created_on
+            ON circulars(created_on)
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS circulars_fts USING fts5(
+            circular_id_raw UNINDEXED,
+            subject,
+            body
+        )
+        """,
+    ),
+    # 2: external-content FTS. The index reads subject/body from circulars by
+    # rowid instead of storing a second copy; triggers keep it in sync.
+    (
+        "DROP TABLE IF EXISTS circulars_fts",
+        """
+        CREATE VIRTUAL TABLE circulars_fts USING fts5(
+            subject,
+            body,
+            content='circulars'
+        )
+        """,
+        """
+        CREATE TRIGGER circulars_fts_ai AFTER INSERT ON circulars BEGIN
+            INSERT INTO circulars_fts(rowid, subject, body)
+            VALUES (new.rowid, new.subject, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER circulars_fts_ad AFTER DELETE ON circulars BEGIN
+            INSERT INTO circulars_fts(circulars_fts, rowid, subject, body)
+            VALUES ('delete', old.rowid, old.subject, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER circulars_fts_au AFTER UPDATE OF subject, body ON circulars BEGIN
+            INSERT INTO circulars_fts(circulars_fts, rowid, subject, body)
+            VALUES ('delete', old.rowid, old.subject, old.body);
+            INSERT INTO circulars_fts(rowid, subject, body)
+            VALUES (new.rowid, new.subject, new.body);
+        END
+        """,
+        "INSERT INTO circulars_fts(circulars_fts) VALUES ('rebuild')",
+    ),
+    # 3: give circulars an explicit INTEGER PRIMARY KEY. The implicit rowid
+    # may be renumbered by VACUUM, which would silently desync the FTS index;
+    # an alias column is stable. Existing rowids are carried over.
+    (
+        "DROP TABLE circulars_fts",
+        """
+        CREATE TABLE circulars_new (
+            id INTEGER PRIMARY KEY,
+            circular_id_raw TEXT NOT NULL UNIQUE,
+            circular_id_int INTEGER,
+            subject TEXT,
+            body TEXT,
+            created_on INTEGER,
+            submitter TEXT,
+            format TEXT,
+            raw_event_id TEXT,
+            primary_event_raw TEXT,
+            primary_event_norm TEXT,
+            extraction_source TEXT,
+            llm_confidence REAL,
+            record_hash TEXT NOT NULL
+        )
+        """,
+        """
+        INSERT INTO circulars_new (
+            id, circular_id_raw, circular_id_int, subject, body, created_on,
+            submitter, format, raw_event_id, primary_event_raw,
+            primary_event_norm, extraction_source, llm_confidence, record_hash
+        )
+        SELECT
+            rowid, circular_id_raw, circular_id_int, subject, body, created_on,
+            submitter, format, raw_event_id, primary_event_raw,
+            primary_event_norm, extraction_source, llm_confidence, record_hash
+        FROM circulars
+        """,
+        "DROP TABLE circulars",
+        "ALTER TABLE circulars_new RENAME TO circulars",
+        """
+        CREATE INDEX idx_circulars_circular_id_int
+            ON circulars(circular_id_int)
+        """,
+        """
+        CREATE INDEX idx_circulars_primary_event_norm
+            ON circulars(primary_event_norm)
+        """,
+        """
+        CREATE INDEX idx_circulars_created_on
+            ON circulars(created_on)
+        """,
+        """
+        CREATE VIRTUAL TABLE circulars_fts USING fts5(
+            subject,
+            body,
+            content='circulars',
+            content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER circulars_fts_ai AFTER INSERT ON circulars BEGIN
+            INSERT INTO circulars_fts(rowid, subject, body)
+            VALUES (new.id, new.subject, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER circulars_fts_ad AFTER DELETE ON circulars BEGIN
+            INSERT INTO circulars_fts(circulars_fts, rowid, subject, body)
+            VALUES ('delete', old.id, old.subject, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER circulars_fts_au AFTER UPDATE OF subject, body ON circulars BEGIN
+            INSERT INTO circulars_fts(circulars_fts, rowid, subject, body)
+            VALUES ('delete', old.id, old.subject, old.body);
+            INSERT INTO circulars_fts(rowid, subject, body)
+            VALUES (new.id, new.subject, new.body);
+        END
+        """,
+        "INSERT INTO circulars_fts(circulars_fts) VALUES ('rebuild')",
+    ),
+    # 4: small key/value store for index-wide state. 'generation' counts
+    # writes to the index so readers can tell cached results have gone stale.
+    (
+        """
+        CREATE TABLE index_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+        "INSERT INTO index_meta (key, value) VALUES ('generation', 0)",
+    ),
+    # 5: manifest of ingested source files, so an incremental ingest can
+    # skip files whose size and mtime (or, failing that, content) are unchanged.
+    (
+        """
+        CREATE TABLE source_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            scanned_ns INTEGER NOT NULL
+        )
+        """,
+    ),
+    # 6: record hashes move from SHA1 over the re-serialised source record to
+    # versioned BLAKE2b over the indexed fields. Existing rows are rehashed
+    # in place rather than re-ingested.
+    (rehash_records,),
+    # 7: how far an interrupted ingest got, per input path, so the next run
+    # can resume from the file and record it last committed.
+    (
+        """
+        CREATE TABLE ingest_checkpoints (
+            input_path TEXT PRIMARY KEY,
+            source_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            record_offset INTEGER NOT NULL
+        )
+        """,
+    ),
+    # 8: what the GCN API last said about each circular ID, so the fetcher
+    # can revalidate downloads with conditional requests and skip holes it
+    # already knows are missing. Not derived from the input files.
+    (
+        """
+        CREATE TABLE fetch_state (
+            circular_id INTEGER PRIMARY KEY,
+            status INTEGER NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            checked_at INTEGER NOT NULL
+        )
+        """,
+    ),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(connection: sqlite3.Connection) -> int:
+    """
+    Return the schema version recorded in the database header.
+    """
+    return connection.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def migrate(
+    connection: sqlite3.Connection,
+    migrations: list[tuple[MigrationStep, ...]] | None = None,
+) -> int:
+    """
+    Apply any pending migrations and return the resulting schema version.
+
+    An up-to-date database costs a single PRAGMA read. Each pending migration
+    runs in its own write transaction, so a failure rolls back only that step
+    and leaves the database at the last good version. Foreign keys are
+    switched off while migrating so tables can be rebuilt, and checked again
+    before each step commits.
+    """
+    if migrations is None:
+        migrations = MIGRATIONS
+    target = len(migrations)
+
+    current = schema_version(connection)
+    if current > target:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than supported version {target}"
+        )
+    if current == target:
+        return current
+
+    foreign_keys = connection.execute("PRAGMA foreign_keys;").fetchone()[0]
+    connection.execute("PRAGMA foreign_keys=OFF;")
+    try:
+        while current < target:
+            connection.execute("BEGIN IMMEDIATE;")
+            try:
+                # Another connection may have migrated while we waited for the lock.
+                current = schema_version(connection)
+                if current < target:
+                    for step in migrations[current]:
+                        if callable(step):
+                            step(connection)
+                        else:
+                            connection.execute(step)
+                    if connection.execute("PRAGMA foreign_key_check;").fetchone():
+                        raise sqlite3.IntegrityError(
+                            f"Migration {current + 1} left foreign key violations"
+                        )
+                    current += 1
+                    connection.execute(f"PRAGMA user_version = {current};")
+                connection.execute("COMMIT;")
+            except BaseException:
+                connection.execute("ROLLBACK;")
+                raise
+    finally:
+        connection.execute(f"PRAGMA foreign_keys={foreign_keys};")
+
+    return current
+
+
+def get_generation(connection: sqlite3.Connection) -> int:
+    """
+    Return the index generation, which changes whenever circulars are written.
+    """
+    return connection.execute(
+        "SELECT value FROM index_meta WHERE key = 'generation';"
+    ).fetchone()[0]
+
+
+def bump_generation(connection: sqlite3.Connection) -> int:
+    """
+    Advance the index generation and return the new value.
+
+    Call inside the transaction that changed the index, so readers never see
+    new data under the old generation.
+    """
+    return connection.execute(
+        "UPDATE index_meta SET value = value + 1 WHERE key = 'generation' RETURNING value;"
+    ).fetchone()[0]
+
+
+def rebuild_fts(connection: sqlite3.Connection) -> None:
+    """
+    Rebuild circulars_fts from the circulars table and merge its segments.
+
+    Repairs an index that has drifted from its content, e.g. after rows were
+    changed with the sync triggers missing.
+    """
+    with connection:
+        connection.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('rebuild');")
+        connection.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('optimize');")
+        bump_generation(connection)
+
+
+def defer_secondary_schema(connection: sqlite3.Connection) -> list[str]:
+    """
+    Drop the secondary indexes and FTS sync triggers, returning the SQL that
+    recreates them. For bulk loads into a new database, which then build them
+    once with restore_secondary_schema instead of row by row.
+    """
+    deferred = connection.execute(
+        """
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+        ORDER BY type, name
+        """
+    ).fetchall()
+    for kind, name, _ in deferred:
+        connection.execute(f'DROP {kind.upper()} "{name}";')
+    return [sql for _, _, sql in deferred]
+
+
+def restore_secondary_schema(connection: sqlite3.Connection, statements: list[str]) -> None:
+    """
+    Recreate what defer_secondary_schema dropped and build circulars_fts from
+    the loaded rows in one pass.
+    """
+    for statement in statements:
+        connection.execute(statement)
+    connection.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('rebuild');")
+    connection.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('optimize');")
+
+
+def get_bulk_connection(db_path: str | Path) -> sqlite3.Connection:
+    """
+    Open a connection for filling a new database file in one go.
+
+    There is no journal and no fsync, so a crash leaves a file to delete
+    rather than one to recover; only use it on a file nothing else has open.
+    Foreign keys are not enforced while loading; check them before use.
+    """
+    connection = sqlite3.connect(str(db_path), cached_statements=STATEMENT_CACHE_SIZE)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=OFF;")
+    connection.execute("PRAGMA synchronous=OFF;")
+    connection.execute("PRAGMA locking_mode=EXCLUSIVE;")
+    connection.execute("PRAGMA temp_store=MEMORY;")
+    connection.execute(f"PRAGMA cache_size={BULK_CACHE_SIZE};")
+
+    migrate(connection)
+    connection.execute("PRAGMA foreign_keys=OFF;")
+    return connection
+
+
+def replace_database(new_path: str | Path, db_path: str | Path) -> None:
+    """
+    Atomically move a finished database file over db_path.
+
+    The old file's WAL is checkpointed and truncated first, so none of its
+    frames can be replayed against the new file. Connections still open on
+    the old file keep reading it; get_cached_connection reopens on next use.
+    The new file is fsynced before the rename and its directory after it, so
+    a crash leaves either the old index or the complete new one, as a bulk
+    load writes without fsync.
+    """
+    with open(new_path, "rb") as f:
+        os.fsync(f.fileno())
+
+    if os.path.exists(db_path):
+        old = sqlite3.connect(str(db_path), timeout=REPLACE_BUSY_TIMEOUT)
+        try:
+            busy = old.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchone()[0]
+        finally:
+            old.close()
+        if busy:
+            raise sqlite3.OperationalError(f"Could not checkpoint {db_path}; it is still busy")
+
+    os.replace(new_path, db_path)
+    fsync_directory(os.path.dirname(os.path.abspath(db_path)))
+
+
+def fsync_directory(path: str | Path) -> None:
+    """
+    Make a rename in directory path durable. A no-op where directories
+    cannot be opened, as on Windows.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except (PermissionError, IsADirectoryError):
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+_local = threading.local()
+
+
+def _configure(connection: sqlite3.Connection) -> None:
     connection.row_factory = sqlite3.Row
 
     connection.execute("PRAGMA journal_mode=WAL;")
@@ -58,5 +537,124 @@ def get_connection(db_path: str | Path) -> sqlite3.Connection:
     connection.execute("PRAGMA temp_store=MEMORY;")
     connection.execute("PRAGMA foreign_keys=ON;")
 
-    connection.executescript(SCHEMA_SQL)
-    return connection
\ No newline at end of file
+
+def get_connection(db_path: str | Path) -> sqlite3.Connection:
+    """
+    Open a SQLite connection, configure it, and ensure that the schema is correct
+    """
+    db_path = str(db_path)
+    connection = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+    _configure(connection)
+
+    migrate(connection)
+    return connection
+
+
+def get_readonly_connection(
+    db_path: str | Path,
+    immutable: bool | None = None,
+    mmap_size: int | None = None,
+    cache_size: int | None = None,
+) -> sqlite3.Connection:
+    """
+    Open a read-only, memory-mapped connection for search traffic.
+
+    The file is opened with URI mode=ro (plus immutable=1 when requested), so
+    no write locks are taken and pages are read through mmap instead of being
+    copied into SQLite's cache. A missing or out-of-date database is created or
+    migrated once through a normal read-write connection first, except for an
+    immutable snapshot, which is never written: there a missing file raises
+    FileNotFoundError and an outdated schema RuntimeError. A schema newer than
+    this code raises RuntimeError, as in migrate().
+    """
+    if immutable is None:
+        immutable = READ_ONLY_IMMUTABLE
+    if mmap_size is None:
+        mmap_size = READ_ONLY_MMAP_SIZE
+    if cache_size is None:
+        cache_size = READ_ONLY_CACHE_SIZE
+
+    path = Path(os.path.abspath(db_path))
+    if not path.exists():
+        if immutable:
+            raise FileNotFoundError(f"Immutable database {path} does not exist")
+        get_connection(path).close()
+
+    uri = path.as_uri() + "?mode=ro" + ("&immutable=1" if immutable else "")
+    connection = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+
+    current = schema_version(connection)
+    if current > SCHEMA_VERSION:
+        connection.close()
+        raise RuntimeError(
+            f"Database schema version {current} is newer than supported version {SCHEMA_VERSION}"
+        )
+    if current < SCHEMA_VERSION:
+        connection.close()
+        if immutable:
+            raise RuntimeError(
+                f"Immutable database schema version {current} is older than version "
+                f"{SCHEMA_VERSION}; migrate it with a read-write connection first"
+            )
+        get_connection(path).close()
+        connection = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA query_only=ON;")
+    connection.execute("PRAGMA temp_store=MEMORY;")
+    connection.execute(f"PRAGMA mmap_size={int(mmap_size)};")
+    connection.execute(f"PRAGMA cache_size={int(cache_size)};")
+    return connection
+
+
+def _file_identity(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def get_cached_connection(db_path: str | Path, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Return this thread's long-lived connection to db_path, opening it on first use.
+
+    Connections are cached per thread, per path and per mode, so configuration
+    and the schema version check happen once per thread. read_only=True gives
+    a get_readonly_connection() with the module defaults. The caller must not
+    close the returned connection; use close_cached_connections() instead.
+    """
+    key = (os.path.abspath(db_path), read_only)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    # A database swapped in by replace_database is a new file at the same
+    # path; a connection to the old file is closed and reopened.
+    identity = _file_identity(key[0])
+    cached = connections.get(key)
+    if cached is not None:
+        connection, opened_identity = cached
+        if opened_identity == identity:
+            return connection
+        connection.close()
+
+    if read_only:
+        connection = get_readonly_connection(key[0])
+    else:
+        connection = sqlite3.connect(key[0], cached_statements=STATEMENT_CACHE_SIZE)
+        _configure(connection)
+        migrate(connection)
+
+    connections[key] = (connection, _file_identity(key[0]))
+    return connection
+
+
+def close_cached_connections() -> None:
+    """
+    Close every connection cached by the calling thread.
+    """
+    connections = getattr(_local, "connections", None) or {}
+    for connection, _ in connections.values():
+        connection.close()
+    connections.clear()
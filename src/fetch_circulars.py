@@ -1,26 +1,802 @@
-import requests
+import argparse
+import gzip
 import json
-from pathlib import Path
+import os
+import random
+import sqlite3
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping, Protocol
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.db import bump_generation, get_connection
+from src.indexer import (
+    DEFAULT_BATCH_SIZE,
+    INGEST_WAL_SIZE_LIMIT,
+    PreparedCircular,
+    parse_line,
+    stored_hashes,
+    write_prepared,
+)
+
+DEFAULT_BASE_URL = "https://gcn.nasa.gov/circulars"
+
+# IDs tried past the highest circular already downloaded.
+DEFAULT_COUNT = 5000
+
+# Requests in flight at once, and the sustained request rate shared by all
+# of them. The old sequential script managed roughly 4 requests a second.
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0
+
+# Attempts after the first for a request that fails with a connection
+# error, a timeout or one of RETRY_STATUSES. The delay before retry n is
+# drawn uniformly from [0, min(BACKOFF_CAP, backoff * 2**n)] ("full
+# jitter"), so workers that failed together do not retry together.
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Seconds to wait for the server to connect and to send each response.
+REQUEST_TIMEOUT = 10.0
+
+# IDs queued per worker ahead of the one being handed back, so a slow
+# response holds up at most this many finished ones.
+QUEUED_PER_WORKER = 2
+
+USER_AGENT = "GCNMCP-fetch/1.0"
+
+# fetch_state rows written per transaction.
+STATE_COMMIT_EVERY = 500
+
+# When writing straight into the index: seconds a downloaded circular may
+# wait for its batch to fill before the batch is committed anyway, and the
+# most circulars an archive segment holds.
+INDEX_FLUSH_INTERVAL = 1.0
+SEGMENT_MAX_RECORDS = 50000
+
+# (circular ID, final response or None, error message if no response came).
+FetchResult = tuple[int, requests.Response | None, str | None]
+
+# (ETag, Last-Modified) the API sent with a circular, either may be None.
+Validators = tuple[str | None, str | None]
+
+UPSERT_FETCH_STATE_SQL = """
+INSERT INTO fetch_state (circular_id, status, etag, last_modified, checked_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(circular_id) DO UPDATE SET
+    status = excluded.status,
+    etag = COALESCE(excluded.etag, fetch_state.etag),
+    last_modified = COALESCE(excluded.last_modified, fetch_state.last_modified),
+    checked_at = excluded.checked_at
+"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows bursts of up to burst requests, then
+    rate per second. acquire() blocks until the caller may send. Tokens are
+    reserved when asked for, so concurrent callers queue up evenly spaced
+    instead of waking together.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = (self._updated - now) + max(-self._tokens, 0) / self.rate
+        if wait > 0:
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hands out no tokens for the next seconds, e.g. after the server
+        answered 429: every worker backs off, not just the one that was told.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0)
+            self._updated = max(self._updated, now + seconds)
+
+
+def retry_after(response: requests.Response | None) -> float | None:
+    """
+    Seconds the server asked us to wait in a Retry-After header, given
+    either as seconds or as an HTTP date, or None if it did not say.
+    """
+    value = None if response is None else response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(
+    attempt: int,
+    response: requests.Response | None = None,
+    backoff: float = DEFAULT_BACKOFF,
+) -> float:
+    """
+    Seconds to wait before retry number attempt (from 0): exponential
+    backoff with full jitter, but never less than the server's Retry-After.
+    """
+    delay = random.uniform(0, min(BACKOFF_CAP, backoff * 2 ** attempt))
+    requested = retry_after(response)
+    return delay if requested is None else max(delay, requested)
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """
+    A session whose keep-alive pool holds a connection per worker, so
+    requests reuse connections instead of opening one each. Retries are
+    left to CircularFetcher.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+    return session
+
+
+class CircularFetcher:
+    """
+    Downloads circulars as <base_url>/<id>.json on up to workers threads
+    sharing one session, rate limited by a token bucket and retrying
+    transient failures with backoff.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        workers: int = DEFAULT_WORKERS,
+        rate: float | None = DEFAULT_RATE,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.limiter = TokenBucket(rate, burst=workers) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = make_session(workers)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "CircularFetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def url(self, circular_id: int) -> str:
+        return f"{self.base_url}/{circular_id}.json"
+
+    def fetch(self, circular_id: int, validators: Validators | None = None) -> requests.Response:
+        """
+        GETs one circular, retrying connection errors, timeouts and
+        RETRY_STATUSES up to self.retries times. Returns the final response,
+        whatever its status; raises the last requests.RequestException if
+        no response came. Given the validators of a copy already held, the
+        request is conditional and an unchanged circular is answered 304.
+        """
+        headers = {}
+        if validators is not None:
+            etag, last_modified = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = self.session.get(
+                    self.url(circular_id), headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                response.close()
+
+            delay = retry_delay(attempt, response, self.backoff)
+            if response is not None and response.status_code == 429 and self.limiter is not None:
+                # The next acquire() waits the pause out.
+                self.limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def _fetch_result(self, circular_id: int, validators: Validators | None) -> FetchResult:
+        try:
+            return circular_id, self.fetch(circular_id, validators), None
+        except requests.RequestException as exc:
+            return circular_id, None, str(exc)
+
+    def fetch_many(
+        self,
+        circular_ids: Iterable[int],
+        stop_at_missing: bool = False,
+        validators: Mapping[int, Validators] | None = None,
+        tick: Callable[[], float | None] | None = None,
+    ) -> Iterator[FetchResult]:
+        """
+        Fetches circular_ids concurrently and yields a FetchResult for each,
+        in the order given. Only a few IDs per worker are queued ahead, so
+        circular_ids can be long or lazy. With stop_at_missing, nothing
+        after the first 404 is yielded or requested. IDs with an entry in
+        validators are fetched conditionally. While waiting for the next
+        result, tick is called on the caller's thread each time the seconds
+        it last returned have passed; None means it has nothing to wait for.
+        """
+        ids = iter(circular_ids)
+        validators = validators or {}
+        pending: deque[Future[FetchResult]] = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def submit_next() -> None:
+                for circular_id in ids:
+                    pending.append(
+                        executor.submit(self._fetch_result, circular_id, validators.get(circular_id))
+                    )
+                    return
+
+            try:
+                for _ in range(self.workers * QUEUED_PER_WORKER):
+                    submit_next()
+                while pending:
+                    timeout = tick() if tick is not None else None
+                    while True:
+                        try:
+                            result = pending[0].result(timeout=timeout)
+                            break
+                        except FutureTimeoutError:
+                            timeout = tick()
+                    pending.popleft()
+                    yield result
+                    if stop_at_missing and result[1] is not None and result[1].status_code == 404:
+                        return
+                    submit_next()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+class IdBitmap:
+    """
+    A set of circular IDs kept as one bit per ID, so every ID in the archive
+    fits in a few kilobytes and the holes below the highest one can be
+    listed without building a set of the rest.
+    """
+
+    def __init__(self, circular_ids: Iterable[int] = ()) -> None:
+        self._bits = bytearray()
+        for circular_id in circular_ids:
+            self.add(circular_id)
+
+    def add(self, circular_id: int) -> None:
+        if circular_id < 0:
+            raise ValueError(f"Circular ID must not be negative: {circular_id}")
+        index, bit = divmod(circular_id, 8)
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << bit
 
-data_dir = Path("../data")
-existing = {float(f.stem) for f in data_dir.glob("*.json")}
-max_id = int(max(existing))
+    def __contains__(self, circular_id: object) -> bool:
+        if not isinstance(circular_id, int) or circular_id < 0:
+            return False
+        index, bit = divmod(circular_id, 8)
+        return index < len(self._bits) and bool(self._bits[index] >> bit & 1)
 
-print(f"Current max circular ID: {max_id}")
+    def __iter__(self) -> Iterator[int]:
+        for index, byte in enumerate(self._bits):
+            while byte:
+                low = byte & -byte
+                yield index * 8 + low.bit_length() - 1
+                byte ^= low
 
-for i in range(max_id + 1, max_id + 5000):
-    out = data_dir / f"{i}.json"
-    if out.exists():
-        continue
+    def __len__(self) -> int:
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def max(self) -> int | None:
+        """
+        The highest ID in the set, or None if it is empty.
+        """
+        used = self._bits.rstrip(b"\0")
+        if not used:
+            return None
+        return (len(used) - 1) * 8 + used[-1].bit_length() - 1
+
+    def missing(self, first: int, last: int) -> Iterator[int]:
+        """
+        IDs from first to last, inclusive, that are not in the set.
+        """
+        circular_id = max(first, 0)
+        while circular_id <= last:
+            if circular_id % 8 == 0 and self._bits[circular_id // 8 : circular_id // 8 + 1] == b"\xff":
+                circular_id += 8
+                continue
+            if circular_id not in self:
+                yield circular_id
+            circular_id += 1
+
+
+def existing_ids(data_dir: str | Path, connection: sqlite3.Connection | None = None) -> IdBitmap:
+    """
+    IDs of the circulars already saved in data_dir as <id>.json, if it
+    exists, and, given an index connection, those already in the index.
+    """
+    ids = IdBitmap()
+    try:
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                stem, suffix = os.path.splitext(entry.name)
+                if suffix == ".json" and stem.isdigit():
+                    ids.add(int(stem))
+    except FileNotFoundError:
+        pass
+    if connection is not None:
+        for (circular_id,) in connection.execute(
+            "SELECT circular_id_int FROM circulars WHERE circular_id_int >= 0"
+        ):
+            ids.add(circular_id)
+    return ids
+
+
+def load_fetch_state(connection: sqlite3.Connection) -> tuple[dict[int, Validators], IdBitmap]:
+    """
+    From fetch_state: the validators of every circular last fetched with
+    some, and the IDs the API last answered 404.
+    """
+    validators: dict[int, Validators] = {}
+    missing = IdBitmap()
+    for circular_id, status, etag, last_modified in connection.execute(
+        "SELECT circular_id, status, etag, last_modified FROM fetch_state"
+    ):
+        if status == 404:
+            missing.add(circular_id)
+        elif etag is not None or last_modified is not None:
+            validators[circular_id] = (etag, last_modified)
+    return validators, missing
+
+
+def fetch_state_row(circular_id: int, response: requests.Response) -> tuple:
+    """
+    The fetch_state row recording response. A 304 means the copy held is
+    current, so it is recorded as a 200; validators it does not resend are
+    kept by UPSERT_FETCH_STATE_SQL.
+    """
+    status = 200 if response.status_code == 304 else response.status_code
+    return (
+        circular_id,
+        status,
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+        int(time.time()),
+    )
+
+
+def record_fetch_state(connection: sqlite3.Connection, rows: list[tuple]) -> None:
+    with connection:
+        connection.executemany(UPSERT_FETCH_STATE_SQL, rows)
+    rows.clear()
+
+
+def save_circular(data_dir: Path, circular_id: int, text: str) -> bool:
+    """
+    Writes a circular to data_dir/<id>.json, replacing it atomically so a
+    watching ingest never reads half a file. Returns False, without
+    touching the file, if it already holds text.
+    """
+    path = data_dir / f"{circular_id}.json"
+    data = text.encode("utf-8")
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    partial = data_dir / f".{circular_id}.json.part"
+    partial.write_bytes(data)
+    os.replace(partial, path)
+    return True
+
+
+class Sink(Protocol):
+    """
+    Where fetch_into puts each circular downloaded.
+    """
+
+    def save(self, circular_id: int, text: str) -> bool:
+        """
+        Stores a circular; returns False if it was already held as it is.
+        Raises ValueError if text is not a circular.
+        """
+        ...
+
+    def flush(self) -> None:
+        """
+        Makes everything saved so far durable.
+        """
+        ...
+
+    def tick(self) -> float | None:
+        """
+        Called while no circular is arriving. Flushes whatever is due and
+        returns the seconds until something next will be, or None.
+        """
+        ...
+
+
+class FileSink:
+    """
+    Saves each circular as data_dir/<id>.json, ready for the indexer.
+    """
+
+    def __init__(self, data_dir: Path) -> None:
+        self.data_dir = data_dir
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+    def save(self, circular_id: int, text: str) -> bool:
+        return save_circular(self.data_dir, circular_id, text)
+
+    def flush(self) -> None:
+        pass
+
+    def tick(self) -> float | None:
+        return None
+
+
+class SegmentArchive:
+    """
+    Appends raw circulars, one JSON object per line, to gzip segments in
+    directory. A segment is written as a .part file and only renamed to
+    circulars-<UTC time>-<first ID>-<last ID>.jsonl.gz once it is closed,
+    after which it never changes; it holds at most max_records circulars.
+    Finished segments can be ingested as they are.
+    """
+
+    def __init__(self, directory: str | Path, max_records: int = SEGMENT_MAX_RECORDS) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_records = max_records
+        self.segments: list[Path] = []
+        self._file: gzip.GzipFile | None = None
+        self._partial: Path | None = None
+        self._first_id = self._last_id = 0
+        self._records = 0
+
+    def append(self, circular_id: int, text: str) -> None:
+        if self._file is None:
+            self._partial = self.directory / f".segment-{os.getpid()}-{len(self.segments)}.jsonl.gz.part"
+            self._file = gzip.open(self._partial, "wb", compresslevel=6)
+            self._first_id = circular_id
+            self._records = 0
+        if "\n" in text:
+            text = json.dumps(json.loads(text))
+        self._file.write(text.encode("utf-8") + b"\n")
+        self._last_id = circular_id
+        self._records += 1
+        if self._records >= self.max_records:
+            self.close()
+
+    def flush(self) -> None:
+        """
+        Flushes the open segment so its .part file can be read up to here
+        with zcat, should the run die before closing it.
+        """
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        segment = self.directory / f"circulars-{stamp}-{self._first_id}-{self._last_id}.jsonl.gz"
+        os.replace(self._partial, segment)
+        self.segments.append(segment)
+
+
+class IndexSink:
+    """
+    Writes each circular straight into the index behind connection, in
+    batches committed once batch_size have arrived or the oldest has waited
+    flush_interval seconds, so circulars become searchable about as soon as
+    they are downloaded. fetch_into calls tick while downloads stall, so a
+    batch is committed on time even when no further circular arrives. A
+    circular whose record hash matches the indexed copy is skipped and save
+    returns False, as for an unchanged file. With an archive, the raw JSON
+    of every circular saved is appended to it first.
+    """
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = INDEX_FLUSH_INTERVAL,
+        archive: SegmentArchive | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.connection = connection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.archive = archive
+        self._clock = clock
+        self._batch: list[PreparedCircular] = []
+        self._deadline: float | None = None
+        self.written = 0
+        self.changed = 0
+        connection.execute(f"PRAGMA journal_size_limit={INGEST_WAL_SIZE_LIMIT};")
+
+    def save(self, circular_id: int, text: str) -> bool:
+        prepared = parse_line(text)
+        row = prepared[0]
+        if stored_hashes(self.connection, [row[0]]).get(row[0]) == row[-1]:
+            return False
+        if self.archive is not None:
+            self.archive.append(circular_id, text)
+        self._batch.append(prepared)
+        if self._deadline is None:
+            self._deadline = self._clock() + self.flush_interval
+        if len(self._batch) >= self.batch_size or self._clock() >= self._deadline:
+            self.flush()
+        return True
+
+    def tick(self) -> float | None:
+        if self._deadline is None:
+            return None
+        remaining = self._deadline - self._clock()
+        if remaining > 0:
+            return remaining
+        self.flush()
+        return None
+
+    def flush(self) -> None:
+        if self.archive is not None:
+            self.archive.flush()
+        if not self._batch:
+            return
+        with self.connection:
+            changed = write_prepared(self.connection, self._batch)
+            if changed:
+                bump_generation(self.connection)
+        self.written += len(self._batch)
+        self.changed += changed
+        self._batch.clear()
+        self._deadline = None
+
+
+def fetch_into(
+    fetcher: CircularFetcher,
+    circular_ids: Iterable[int],
+    sink: Sink,
+    saved: IdBitmap,
+    counts: dict[str, int],
+    connection: sqlite3.Connection | None = None,
+    validators: Mapping[int, Validators] | None = None,
+    at_end: bool = False,
+) -> None:
+    """
+    Fetches circular_ids into sink, printing what happens to each and
+    tallying it in counts. Given an index connection, each answer is
+    recorded in fetch_state, after the circulars it covers are flushed to
+    the sink. With at_end, the IDs run past the newest circular: the first
+    404 ends the run and is not recorded, since that ID may yet be
+    published.
+    """
+    state_rows: list[tuple] = []
+    for circular_id, response, error in fetcher.fetch_many(circular_ids, at_end, validators, sink.tick):
+        if response is None:
+            counts["failed"] += 1
+            print(f"Error {circular_id}: {error}")
+            continue
+
+        if response.status_code == 304:
+            counts["unchanged"] += 1
+        elif response.status_code == 404:
+            if at_end:
+                print(f"404 at {circular_id} — may have reached the end")
+                continue
+            counts["missing"] += 1
+        elif response.status_code == 200:
+            try:
+                stored = sink.save(circular_id, response.text)
+            except ValueError as exc:
+                counts["failed"] += 1
+                print(f"Error {circular_id}: {exc}")
+                continue
+            if not stored:
+                counts["unchanged"] += 1
+            elif circular_id in saved:
+                counts["updated"] += 1
+                print(f"Updated {circular_id}")
+            else:
+                counts["downloaded"] += 1
+                print(f"Downloaded {circular_id}")
+        else:
+            counts["failed"] += 1
+            print(f"Error {circular_id}: HTTP {response.status_code}")
+            continue
+
+        if connection is not None:
+            state_rows.append(fetch_state_row(circular_id, response))
+            if len(state_rows) >= STATE_COMMIT_EVERY:
+                sink.flush()
+                record_fetch_state(connection, state_rows)
+
+    sink.flush()
+    if connection is not None and state_rows:
+        record_fetch_state(connection, state_rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point: python -m src.fetch_circulars [data_dir] ...
+    """
+    parser = argparse.ArgumentParser(description="Download new GCN circulars as JSON files or into the index")
+    parser.add_argument("data_dir", nargs="?", default="data", help="directory of <id>.json files (default data)")
+    parser.add_argument(
+        "--start",
+        type=int,
+        help="first new circular ID to try (default: one past the highest already held)",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=DEFAULT_COUNT,
+        help=f"new IDs to try before stopping, unless a 404 marks the end first (default {DEFAULT_COUNT})",
+    )
+    parser.add_argument(
+        "--db",
+        help="SQLite index whose circulars count as held, and where each answer's ETag and "
+        "Last-Modified are kept for --revalidate",
+    )
+    parser.add_argument(
+        "--fill-gaps",
+        action="store_true",
+        help="also fetch IDs below the highest held that are neither held nor known to be missing",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="re-request every circular held, conditionally where validators are known (needs --db)",
+    )
+    parser.add_argument(
+        "--ingest",
+        action="store_true",
+        help="write circulars straight into the --db index as they arrive instead of into data_dir",
+    )
+    parser.add_argument(
+        "--archive",
+        help="with --ingest, also append the raw JSON to gzip segments in this directory",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"with --ingest, circulars written per batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"requests in flight at once (default {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"requests per second across all workers; 0 for no limit (default {DEFAULT_RATE:g})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"retries for connection errors, 429 and 5xx responses (default {DEFAULT_RETRIES})",
+    )
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"(default {DEFAULT_BASE_URL})")
+    args = parser.parse_args(argv)
+
+    if args.count < 1 or args.workers < 1 or args.batch_size < 1 or args.rate < 0 or args.retries < 0:
+        parser.error(
+            "--count, --workers and --batch-size must be at least 1, --rate and --retries at least 0"
+        )
+    if (args.revalidate or args.ingest) and not args.db:
+        parser.error("--revalidate and --ingest need --db")
+    if args.archive and not args.ingest:
+        parser.error("--archive only applies with --ingest")
+
+    data_dir = Path(args.data_dir)
+    connection = get_connection(args.db) if args.db else None
+    counts = {"downloaded": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0}
+    archive = SegmentArchive(args.archive) if args.archive else None
+    if args.ingest:
+        sink: Sink = IndexSink(connection, args.batch_size, archive=archive)
+        destination = args.db
+    else:
+        sink = FileSink(data_dir)
+        destination = str(data_dir)
     try:
-        r = requests.get(f"https://gcn.nasa.gov/circulars/{i}.json", timeout=10)
-        if r.status_code == 404:
-            print(f"404 at {i} — may have reached the end")
-            break
-        r.raise_for_status()
-        out.write_text(r.text, encoding="utf-8")
-        print(f"Downloaded {i}")
-        time.sleep(0.2)  # be polite
-    except Exception as e:
-        print(f"Error {i}: {e}")
\ No newline at end of file
+        saved = existing_ids(data_dir, connection)
+        validators, known_missing = load_fetch_state(connection) if connection else ({}, IdBitmap())
+        highest = saved.max() or 0
+        start = args.start
+        if start is None:
+            start = highest + 1
+            print(f"Current max circular ID: {highest}")
+
+        with CircularFetcher(args.base_url, args.workers, args.rate, args.retries) as fetcher:
+            if args.revalidate:
+                print(f"Revalidating {len(saved)} circulars, {len(validators)} conditionally")
+                fetch_into(fetcher, saved, sink, saved, counts, connection, validators)
+            if args.fill_gaps:
+                gaps = (i for i in saved.missing(1, highest) if i not in known_missing)
+                fetch_into(fetcher, gaps, sink, saved, counts, connection)
+            wanted = (i for i in range(start, start + args.count) if i not in saved)
+            fetch_into(fetcher, wanted, sink, saved, counts, connection, at_end=True)
+    finally:
+        # Whatever was fetched before an error or Ctrl-C is kept.
+        sink.flush()
+        if archive is not None:
+            archive.close()
+        if connection is not None:
+            connection.close()
+
+    print(
+        f"Downloaded {counts['downloaded']} circulars into {destination}, updated {counts['updated']}, "
+        f"{counts['unchanged']} unchanged, {counts['missing']} missing, {counts['failed']} failed"
+    )
+    if archive is not None:
+        for segment in archive.segments:
+            print(f"Archived to {segment}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,43 @@
+import argparse
+import bz2
+import ctypes
+import gzip
+import io
 import json
 import hashlib
+import itertools
+import lzma
+import os
+import select
+import sqlite3
+import stat as stat_module
+import struct
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Iterable
+from typing import IO, Any, Callable, Iterable, Iterator, TextIO
 from decimal import Decimal, InvalidOperation
 
-from src.db import get_connection
+from src.db import (
+    INT64_MAX,
+    INT64_MIN,
+    bump_generation,
+    defer_secondary_schema,
+    get_bulk_connection,
+    get_connection,
+    get_generation,
+    hash_indexed_fields,
+    integer_affinity,
+    rebuild_fts,
+    replace_database,
+    restore_secondary_schema,
+)
 from src.utils import clean_text, normalize_event, extract_event_regex
 
 def sha1_text(text: str) -> str:
@@ -47,22 +80,221 @@ def parse_circular_id(value: Any) -> tuple[str | None, int | None]:
 
     return text, None
 
-def upsert_circular(conn, record: dict[str, Any]) -> None:
+UPSERT_CIRCULAR_SQL = """
+    INSERT INTO circulars (
+        circular_id_raw,
+        circular_id_int,
+        subject,
+        body,
+        created_on,
+        submitter,
+        format,
+        raw_event_id,
+        primary_event_raw,
+        primary_event_norm,
+        extraction_source,
+        llm_confidence,
+        record_hash
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(circular_id_raw) DO UPDATE SET
+        circular_id_int=excluded.circular_id_int,
+        subject=excluded.subject,
+        body=excluded.body,
+        created_on=excluded.created_on,
+        submitter=excluded.submitter,
+        format=excluded.format,
+        raw_event_id=excluded.raw_event_id,
+        primary_event_raw=excluded.primary_event_raw,
+        primary_event_norm=excluded.primary_event_norm,
+        extraction_source=excluded.extraction_source,
+        llm_confidence=excluded.llm_confidence,
+        record_hash=excluded.record_hash
+"""
+
+DELETE_EVENTS_SQL = "DELETE FROM circular_events WHERE circular_id_raw = ?"
+
+INSERT_EVENT_SQL = """
+    INSERT OR IGNORE INTO circular_events (circular_id_raw, event_norm, is_primary)
+    VALUES (?, ?, ?)
+"""
+
+# Records buffered by ingest_path before they are written together.
+DEFAULT_BATCH_SIZE = 500
+
+# Records ingest_path writes per transaction. Each commit makes the chunk
+# visible to searches and is the point an interrupted ingest resumes from.
+DEFAULT_COMMIT_EVERY = 5000
+
+# Bytes of WAL kept on disk once ingest has checkpointed it; anything beyond
+# is truncated rather than left behind by a large ingest.
+INGEST_WAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+# .json files at least this large are streamed element by element when they
+# hold an array, rather than loaded whole; STREAM_CHUNK_SIZE characters are
+# read at a time.
+STREAM_JSON_MIN_SIZE = 32 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Bytes read at a time when hashing a source file for the manifest.
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Inputs ingest understands: plain record files, the same compressed as a
+# whole, and tar or zip archives of them. Compressed and archived inputs are
+# decompressed as they are read rather than extracted to disk.
+RECORD_SUFFIXES = (".json", ".jsonl")
+COMPRESSED_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+COMPRESSED_SUFFIXES = tuple(
+    record + compressed for record in RECORD_SUFFIXES for compressed in COMPRESSED_OPENERS
+)
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip")
+
+# Parallel ingest hands each worker this many files per task, and keeps at
+# most TASKS_IN_FLIGHT_PER_WORKER tasks queued per worker.
+FILES_PER_TASK = 32
+TASKS_IN_FLIGHT_PER_WORKER = 4
+
+# A size and mtime match is only trusted for files modified at least this
+# long before their manifest entry was recorded. A file rewritten within the
+# same timestamp tick as the last scan could otherwise keep its old stats.
+RACY_WINDOW_NS = 2_000_000_000
+
+# Stored hashes are looked up with IN lists of at most this many IDs, well
+# under SQLite's bound-parameter limit.
+HASH_LOOKUP_CHUNK = 500
+
+# Watch mode waits until files have stopped changing for WATCH_DEBOUNCE
+# seconds before ingesting them, but never holds a change back for longer
+# than WATCH_MAX_DELAY. Without inotify, directories are polled every
+# WATCH_POLL_INTERVAL seconds and every file every WATCH_FULL_SCAN_INTERVAL,
+# and a file counts as written once unmodified for WATCH_SETTLE seconds.
+WATCH_DEBOUNCE = 1.0
+WATCH_MAX_DELAY = 10.0
+WATCH_POLL_INTERVAL = 2.0
+WATCH_FULL_SCAN_INTERVAL = 60.0
+WATCH_SETTLE = 0.5
+
+# Errors from reading one bad input file, which watch mode reports and
+# skips rather than stopping on.
+INPUT_ERRORS = (
+    OSError,
+    ValueError,
+    EOFError,
+    lzma.LZMAError,
+    tarfile.TarError,
+    zipfile.BadZipFile,
+    zlib.error,
+)
+
+
+def identify_circular(record: dict[str, Any]) -> tuple[str, int | None, str]:
     """
-    Insert or update a circular record.
+    Returns (circular_id_raw, circular_id_int, record_hash) for a record,
+    the parts needed to decide whether it has to be written at all.
     """
     circular_id_raw, circular_id_int = parse_circular_id(record.get("circularId"))
     if circular_id_raw is None:
         raise ValueError("Record is missing circularId")
 
-    subject = clean_text(record.get("subject"))
-    body = clean_text(record.get("body"))
+    record_hash = hash_indexed_fields(
+        circular_id_raw,
+        clean_text(record.get("subject")),
+        clean_text(record.get("body")),
+        integer_affinity(record.get("createdOn")),
+        clean_text(record.get("submitter")),
+        clean_text(record.get("format")),
+        clean_text(record.get("eventId")) or None,
+    )
+    return circular_id_raw, circular_id_int, record_hash
+
+
+# A circulars row (circular_id_raw first, record_hash last) and its
+# circular_events rows, ready to write.
+PreparedCircular = tuple[tuple[Any, ...], list[tuple[str, str, int]]]
+
+
+def prepare_circular(
+    record: dict[str, Any],
+    circular_id_raw: str,
+    circular_id_int: int | None,
+    record_hash: str,
+) -> PreparedCircular:
+    """
+    Build the circulars row and circular_events rows for a record.
+    """
+    primary_event_raw, all_events, extraction_source = extract_event_regex(record)
+    primary_event_norm = normalize_event(primary_event_raw)
+
+    if primary_event_norm and primary_event_norm not in all_events:
+        all_events.insert(0, primary_event_norm)
+
+    row = (
+        circular_id_raw,
+        circular_id_int,
+        clean_text(record.get("subject")),
+        clean_text(record.get("body")),
+        integer_affinity(record.get("createdOn")),
+        clean_text(record.get("submitter")),
+        clean_text(record.get("format")),
+        clean_text(record.get("eventId")) or None,
+        primary_event_raw,
+        primary_event_norm,
+        extraction_source,
+        None,
+        record_hash,
+    )
+    events = [
+        (circular_id_raw, event_norm, 1 if event_norm == primary_event_norm else 0)
+        for event_norm in all_events
+    ]
+    return row, events
+
+
+def prepare_record(record: dict[str, Any]) -> PreparedCircular:
+    """
+    identify_circular and prepare_circular in one step, for callers that
+    prepare records away from the database.
+    """
+    return prepare_circular(record, *identify_circular(record))
+
+
+def parse_line(line: str) -> PreparedCircular:
+    """
+    Parses and validates one circular's JSON text, such as a line of an
+    NDJSON stream or a downloaded circular, into a record ready to write.
+    Raises ValueError if it is not a circular, including when createdOn is
+    not an integer timestamp (integral floats and numeric strings count) or
+    an integer ID or timestamp does not fit SQLite's 64 bits, so one bad
+    record cannot fail the batch it would be written in.
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object")
+    circular_id_raw, circular_id_int = parse_circular_id(record.get("circularId"))
+    if circular_id_raw is None:
+        raise ValueError("Record is missing circularId")
+    if circular_id_int is not None and not INT64_MIN <= circular_id_int <= INT64_MAX:
+        raise ValueError(f"Invalid circularId: {record['circularId']!r}")
     created_on = record.get("createdOn")
-    submitter = clean_text(record.get("submitter"))
-    fmt = clean_text(record.get("format"))
-    raw_event_id = clean_text(record.get("eventId")) or None
+    stored = integer_affinity(created_on)
+    if stored is not None and (
+        isinstance(created_on, bool)
+        or not isinstance(stored, int)
+        or not INT64_MIN <= stored <= INT64_MAX
+    ):
+        raise ValueError(f"Invalid createdOn: {created_on!r}")
+    try:
+        return prepare_record(record)
+    except (TypeError, AttributeError) as exc:
+        raise ValueError(f"Invalid record: {exc}") from exc
+
 
-    record_hash = sha1_text(json.dumps(record, sort_keys=True, ensure_ascii=False))
+def upsert_circular(conn, record: dict[str, Any]) -> bool:
+    """
+    Insert or update a circular record.
+    Returns False if the stored copy was already identical, True otherwise.
+    """
+    circular_id_raw, circular_id_int, record_hash = identify_circular(record)
 
     existing = conn.execute(
         "SELECT record_hash FROM circulars WHERE circular_id_raw = ?",
@@ -70,142 +302,1259 @@ def upsert_circular(conn, record: dict[str, Any]) -> None:
     ).fetchone()
 
     if existing and existing["record_hash"] == record_hash:
-        return
+        return False
 
-    primary_event_raw, all_events, extraction_source = extract_event_regex(record)
-    primary_event_norm = normalize_event(primary_event_raw)
+    row, events = prepare_circular(record, circular_id_raw, circular_id_int, record_hash)
 
-    if primary_event_norm and primary_event_norm not in all_events:
-        all_events.insert(0, primary_event_norm)
+    conn.execute(UPSERT_CIRCULAR_SQL, row)
+    conn.execute(DELETE_EVENTS_SQL, (circular_id_raw,))
+    conn.executemany(INSERT_EVENT_SQL, events)
 
-    conn.execute(
-        """
-        INSERT INTO circulars (
-            circular_id_raw,
-            circular_id_int,
-            subject,
-            body,
-            created_on,
-            submitter,
-            format,
-            raw_event_id,
-            primary_event_raw,
-            primary_event_norm,
-            extraction_source,
-            llm_confidence,
-            record_hash
+    return True
+
+
+def stored_hashes(conn, circular_ids: list[str]) -> dict[str, str]:
+    """
+    Returns {circular_id_raw: record_hash} for the IDs already in the index.
+    """
+    hashes: dict[str, str] = {}
+    for start in range(0, len(circular_ids), HASH_LOOKUP_CHUNK):
+        chunk = circular_ids[start:start + HASH_LOOKUP_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT circular_id_raw, record_hash FROM circulars WHERE circular_id_raw IN ({placeholders})",
+            chunk,
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(circular_id_raw) DO UPDATE SET
-            circular_id_int=excluded.circular_id_int,
-            subject=excluded.subject,
-            body=excluded.body,
-            created_on=excluded.created_on,
-            submitter=excluded.submitter,
-            format=excluded.format,
-            raw_event_id=excluded.raw_event_id,
-            primary_event_raw=excluded.primary_event_raw,
-            primary_event_norm=excluded.primary_event_norm,
-            extraction_source=excluded.extraction_source,
-            llm_confidence=excluded.llm_confidence,
-            record_hash=excluded.record_hash
-        """,
-        (
-            circular_id_raw,
-            circular_id_int,
-            subject,
-            body,
-            created_on,
-            submitter,
-            fmt,
-            raw_event_id,
-            primary_event_raw,
-            primary_event_norm,
-            extraction_source,
-            None,
-            record_hash
-        ),
+        hashes.update((row[0], row[1]) for row in rows)
+    return hashes
+
+
+def upsert_circulars(conn, records: Iterable[dict[str, Any]]) -> int:
+    """
+    Insert or update a batch of circular records with one hash lookup and
+    one executemany per statement. Returns the number of records written.
+
+    If a circular appears more than once in the batch, its last copy wins,
+    as it would with upsert_circular called in order.
+    """
+    latest: dict[str, tuple[dict[str, Any], int | None, str]] = {}
+    for record in records:
+        circular_id_raw, circular_id_int, record_hash = identify_circular(record)
+        latest.pop(circular_id_raw, None)
+        latest[circular_id_raw] = (record, circular_id_int, record_hash)
+
+    existing = stored_hashes(conn, list(latest))
+
+    prepared = [
+        prepare_circular(record, circular_id_raw, circular_id_int, record_hash)
+        for circular_id_raw, (record, circular_id_int, record_hash) in latest.items()
+        if existing.get(circular_id_raw) != record_hash
+    ]
+    return write_prepared_rows(conn, prepared, existing)
+
+
+def write_prepared(conn, prepared: Iterable[PreparedCircular]) -> int:
+    """
+    Write a batch of prepare_record results, skipping circulars whose stored
+    hash already matches. Returns the number of records written.
+
+    If a circular appears more than once in the batch, its last copy wins.
+    """
+    latest: dict[str, PreparedCircular] = {}
+    for entry in prepared:
+        circular_id_raw = entry[0][0]
+        latest.pop(circular_id_raw, None)
+        latest[circular_id_raw] = entry
+
+    existing = stored_hashes(conn, list(latest))
+    changed = [
+        entry for circular_id_raw, entry in latest.items()
+        if existing.get(circular_id_raw) != entry[0][-1]
+    ]
+    return write_prepared_rows(conn, changed, existing)
+
+
+def write_prepared_rows(
+    conn,
+    prepared: list[PreparedCircular],
+    existing: dict[str, str],
+) -> int:
+    """
+    Write circulars known to need writing, one executemany per statement.
+    `existing` holds the stored hashes of the ones already indexed.
+    """
+    if not prepared:
+        return 0
+
+    conn.executemany(UPSERT_CIRCULAR_SQL, [row for row, _ in prepared])
+    # Only circulars that were already indexed can have stale event rows.
+    conn.executemany(
+        DELETE_EVENTS_SQL,
+        [(row[0],) for row, _ in prepared if row[0] in existing],
     )
+    conn.executemany(INSERT_EVENT_SQL, [event for _, events in prepared for event in events])
+    return len(prepared)
 
-    conn.execute("DELETE FROM circular_events WHERE circular_id_raw = ?", (circular_id_raw,))
-    for event_norm in all_events:
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO circular_events (circular_id_raw, event_norm, is_primary)
-            VALUES (?, ?, ?)
-            """,
-            (
-                circular_id_raw,
-                event_norm,
-                1 if event_norm == primary_event_norm else 0,
-            ),
+def input_group(name: str) -> int | None:
+    """
+    Returns where files named name come in ingest order: .json files (0),
+    then .jsonl files (1), then compressed files and archives of them (2).
+    None for files ingest does not read.
+    """
+    if name.endswith(".json"):
+        return 0
+    if name.endswith(".jsonl"):
+        return 1
+    if name.endswith(COMPRESSED_SUFFIXES) or name.endswith(ARCHIVE_SUFFIXES):
+        return 2
+    return None
+
+
+def scan_input_files(input_path: str | Path) -> list[tuple[str, int, int]]:
+    """
+    Lists the files ingest reads from input_path as (absolute path, size,
+    mtime_ns), in ingest order: the file itself, or every .json, then every
+    .jsonl, then every compressed file or archive of them under a directory
+    (see input_group). A directory is walked with os.scandir, so the stats
+    come from the same pass; paths stay strings and are sorted by component,
+    the order sorted(Path.rglob(...)) gives.
+    """
+    root = os.path.abspath(input_path)
+
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        return [(root, stat.st_size, stat.st_mtime_ns)]
+    if not os.path.isdir(root):
+        raise FileNotFoundError(input_path)
+
+    groups: tuple[list[tuple[str, int, int]], ...] = ([], [], [])
+    directories = [root]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                    continue
+                group = input_group(entry.name)
+                if group is not None and entry.is_file():
+                    stat = entry.stat()
+                    groups[group].append((entry.path, stat.st_size, stat.st_mtime_ns))
+
+    def component_order(item: tuple[str, int, int]) -> list[str]:
+        return item[0].split(os.sep)
+
+    return [item for files in groups for item in sorted(files, key=component_order)]
+
+
+def stat_input_files(paths: Iterable[str]) -> list[tuple[str, int, int]]:
+    """
+    Lists the files among paths that ingest reads and that still exist, as
+    scan_input_files does for a directory, in ingest order.
+    """
+    files = []
+    for path in paths:
+        group = input_group(os.path.basename(path))
+        if group is None:
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if stat_module.S_ISREG(stat.st_mode):
+            files.append((group, path.split(os.sep), (path, stat.st_size, stat.st_mtime_ns)))
+    files.sort(key=lambda item: item[:2])
+    return [item for _, _, item in files]
+
+
+def iter_input_files(input_path: str | Path) -> list[Path]:
+    """
+    Lists the files ingest reads from input_path, in ingest order.
+    """
+    return [Path(path) for path, _, _ in scan_input_files(input_path)]
+
+
+def content_hash(path: str | Path) -> str:
+    """
+    Returns the manifest hash of a source file's bytes, read HASH_BLOCK_SIZE
+    bytes at a time so large files are never held in memory whole.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# A source_files row: (path, size, mtime_ns, content_hash, scanned_ns).
+ManifestRow = tuple[str, int, int, str, int]
+
+
+def select_changed_files(
+    conn,
+    input_path: str | Path,
+    force: bool = False,
+) -> tuple[list[ManifestRow], list[ManifestRow]]:
+    """
+    Compares the files under input_path with the source_files manifest (see
+    compare_with_manifest).
+    """
+    scanned_ns = time.time_ns()
+    manifest = {
+        row[0]: tuple(row[1:])
+        for row in conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, scanned_ns FROM source_files"
         )
+    }
+    return compare_with_manifest(scan_input_files(input_path), manifest, scanned_ns, force)
 
-    conn.execute("DELETE FROM circulars_fts WHERE circular_id_raw = ?", (circular_id_raw,))
-    conn.execute(
+
+def select_changed_paths(conn, paths: Iterable[str]) -> tuple[list[ManifestRow], list[ManifestRow]]:
+    """
+    Compares just the given files with the source_files manifest, looking up
+    only their own entries. Paths ingest does not read, or that no longer
+    exist, are left out.
+    """
+    scanned_ns = time.time_ns()
+    files = stat_input_files(paths)
+    manifest = {}
+    for i in range(0, len(files), HASH_LOOKUP_CHUNK):
+        chunk = [path for path, _, _ in files[i:i + HASH_LOOKUP_CHUNK]]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, scanned_ns FROM source_files "
+            f"WHERE path IN ({placeholders})",
+            chunk,
+        ):
+            manifest[row[0]] = tuple(row[1:])
+    return compare_with_manifest(files, manifest, scanned_ns)
+
+
+def compare_with_manifest(
+    files: list[tuple[str, int, int]],
+    manifest: dict[str, tuple],
+    scanned_ns: int,
+    force: bool = False,
+) -> tuple[list[ManifestRow], list[ManifestRow]]:
+    """
+    Compares scanned (path, size, mtime_ns) files with their manifest
+    entries, keyed by path.
+
+    Returns the manifest rows of the files that need parsing, in ingest
+    order, to record once their records are written; and the rows of files
+    that were touched but hold the same bytes, to record straight away. A
+    file whose size and mtime_ns match its manifest entry is skipped without
+    being opened. One whose stats moved is read and hashed, and only parsed
+    if its bytes changed. force parses every file.
+    """
+    changed = []
+    refreshed = []
+    for path, size, mtime_ns in files:
+        known = None if force else manifest.get(path)
+
+        if (
+            known is not None
+            and known[:2] == (size, mtime_ns)
+            and mtime_ns + RACY_WINDOW_NS <= known[3]
+        ):
+            continue
+
+        file_hash = content_hash(path)
+        row = (path, size, mtime_ns, file_hash, scanned_ns)
+        if known is None or known[2] != file_hash:
+            changed.append(row)
+        else:
+            refreshed.append(row)
+
+    return changed, refreshed
+
+
+def record_manifest(conn, manifest_rows: list[ManifestRow]) -> None:
+    """
+    Stores select_changed_files' manifest rows.
+    """
+    conn.executemany(
         """
-        INSERT INTO circulars_fts (circular_id_raw, subject, body)
-        VALUES (?, ?, ?)
+        INSERT INTO source_files (path, size, mtime_ns, content_hash, scanned_ns)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            size = excluded.size,
+            mtime_ns = excluded.mtime_ns,
+            content_hash = excluded.content_hash,
+            scanned_ns = excluded.scanned_ns
         """,
-        (
-            circular_id_raw,
-            subject,
-            body
-        ),
+        manifest_rows,
     )
 
+
+def iter_json_array(
+    f: TextIO,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    prefix: str = "",
+) -> Iterator[Any]:
+    """
+    Yields the elements of the JSON array in f one at a time, reading
+    chunk_size characters at a time, so memory is bounded by the largest
+    element rather than the file. prefix is text already read from f.
+    """
+    decoder = json.JSONDecoder()
+    buffer = prefix
+    pos = 0
+    eof = False
+
+    def skip_whitespace() -> str:
+        # Returns the next significant character, reading more as needed.
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = chunk, 0, not chunk
+
+    def finish() -> None:
+        nonlocal pos
+        pos += 1
+        if skip_whitespace():
+            raise ValueError("Extra data after JSON array")
+
+    if skip_whitespace() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if skip_whitespace() == "]":
+        finish()
+        return
+
+    while True:
+        # A value cut off by the end of the buffer may still decode: a number
+        # missing digits, or missing the tail of its fraction or exponent
+        # (".", "e", "e-"). It only counts once a ',' or ']' follows it, or
+        # enough text that it cannot be such a tail.
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                following = end
+                while following < len(buffer) and buffer[following] in " \t\n\r":
+                    following += 1
+                if (
+                    eof
+                    or len(buffer) - following > 2
+                    or (following < len(buffer) and buffer[following] in ",]")
+                ):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+        pos = end
+        yield value
+
+        separator = skip_whitespace()
+        if separator == "]":
+            finish()
+            return
+        if separator != ",":
+            raise ValueError("Expected ',' or ']' in JSON array")
+        pos += 1
+        skip_whitespace()
+
+
+def iter_text_records(
+    f: TextIO, name: str, size: int | None, start: int = 0
+) -> Iterator[dict[str, Any]]:
+    """
+    Gets records from an open .json (object or list) or .jsonl text stream,
+    skipping the first start records (JSONL lines are skipped without being
+    parsed). name picks the format; a .json stream holding an array is read
+    element by element if it is at least STREAM_JSON_MIN_SIZE bytes, or if
+    its size is None (unknown).
+    The stream is only read forwards, so it can be a decompressor or an
+    archive member.
+    """
+    if name.endswith(".jsonl"):
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if start:
+                start -= 1
+                continue
+            yield json.loads(line)
+    elif name.endswith(".json"):
+        head = f.read(STREAM_CHUNK_SIZE)
+        if (size is None or size >= STREAM_JSON_MIN_SIZE) and head.lstrip()[:1] == "[":
+            yield from itertools.islice(iter_json_array(f, prefix=head), start, None)
+            return
+
+        payload = json.loads(head + f.read())
+        if isinstance(payload, list):
+            for record in payload[start:]:
+                yield record
+        elif isinstance(payload, dict):
+            if not start:
+                yield payload
+        else:
+            raise ValueError(f"Unsupported JSON paload in {name}")
+    else:
+        raise ValueError(f"Unsupported file type: {name}")
+
+
+def open_member_text(member: IO[bytes], size: int) -> TextIO:
+    """
+    Opens an archive member as text. Members below STREAM_JSON_MIN_SIZE are
+    decoded in one go, which costs much less per member than a TextIOWrapper
+    on archives of many small files.
+    """
+    if size < STREAM_JSON_MIN_SIZE:
+        return io.StringIO(member.read().decode("utf-8"))
+    return io.TextIOWrapper(member, encoding="utf-8")
+
+
+def iter_archive_records(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Gets records from every .json and .jsonl member of a tar (optionally
+    compressed) or zip archive, in archive order. Members are decompressed
+    as they are read; nothing is extracted to disk.
+    """
+    if path.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = info.filename.lower()
+                if info.is_dir() or not name.endswith(RECORD_SUFFIXES):
+                    continue
+                with archive.open(info) as member:
+                    text = open_member_text(member, info.file_size)
+                    yield from iter_text_records(text, name, info.file_size)
+        return
+
+    # Members are visited in archive order, so a compressed tar is only ever
+    # read forwards and never rewound to reach one.
+    with tarfile.open(path, "r:*") as archive:
+        for info in archive:
+            name = info.name.lower()
+            if not info.isfile() or not name.endswith(RECORD_SUFFIXES):
+                continue
+            text = open_member_text(archive.extractfile(info), info.size)
+            yield from iter_text_records(text, name, info.size)
+
+
+def iter_file_records(path: Path, start: int = 0) -> Iterable[dict[str, Any]]:
+    """
+    Gets records from one input file, skipping the first start records: a
+    .json (object or list) or .jsonl file, the same compressed with gzip,
+    bzip2 or xz, or a tar or zip archive of them.
+    """
+    name = path.name.lower()
+    if name.endswith(ARCHIVE_SUFFIXES):
+        yield from itertools.islice(iter_archive_records(path), start, None)
+        return
+
+    opener = open
+    for suffix, compressed_open in COMPRESSED_OPENERS.items():
+        if name.endswith(suffix):
+            name, opener = name[:-len(suffix)], compressed_open
+            break
+    if not name.endswith(RECORD_SUFFIXES):
+        raise ValueError(f"Unsupported file type: {path}")
+
+    # A compressed file's own size says nothing useful about its text's (an
+    # array export can shrink several hundredfold), so arrays in compressed
+    # files are always streamed.
+    size = path.stat().st_size if opener is open else None
+    with opener(path, "rt", encoding="utf-8") as f:
+        yield from iter_text_records(f, name, size, start)
+
+
 def iter_json_records(input_path: str | Path) -> Iterable[dict[str, Any]]:
     """
     Gets records from json file or directory.
     """
-    path = Path(input_path)
-
-    if path.is_file():
-        if path.suffix.lower() == ".jsonl":
-            with path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        yield json.loads(line)
-        elif path.suffix.lower() == ".json":
-            with path.open("r", encoding="utf-8") as f:
-                payload = json.load(f)
-                if isinstance(payload, list):
-                    for record in payload:
-                        yield record
-                elif isinstance(payload, dict):
-                    yield payload
-                else:
-                    raise ValueError(f"Unsupported JSON paload in {input_path}")
-        else:
-            raise ValueError(f"Unsupported file type: {path}")
-        
-    elif path.is_dir():
-        for child in sorted(path.rglob("*.json")):
-            with child.open("r", encoding="utf-8") as f:
-                yield json.load(f)
-
-        for child in sorted(path.rglob("*.jsonl")):
-            with child.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        yield json.loads(line)
+    for path in iter_input_files(input_path):
+        yield from iter_file_records(path)
+
+
+def prepare_files(tasks: list[tuple[str, int]]) -> list[list[PreparedCircular]]:
+    """
+    Worker task: parse, hash and extract events for the records of each
+    (path, start) in tasks, from record start on. Returns one list per file.
+    """
+    return [
+        [prepare_record(record) for record in iter_file_records(Path(path), start)]
+        for path, start in tasks
+    ]
+
+
+def iter_prepared_parallel(
+    files: list[tuple[Path, int]],
+    workers: int,
+) -> Iterator[list[PreparedCircular]]:
+    """
+    Prepares the records of each (path, start) in files on a pool of worker
+    processes and yields them file by file in order, so duplicate IDs
+    resolve the same way as a serial ingest. At most a few tasks per worker
+    are in flight, which bounds memory on large archives.
+    """
+    paths = [(str(path), start) for path, start in files]
+    tasks = [paths[i:i + FILES_PER_TASK] for i in range(0, len(paths), FILES_PER_TASK)]
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending: deque[Future] = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(prepare_files, task))
+            if len(pending) >= workers * TASKS_IN_FLIGHT_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def load_checkpoint(conn, input_key: str) -> tuple[str, int, int, str, int] | None:
+    """
+    Returns the (source path, size, mtime_ns, content_hash, record offset)
+    an interrupted ingest of input_key got to, if any.
+    """
+    row = conn.execute(
+        """
+        SELECT source_path, size, mtime_ns, content_hash, record_offset
+        FROM ingest_checkpoints WHERE input_path = ?
+        """,
+        (input_key,),
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def save_checkpoint(conn, input_key: str, source: ManifestRow, record_offset: int) -> None:
+    """
+    Records that every record of input_key before record_offset in source
+    has been written.
+    """
+    conn.execute(
+        """
+        INSERT INTO ingest_checkpoints (
+            input_path, source_path, size, mtime_ns, content_hash, record_offset
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(input_path) DO UPDATE SET
+            source_path = excluded.source_path,
+            size = excluded.size,
+            mtime_ns = excluded.mtime_ns,
+            content_hash = excluded.content_hash,
+            record_offset = excluded.record_offset
+        """,
+        (input_key, *source[:4], record_offset),
+    )
+
+
+def validate_ingest_options(batch_size: int, workers: int) -> None:
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+
+def ingest_files(
+    conn,
+    files: list[ManifestRow],
+    batch_size: int,
+    workers: int,
+    commit_every: int | None = None,
+    input_key: str | None = None,
+) -> int:
+    """
+    Writes the records of files (select_changed_files rows) to conn,
+    batch_size records at a time, recording each file in the manifest along
+    with its last records. Bumps the index generation if anything changed.
+    Returns number of records read.
+
+    With commit_every, the transaction is committed every commit_every
+    records, so readers see progress and a crash loses at most one chunk.
+    Each commit saves a checkpoint under input_key (the file and record
+    reached), and a later run resumes from it if that file is unchanged; the
+    WAL is checkpointed after each commit so it does not keep growing.
+    Without commit_every, committing is left to the caller.
+
+    With workers > 1, files are parsed, hashed and event-extracted on that
+    many processes while this process remains the only SQLite writer.
+    """
+    starts = [0] * len(files)
+    checkpoint = load_checkpoint(conn, input_key) if input_key else None
+    if checkpoint:
+        for i, row in enumerate(files):
+            if row[:4] == checkpoint[:4]:
+                starts[i] = checkpoint[4]
+                break
+
+    sources = [(Path(row[0]), start) for row, start in zip(files, starts)]
+    if workers > 1:
+        items: Iterable[Iterable[Any]] = iter_prepared_parallel(sources, workers)
+        write_batch = write_prepared
     else:
-        raise FileNotFoundError(input_path)
-    
-def ingest_path(db_path: str | Path, input_path: str | Path) -> int:
+        items = (iter_file_records(path, start) for path, start in sources)
+        write_batch = upsert_circulars
+
+    count = 0
+    changed = 0
+    uncommitted = 0
+    batch: list[Any] = []
+    completed: list[ManifestRow] = []
+
+    def flush() -> None:
+        nonlocal batch, changed
+        if batch:
+            changed += write_batch(conn, batch)
+            batch = []
+        record_manifest(conn, completed)
+        completed.clear()
+
+    for row, offset, records in zip(files, starts, items):
+        for item in records:
+            batch.append(item)
+            count += 1
+            offset += 1
+            uncommitted += 1
+            if len(batch) >= batch_size:
+                flush()
+            if commit_every and uncommitted >= commit_every:
+                flush()
+                # Committed with the records, so search caches drop their results.
+                if changed:
+                    bump_generation(conn)
+                    changed = 0
+                if input_key:
+                    save_checkpoint(conn, input_key, row, offset)
+                conn.commit()
+                conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+                uncommitted = 0
+        completed.append(row)
+
+    flush()
+    if changed:
+        bump_generation(conn)
+    if input_key:
+        conn.execute("DELETE FROM ingest_checkpoints WHERE input_path = ?", (input_key,))
+    return count
+
+
+def ingest_path(
+    db_path: str | Path,
+    input_path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    force: bool = False,
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+) -> int:
     """
-    Ingests all records form input_path into the databse.
-    Returns number of records ingested.
+    Ingests all records form input_path into the databse, batch_size records
+    at a time. Returns number of records ingested.
+
+    Files unchanged since they were last ingested are skipped (see
+    select_changed_files), so their records are not counted. Skipping assumes
+    a circular lives in one file; if the same ID appears in several files and
+    only an earlier one changes, pass force=True to re-read them all.
+
+    Commits every commit_every records and resumes an interrupted run over
+    the same input_path from its last commit; workers > 1 prepares records
+    on that many processes (see ingest_files).
     """
+    validate_ingest_options(batch_size, workers)
+    if commit_every < 1:
+        raise ValueError(f"commit_every must be at least 1, got {commit_every}")
+
     connection = get_connection(db_path)
-    count = 0
+    connection.execute(f"PRAGMA journal_size_limit={INGEST_WAL_SIZE_LIMIT};")
+    files, refreshed = select_changed_files(connection, input_path, force=force)
 
     with connection:
-        for record in iter_json_records(input_path):
-            upsert_circular(connection, record)
-            count += 1
+        record_manifest(connection, refreshed)
+        count = ingest_files(
+            connection,
+            files,
+            batch_size,
+            workers,
+            commit_every=commit_every,
+            input_key=os.path.abspath(input_path),
+        )
 
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE);")
     connection.close()
     return count
+
+
+def bulk_load(
+    db_path: str | Path,
+    input_path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+) -> int:
+    """
+    Rebuilds the index at db_path from scratch out of input_path and swaps
+    it in atomically. Returns number of records ingested.
+
+    The new database is written next to db_path without a journal or fsync,
+    with its secondary indexes and FTS index built once after the rows are
+    loaded rather than maintained row by row. Until the swap, readers keep
+    seeing the old index; if the load fails, the old index is left as it was.
+    The index generation continues from the old file's, so search caches
+    notice the swap, and the fetcher's fetch_state is carried over. Nothing
+    else may write to db_path meanwhile.
+    """
+    validate_ingest_options(batch_size, workers)
+
+    db_path = Path(os.path.abspath(db_path))
+    temp_path = db_path.with_name(f"{db_path.name}.bulk-{os.getpid()}")
+    temp_path.unlink(missing_ok=True)
+
+    generation = 0
+    fetch_state: list[tuple] = []
+    if db_path.exists():
+        old = get_connection(db_path)
+        generation = get_generation(old)
+        fetch_state = old.execute("SELECT * FROM fetch_state").fetchall()
+        old.close()
+
+    try:
+        connection = get_bulk_connection(temp_path)
+        try:
+            deferred = defer_secondary_schema(connection)
+            files, _ = select_changed_files(connection, input_path, force=True)
+
+            with connection:
+                count = ingest_files(connection, files, batch_size, workers)
+                restore_secondary_schema(connection, deferred)
+                if connection.execute("PRAGMA foreign_key_check;").fetchone():
+                    raise sqlite3.IntegrityError("Bulk load left foreign key violations")
+                connection.execute(
+                    "UPDATE index_meta SET value = ? WHERE key = 'generation'",
+                    (generation + 1,),
+                )
+                connection.executemany(
+                    "INSERT INTO fetch_state VALUES (?, ?, ?, ?, ?)",
+                    [tuple(row) for row in fetch_state],
+                )
+
+            connection.execute("PRAGMA journal_mode=WAL;")
+        finally:
+            connection.close()
+
+        replace_database(temp_path, db_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return count
+
+
+# inotify(7) constants and the fixed header of each struct inotify_event.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Reports input files closed after writing or moved into place under
+    input_path, using Linux inotify through libc. Every directory gets its
+    own watch, and directories that appear later are watched as they do.
+    Files are only reported once their writer closes them, so half-written
+    files are never picked up.
+    """
+
+    def __init__(self, input_path: str | Path) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: dict[int, str] = {}
+
+        try:
+            root = os.path.abspath(input_path)
+            if os.path.isdir(root):
+                self._only = None
+                self._watch_tree(root)
+            else:
+                self._only = root
+                self._watch(os.path.dirname(root))
+        except BaseException:
+            self.close()
+            raise
+
+    def _watch(self, directory: str) -> None:
+        wd = self._add_watch(
+            self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self._directories[wd] = directory
+
+    def _watch_tree(self, top: str) -> list[str]:
+        # Watches top and every directory under it, and returns the files
+        # already in them, which were written before their watch existed.
+        found = []
+        directories = [top]
+        while directories:
+            directory = directories.pop()
+            try:
+                self._watch(directory)
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        else:
+                            found.append(entry.path)
+            except FileNotFoundError:
+                continue
+        return found
+
+    def changes(self, timeout: float) -> set[str] | None:
+        """
+        Waits up to timeout seconds and returns the paths changed since the
+        last call, or None if the kernel queue overflowed and changes were lost.
+        """
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        changed: set[str] = set()
+        overflowed = False
+        while ready:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                start = offset + INOTIFY_EVENT.size
+                name = os.fsdecode(data[start:start + length].rstrip(b"\0"))
+                offset = start + length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if self._only is None:
+                        changed.update(self._watch_tree(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    if self._only is None or path == self._only:
+                        changed.add(path)
+
+        return None if overflowed else changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    Reports input files under input_path that were added or changed by
+    polling stats every interval seconds; nothing is read. A poll only stats
+    the directories: one whose mtime moved, because entries were created,
+    renamed or removed in it, is listed again and just the files with a new
+    name or inode are stat'ed. Rewriting a file in place leaves its
+    directory alone (as can deleting and recreating it, if the inode is
+    reused), so every file is re-stat'ed once per full_scan_interval too. A file is reported
+    once it has not been modified for WATCH_SETTLE seconds, so files still
+    being written are not picked up half done.
+    """
+
+    def __init__(
+        self,
+        input_path: str | Path,
+        interval: float = WATCH_POLL_INTERVAL,
+        full_scan_interval: float = WATCH_FULL_SCAN_INTERVAL,
+    ) -> None:
+        self.interval = interval
+        self.full_scan_interval = full_scan_interval
+        root = os.path.abspath(input_path)
+        self._only = None if os.path.isdir(root) else root
+        self._root = root if self._only is None else os.path.dirname(root)
+        # Directory -> mtime_ns when last listed (-1 to list it again), the
+        # input files it held with their inodes, and the last stats seen of
+        # each input file.
+        self._directories: dict[str, int] = {}
+        self._listings: dict[str, dict[str, int]] = {}
+        self._stats: dict[str, tuple[int, int]] = {}
+        self._moving: dict[str, tuple[int, int]] = {}
+
+        for path in self._list([self._root], time.time_ns(), every_file=True):
+            stat = self._stat(path)
+            if stat is not None:
+                self._stats[path] = stat
+        now = time.monotonic()
+        self._next_poll = now + interval
+        self._next_full_scan = now + full_scan_interval
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _forget(self, directory: str) -> None:
+        self._directories.pop(directory, None)
+        for path in self._listings.pop(directory, ()):
+            self._stats.pop(path, None)
+            self._moving.pop(path, None)
+
+    def _list(self, directories: list[str], scanned_ns: int, every_file: bool) -> set[str]:
+        # Lists each directory, and subdirectories not seen before (or all of
+        # them with every_file). Returns the input files whose name or inode
+        # is new to each listing, or every input file listed with every_file.
+        candidates = set()
+        while directories:
+            directory = directories.pop()
+            files = {}
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self._only is None and (every_file or entry.path not in self._directories):
+                                directories.append(entry.path)
+                        elif input_group(entry.name) is not None and self._only in (None, entry.path):
+                            files[entry.path] = entry.inode()
+            except (FileNotFoundError, NotADirectoryError):
+                self._forget(directory)
+                continue
+
+            known = self._listings.get(directory, {})
+            for path in known.keys() - files.keys():
+                self._stats.pop(path, None)
+                self._moving.pop(path, None)
+            if every_file:
+                candidates.update(files)
+            else:
+                candidates.update(path for path, inode in files.items() if known.get(path) != inode)
+            self._listings[directory] = files
+            # Entries added in the same timestamp tick as the listing may not
+            # have moved the mtime, so a recent one is not trusted.
+            recent = mtime_ns + RACY_WINDOW_NS > scanned_ns
+            self._directories[directory] = -1 if recent else mtime_ns
+        return candidates
+
+    def _poll(self) -> set[str]:
+        scanned_ns = time.time_ns()
+        if time.monotonic() >= self._next_full_scan:
+            self._next_full_scan = time.monotonic() + self.full_scan_interval
+            candidates = self._list([self._root], scanned_ns, every_file=True)
+        else:
+            moved = []
+            for directory, listed_ns in list(self._directories.items()):
+                try:
+                    if listed_ns < 0 or os.stat(directory).st_mtime_ns != listed_ns:
+                        moved.append(directory)
+                except FileNotFoundError:
+                    self._forget(directory)
+            candidates = self._list(moved, scanned_ns, every_file=False)
+
+        changed = set()
+        for path in candidates | self._moving.keys():
+            stat = self._stat(path)
+            if stat is None or self._stats.get(path) == stat:
+                self._moving.pop(path, None)
+            elif stat[1] + int(WATCH_SETTLE * 1e9) <= scanned_ns:
+                changed.add(path)
+                self._stats[path] = stat
+                self._moving.pop(path, None)
+            else:
+                self._moving[path] = stat
+        return changed
+
+    def changes(self, timeout: float) -> set[str] | None:
+        """
+        Waits up to timeout seconds and returns the paths that changed and
+        settled since the last call.
+        """
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return set()
+        time.sleep(max(wait, 0))
+
+        changed = self._poll()
+        # Files still settling are checked again sooner than the next poll.
+        delay = min(self.interval, WATCH_SETTLE) if self._moving else self.interval
+        self._next_poll = time.monotonic() + delay
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(
+    input_path: str | Path,
+    poll_interval: float = WATCH_POLL_INTERVAL,
+    backend: str = "auto",
+) -> InotifyWatcher | PollingWatcher:
+    """
+    Opens a watcher for input_path: inotify or polling, or with "auto",
+    inotify where it is available and polling otherwise.
+    """
+    if backend not in ("auto", "inotify", "poll"):
+        raise ValueError(f"Unknown watch backend: {backend}")
+
+    if backend != "poll":
+        try:
+            return InotifyWatcher(input_path)
+        except OSError:
+            if backend == "inotify":
+                raise
+    return PollingWatcher(input_path, poll_interval)
+
+
+def ingest_changed_paths(
+    conn,
+    paths: Iterable[str],
+    input_key: str,
+    batch_size: int,
+    workers: int,
+    commit_every: int,
+) -> int:
+    """
+    Ingests just the given files, skipping those unchanged since they were
+    last ingested. Returns number of records ingested.
+    """
+    files, refreshed = select_changed_paths(conn, paths)
+    with conn:
+        record_manifest(conn, refreshed)
+        count = ingest_files(
+            conn,
+            files,
+            batch_size,
+            workers,
+            commit_every=commit_every,
+            input_key=input_key,
+        )
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+    return count
+
+
+def watch_path(
+    db_path: str | Path,
+    input_path: str | Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    commit_every: int = DEFAULT_COMMIT_EVERY,
+    debounce: float = WATCH_DEBOUNCE,
+    poll_interval: float = WATCH_POLL_INTERVAL,
+    backend: str = "auto",
+    report: Callable[[str], None] | None = None,
+    stop: threading.Event | None = None,
+) -> int:
+    """
+    Ingests input_path, then keeps watching it and ingests files as they are
+    added or changed, until stop is set. Returns number of records ingested.
+
+    Changes are gathered until none have arrived for debounce seconds (or
+    for at most WATCH_MAX_DELAY), then only those files are compared with
+    the manifest and ingested, so the tree is never rescanned in full. If
+    the watcher loses track of changes, the whole tree is compared instead.
+    A file that fails to read is reported and skipped until it next changes.
+    report receives a line of progress per batch.
+    """
+    validate_ingest_options(batch_size, workers)
+    if commit_every < 1:
+        raise ValueError(f"commit_every must be at least 1, got {commit_every}")
+    if debounce < 0 or poll_interval <= 0:
+        raise ValueError("debounce must be at least 0 and poll_interval above 0")
+
+    report = report or (lambda message: None)
+    stop = stop or threading.Event()
+    input_key = os.path.abspath(input_path)
+
+    # Opened before the first ingest, so nothing written meanwhile is missed.
+    watcher = open_watcher(input_path, poll_interval, backend)
+    try:
+        total = ingest_path(db_path, input_path, batch_size, workers, commit_every=commit_every)
+        report(f"Ingested {total} records, watching {input_path} ({type(watcher).__name__})")
+
+        connection = get_connection(db_path)
+        connection.execute(f"PRAGMA journal_size_limit={INGEST_WAL_SIZE_LIMIT};")
+        try:
+            while not stop.is_set():
+                # Short waits, so a set stop is noticed promptly.
+                changed = watcher.changes(0.5)
+                if changed is not None and not changed:
+                    continue
+
+                pending: set[str] = set()
+                rescan = False
+                first = last = time.monotonic()
+                while True:
+                    if changed is None:
+                        rescan = True
+                    else:
+                        pending |= changed
+                    now = time.monotonic()
+                    if changed is None or changed:
+                        last = now
+                    remaining = min(last + debounce, first + WATCH_MAX_DELAY) - now
+                    if remaining <= 0 or stop.is_set():
+                        break
+                    changed = watcher.changes(remaining)
+
+                if rescan:
+                    pending = {path for path, _, _ in scan_input_files(input_path)}
+
+                def ingest(paths: Iterable[str]) -> int:
+                    return ingest_changed_paths(
+                        connection, paths, input_key, batch_size, workers, commit_every
+                    )
+
+                try:
+                    count = ingest(pending)
+                except INPUT_ERRORS:
+                    # One bad file should not hold up the rest of the batch.
+                    count = 0
+                    for path, _, _ in stat_input_files(pending):
+                        try:
+                            count += ingest([path])
+                        except INPUT_ERRORS as exc:
+                            report(f"Skipped {path}: {exc}")
+
+                total += count
+                report(f"Ingested {count} records from {len(pending)} files")
+        finally:
+            connection.close()
+    finally:
+        watcher.close()
+
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point: python -m src.indexer <command> ...
+    """
+    parser = argparse.ArgumentParser(description="Build and maintain the GCN circular index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="ingest JSON/JSONL records into the index")
+    ingest.add_argument("db_path", help="SQLite index to write, e.g. gcn.sqlite")
+    ingest.add_argument("input_path", help="JSON/JSONL file or directory of them")
+    ingest.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"records written per batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    ingest.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes that parse and prepare records; 1 prepares them in this process",
+    )
+    ingest.add_argument(
+        "--force",
+        action="store_true",
+        help="re-read every file, even those unchanged since the last ingest",
+    )
+    ingest.add_argument(
+        "--commit-every",
+        type=int,
+        default=DEFAULT_COMMIT_EVERY,
+        help=f"records written per transaction and resume checkpoint (default {DEFAULT_COMMIT_EVERY})",
+    )
+    ingest.add_argument(
+        "--bulk",
+        action="store_true",
+        help="rebuild the index from scratch in a new file and swap it in (implies --force)",
+    )
+    ingest.add_argument(
+        "--watch",
+        action="store_true",
+        help="after ingesting, keep watching input_path and ingest files as they change",
+    )
+    ingest.add_argument(
+        "--debounce",
+        type=float,
+        default=WATCH_DEBOUNCE,
+        help=f"with --watch, seconds without changes before a batch is ingested (default {WATCH_DEBOUNCE:g})",
+    )
+    ingest.add_argument(
+        "--poll-interval",
+        type=float,
+        default=WATCH_POLL_INTERVAL,
+        help=f"with --watch and no inotify, seconds between stat scans (default {WATCH_POLL_INTERVAL:g})",
+    )
+
+    rebuild = commands.add_parser("rebuild-fts", help="rebuild the full-text index from the circulars table")
+    rebuild.add_argument("db_path", help="SQLite index to repair")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        if args.batch_size < 1 or args.workers < 1 or args.commit_every < 1:
+            parser.error("--batch-size, --workers and --commit-every must be at least 1")
+        if args.watch and (args.bulk or args.force):
+            parser.error("--watch cannot be combined with --bulk or --force")
+        if args.debounce < 0 or args.poll_interval <= 0:
+            parser.error("--debounce must be at least 0 and --poll-interval above 0")
+        if args.watch:
+            try:
+                count = watch_path(
+                    args.db_path,
+                    args.input_path,
+                    batch_size=args.batch_size,
+                    workers=args.workers,
+                    commit_every=args.commit_every,
+                    debounce=args.debounce,
+                    poll_interval=args.poll_interval,
+                    report=lambda message: print(message, flush=True),
+                )
+            except KeyboardInterrupt:
+                print("Stopped watching")
+                return 0
+        elif args.bulk:
+            count = bulk_load(
+                args.db_path,
+                args.input_path,
+                batch_size=args.batch_size,
+                workers=args.workers,
+            )
+        else:
+            count = ingest_path(
+                args.db_path,
+                args.input_path,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                force=args.force,
+                commit_every=args.commit_every,
+            )
+        print(f"Ingested {count} records into {args.db_path}")
+
+    elif args.command == "rebuild-fts":
+        connection = get_connection(args.db_path)
+        rebuild_fts(connection)
+        connection.close()
+        print(f"Rebuilt full-text index in {args.db_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,34 @@
+import base64
+import hashlib
+import json
+import os
 import sqlite3
 from pathlib import Path
 from typing import Any, Optional
 import re
 
-from db import get_connection
+from cache import LRUCache
+from db import get_cached_connection, get_generation
 from utils import normalize_event, extract_event_from_query
 
 
+# bm25() column weights: a term in the subject line says far more about what
+# a circular is about than the same term somewhere in a long body.
+SUBJECT_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+SORT_OPTIONS = ("relevance", "date")
+
+# Search pages are cached per process: MCP clients tend to repeat the same
+# searches within a session. Entries are dropped as soon as an ingest moves
+# the index generation on. A size of 0 disables the cache; a TTL of 0 keeps
+# entries until they are evicted or invalidated.
+SEARCH_CACHE_SIZE = int(os.environ.get("GCN_SEARCH_CACHE_SIZE", 256))
+SEARCH_CACHE_TTL = float(os.environ.get("GCN_SEARCH_CACHE_TTL", 300))
+
+_result_cache = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL or None)
+
+
 def row_to_result(row: sqlite3.Row) -> dict[str, Any]:
     """
     Convert a SQLite row into a plain Python dict for search results.
@@ -20,6 +42,7 @@ def row_to_result(row: sqlite3.Row) -> dict[str, Any]:
         "extraction_source": row["extraction_source"],
         "snippet": row["snippet"],
         "score": row["score"],
+        "relevance": row["relevance"],
     }
 
 
@@ -31,87 +54,388 @@ def parse_fts_terms(query: str) -> str:
     if not filtered:
         return '""'
 
-    return " AND ".join(filtered)
+    # FTS5 barewords may only hold letters, digits and underscores; anything
+    # else (x-ray, 1.23, C+) must be a quoted string or MATCH raises.
+    return " AND ".join(
+        term if re.fullmatch(r"\w+", term) else f'"{term}"'
+        for term in filtered
+    )
 
 
-def search_circulars(
-    db_path: str | Path,
+# Columns every search result carries, read straight off the circulars row.
+# c.id is not part of the result but is the final tie-break of every order
+# and the last element of every page cursor.
+RESULT_COLUMNS = """
+            c.id,
+            c.circular_id_raw,
+            c.primary_event_raw,
+            c.primary_event_norm,
+            c.subject,
+            c.created_on,
+            c.extraction_source"""
+
+# Circulars tied to one event: primary event via its index, secondary events
+# via circular_events. An IN list is a set, so a circular reachable both ways
+# is still produced once, with no DISTINCT over the joined rows.
+EVENT_FILTER = """
+            c.id IN (
+                SELECT id FROM circulars WHERE primary_event_norm = ?
+                UNION ALL
+                SELECT ec.id
+                FROM circular_events e
+                JOIN circulars ec ON ec.circular_id_raw = e.circular_id_raw
+                WHERE e.event_norm = ?
+            )"""
+
+# Newest-first listing of every circular, resuming after a cursor. Both
+# halves are index seeks on idx_circulars_created_on (whose entries end in
+# the rowid): rows older than the cursor, then the undated rows that sort
+# after all dated ones.
+LISTING_AFTER_FILTER = """
+            c.id IN (
+                SELECT id FROM (
+                    SELECT id FROM circulars
+                    WHERE (created_on, id) < (?, ?)
+                    ORDER BY created_on DESC, id DESC
+                    LIMIT ?
+                )
+                UNION ALL
+                SELECT id FROM (
+                    SELECT id FROM circulars
+                    WHERE created_on IS NULL
+                    ORDER BY id DESC
+                    LIMIT ?
+                )
+            )"""
+
+# Stands in for a missing created_on in cursor comparisons; DESC order puts
+# NULLs last and every real timestamp is positive.
+UNDATED = -1
+
+
+def split_search_query(query: str, event: Optional[str]) -> tuple[Optional[str], str]:
+    """
+    Resolve the event to filter on (explicit, or inferred from the query) and
+    the keyword text left over for FTS.
+    """
+    inferred_event = extract_event_from_query(query or "")
+    event_norm = normalize_event(event) if event else inferred_event
+    keyword_query = remove_event_from_query(query or "", event or inferred_event)
+    return event_norm, keyword_query
+
+
+def search_order_key(
     query: str = "",
     event: Optional[str] = None,
-    limit: int = 10,
-) -> list[dict[str, Any]]:
+    sort: str = "relevance",
+) -> tuple[str, ...]:
     """
-    Search circulars by keyword, optionally filtered by event.
+    Name the result fields a search is ordered by, all descending.
 
-    Ranking:
-    - 3: exact primary event match
-    - 2: secondary event match
-    - 1: text-only match
+    A page cursor holds the values of these fields for the last row served.
     """
-    connection = get_connection(db_path)
+    if sort not in SORT_OPTIONS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_OPTIONS)}, got {sort!r}")
 
-    inferred_event = extract_event_from_query(query or "")
-    event_norm = normalize_event(event) if event else inferred_event
-    keyword_query = remove_event_from_query(query or "", event or inferred_event)
+    event_norm, keyword_query = split_search_query(query, event)
 
-    if keyword_query:
-        sql = """
-        SELECT DISTINCT
-            c.circular_id_raw,
-            c.primary_event_raw,
-            c.primary_event_norm,
-            c.subject,
-            c.created_on,
-            c.extraction_source,
-            snippet(circulars_fts, 1, '[', ']', ' ... ', 18) AS snippet,
-            CASE
-                WHEN c.primary_event_norm = ? THEN 3
-                WHEN e.event_norm = ? THEN 2
-                ELSE 1
-            END AS score
-        FROM circulars_fts
-        JOIN circulars c ON circulars_fts.rowid = c.circular_id_int
-        LEFT JOIN circular_events e ON e.circular_id_raw = c.circular_id_raw
-        WHERE circulars_fts MATCH ?
-        """
-        params: list[Any] = [event_norm, event_norm, parse_fts_terms(keyword_query)]
+    if sort == "date" or not (keyword_query or event_norm):
+        return ("created_on", "id")
+    if not event_norm:
+        return ("relevance", "id")
+    if not keyword_query:
+        return ("score", "created_on", "id")
+    return ("score", "relevance", "created_on", "id")
+
+
+def build_search_query(
+    query: str = "",
+    event: Optional[str] = None,
+    limit: int = 10,
+    sort: str = "relevance",
+    subject_weight: float = SUBJECT_WEIGHT,
+    body_weight: float = BODY_WEIGHT,
+    after: Optional[list[Any]] = None,
+) -> tuple[str, list[Any]]:
+    """
+    Build the SQL and parameters for search_circulars.
 
-        if event_norm:
-            sql += " AND (c.primary_event_norm = ? OR e.event_norm = ?)"
-            params.extend([event_norm, event_norm])
+    Each circular is produced at most once. Once an event filter applies,
+    every remaining circular either has it as primary event (score 3) or as a
+    secondary one (score 2); without an event every row scores 1. Keyword
+    queries pick their top `limit` rows first and only then look each one up
+    in circulars_fts for snippet(), so snippets are built for those rows
+    alone. CROSS JOIN pins that lookup order; left to itself the planner may
+    rescan every match of the outer MATCH instead.
 
+    `after` holds the search_order_key values of the last row of the
+    previous page; only rows strictly after it are returned.
+    """
+    order_key = search_order_key(query, event, sort)
+
+    event_norm, keyword_query = split_search_query(query, event)
+
+    if event_norm:
+        score = "CASE WHEN c.primary_event_norm = ? THEN 3 ELSE 2 END"
+        score_params: list[Any] = [event_norm]
+        filter_sql = f" AND {EVENT_FILTER}"
+        filter_params: list[Any] = [event_norm, event_norm]
     else:
-        sql = """
-        SELECT DISTINCT
-            c.circular_id_raw,
-            c.primary_event_raw,
-            c.primary_event_norm,
-            c.subject,
-            c.created_on,
-            c.extraction_source,
+        score = "1"
+        score_params = []
+        filter_sql = ""
+        filter_params = []
+
+    order_columns = {
+        "score": score,
+        "relevance": "-circulars_fts.rank",
+        "created_on": f"ifnull(c.created_on, {UNDATED})",
+        "id": "c.id",
+    }
+    order_sql = ", ".join(
+        f"{field if field in ('score', 'relevance') else 'c.' + field} DESC"
+        for field in order_key
+    )
+
+    if after is not None:
+        if len(after) != len(order_key):
+            raise ValueError("cursor does not match this search")
+
+        after_params = [UNDATED if value is None else value for value in after]
+        if not keyword_query and not event_norm and after[0] is not None:
+            filter_sql += f" AND {LISTING_AFTER_FILTER}"
+            filter_params += [*after_params, limit, limit]
+        elif not keyword_query and not event_norm:
+            filter_sql += " AND c.created_on IS NULL AND c.id < ?"
+            filter_params.append(after_params[1])
+        else:
+            columns = ", ".join(order_columns[field] for field in order_key)
+            placeholders = ", ".join("?" for _ in order_key)
+            filter_sql += f" AND ({columns}) < ({placeholders})"
+            filter_params += [
+                *(score_params if "score" in order_key else []),
+                *after_params,
+            ]
+
+    if not keyword_query:
+        sql = f"""
+        SELECT
+            {RESULT_COLUMNS},
             substr(c.body, 1, 320) AS snippet,
-            CASE
-                WHEN c.primary_event_norm = ? THEN 3
-                WHEN e.event_norm = ? THEN 2
-                ELSE 1
-            END AS score
+            {score} AS score,
+            NULL AS relevance
         FROM circulars c
-        LEFT JOIN circular_events e ON e.circular_id_raw = c.circular_id_raw
-        WHERE 1=1
+        WHERE 1=1{filter_sql}
+        ORDER BY {order_sql}
+        LIMIT ?
         """
-        params = [event_norm, event_norm]
+        return sql, [*score_params, *filter_params, limit]
+
+    fts_terms = parse_fts_terms(keyword_query)
+    rank_function = f"bm25({float(subject_weight)}, {float(body_weight)})"
 
-        if event_norm:
-            sql += " AND (c.primary_event_norm = ? OR e.event_norm = ?)"
-            params.extend([event_norm, event_norm])
+    # ORDER BY ... LIMIT keeps only the best `limit` rows as it goes. This
+    # beats ORDER BY circulars_fts.rank, which has FTS5 sort every match, and
+    # unlike rank order it gives tied rows the fixed order cursors rely on.
+    outer_order = order_sql.replace("score", "top.score").replace("relevance", "top.relevance")
 
-    sql += " ORDER BY score DESC, c.created_on DESC, c.circular_id_raw DESC LIMIT ?"
-    params.append(limit)
+    sql = f"""
+    WITH top AS (
+        SELECT
+            c.id,
+            {score} AS score,
+            -circulars_fts.rank AS relevance
+        FROM circulars_fts
+        JOIN circulars c ON c.id = circulars_fts.rowid
+        WHERE circulars_fts MATCH ?
+          AND circulars_fts.rank MATCH ?{filter_sql}
+        ORDER BY {order_sql}
+        LIMIT ?
+    )
+    SELECT
+        {RESULT_COLUMNS},
+        snippet(circulars_fts, 0, '[', ']', ' ... ', 18) AS snippet,
+        top.score AS score,
+        top.relevance AS relevance
+    FROM top
+    CROSS JOIN circulars c ON c.id = top.id
+    CROSS JOIN circulars_fts ON circulars_fts.rowid = top.id
+    WHERE circulars_fts MATCH ?
+    ORDER BY {outer_order}
+    """
+    params = [*score_params, fts_terms, rank_function, *filter_params, limit, fts_terms]
+    return sql, params
+
+
+def search_fingerprint(
+    query: str,
+    event: Optional[str],
+    sort: str,
+    subject_weight: float,
+    body_weight: float,
+) -> str:
+    """
+    Short digest of everything that decides a search's results and order.
+
+    Built from the normalised event and FTS terms, so searches that differ
+    only in case, spacing or stopwords share a fingerprint (and cache entries).
+    A cursor carries it so it cannot be replayed against a different search.
+    """
+    event_norm, keyword_query = split_search_query(query, event)
+    fts_terms = parse_fts_terms(keyword_query) if keyword_query else ""
+    material = json.dumps(
+        [event_norm or "", fts_terms, sort, float(subject_weight), float(body_weight)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(key: list[Any], fingerprint: str) -> str:
+    """
+    Pack the order key of the last row served into an opaque page cursor.
+    """
+    raw = json.dumps({"k": key, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> list[Any]:
+    """
+    Unpack a cursor from encode_cursor, checking it belongs to this search.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = data["k"]
+        cursor_fingerprint = data["f"]
+    except Exception as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+    if cursor_fingerprint != fingerprint or not isinstance(key, list):
+        raise ValueError("cursor does not match this search")
+    return key
+
+
+def search_circulars_page(
+    db_path: str | Path,
+    query: str = "",
+    event: Optional[str] = None,
+    limit: int = 10,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    subject_weight: float = SUBJECT_WEIGHT,
+    body_weight: float = BODY_WEIGHT,
+) -> dict[str, Any]:
+    """
+    One page of search_circulars results plus the cursor for the next page.
+
+    Returns {"results": [...], "next_cursor": str | None}. Passing
+    next_cursor back with the same search arguments continues straight
+    after the last row served, using a keyset seek rather than an OFFSET, so
+    every page costs the same however deep it is. next_cursor is None on the
+    last page. Raises ValueError if limit is below 1.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    order_key = search_order_key(query, event, sort)
+    fingerprint = search_fingerprint(query, event, sort, subject_weight, body_weight)
+    after = decode_cursor(cursor, fingerprint) if cursor else None
+
+    connection = get_cached_connection(db_path, read_only=True)
+
+    cache_key = None
+    if _result_cache.max_size > 0:
+        db_key = os.path.abspath(db_path)
+        generation = get_generation(connection)
+        _result_cache.observe_generation(db_key, generation)
+        cache_key = (db_key, generation, fingerprint, limit, cursor)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return copy_page(cached)
+
+    # One extra row tells us whether another page exists.
+    sql, params = build_search_query(
+        query=query,
+        event=event,
+        limit=limit + 1,
+        sort=sort,
+        subject_weight=subject_weight,
+        body_weight=body_weight,
+        after=after,
+    )
 
     rows = connection.execute(sql, params).fetchall()
-    connection.close()
 
-    return [row_to_result(row) for row in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][field] for field in order_key], fingerprint)
+
+    page = {
+        "results": [row_to_result(row) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+    if cache_key is not None:
+        _result_cache.put(cache_key, copy_page(page), group=cache_key[0])
+    return page
+
+
+def copy_page(page: dict[str, Any]) -> dict[str, Any]:
+    """
+    Copy a result page so callers cannot modify what the cache holds.
+    """
+    return {
+        "results": [dict(result) for result in page["results"]],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+def search_cache_stats() -> dict[str, Any]:
+    """
+    Hit/miss/eviction counters and occupancy of the search result cache.
+    """
+    return _result_cache.stats()
+
+
+def clear_search_cache() -> None:
+    """
+    Drop every cached search page.
+    """
+    _result_cache.clear()
+
+
+def search_circulars(
+    db_path: str | Path,
+    query: str = "",
+    event: Optional[str] = None,
+    limit: int = 10,
+    sort: str = "relevance",
+    subject_weight: float = SUBJECT_WEIGHT,
+    body_weight: float = BODY_WEIGHT,
+) -> list[dict[str, Any]]:
+    """
+    Search circulars by keyword, optionally filtered by event.
+
+    Event score:
+    - 3: exact primary event match
+    - 2: secondary event match
+    - 1: text-only match
+
+    sort="relevance" orders by event score, then by FTS5 bm25() text
+    relevance with subject/body weighted by subject_weight/body_weight, then
+    by recency. sort="date" orders newest first. Results carry the bm25
+    relevance (higher is better) when a keyword query was given.
+    Use search_circulars_page to walk results beyond the first page.
+    """
+    return search_circulars_page(
+        db_path=db_path,
+        query=query,
+        event=event,
+        limit=limit,
+        sort=sort,
+        subject_weight=subject_weight,
+        body_weight=body_weight,
+    )["results"]
 
 
 def get_event_circulars(
@@ -132,7 +456,7 @@ def get_circular(
     """
     Fetch one circular by circular ID.
     """
-    connection = get_connection(db_path)
+    connection = get_cached_connection(db_path, read_only=True)
 
     row = connection.execute(
         """
@@ -144,15 +468,14 @@ def get_circular(
             c.created_on,
             c.extraction_source,
             c.body AS snippet,
-            0 AS score
+            0 AS score,
+            NULL AS relevance
         FROM circulars c
         WHERE c.circular_id_int = ?
         """,
         (circular_id,),
     ).fetchone()
 
-    connection.close()
-
     return row_to_result(row) if row else None
 
 def remove_event_from_query(query: str, event: str | None) -> str:
@@ -0,0 +1,289 @@
+import argparse
+import errno
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import sqlite3
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, TextIO
+
+from src.db import bump_generation, get_connection
+from src.indexer import (
+    DEFAULT_BATCH_SIZE,
+    INGEST_WAL_SIZE_LIMIT,
+    PreparedCircular,
+    parse_line,
+    write_prepared,
+)
+
+# A partly filled batch is written as soon as no more lines are waiting,
+# unless its first record arrived less than this many seconds ago. Under
+# load batches fill up by themselves, so by default nothing waits; a delay
+# trades latency for fewer, larger commits from a producer that dribbles.
+DEFAULT_MAX_DELAY = 0.0
+
+# Lines read ahead of the batch being written; a producer that gets further
+# ahead than this blocks until the writer catches up.
+READ_AHEAD_BATCHES = 4
+
+
+class IndexWriter:
+    """
+    The single writer behind every stream: batches are written and committed
+    one at a time on one connection, owned by a thread of its own. Each
+    commit that changes anything moves the index generation on.
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection = self._executor.submit(self._open, db_path).result()
+
+    @staticmethod
+    def _open(db_path: str | Path) -> sqlite3.Connection:
+        connection = get_connection(db_path)
+        connection.execute(f"PRAGMA journal_size_limit={INGEST_WAL_SIZE_LIMIT};")
+        return connection
+
+    def _write(self, prepared: list[PreparedCircular]) -> int:
+        with self._connection:
+            changed = write_prepared(self._connection, prepared)
+            if changed:
+                bump_generation(self._connection)
+        return changed
+
+    def write(self, prepared: list[PreparedCircular]) -> int:
+        """
+        Writes and commits a batch of prepare_record results. Returns the
+        number of records that changed.
+        """
+        return self._executor.submit(self._write, prepared).result()
+
+    def close(self) -> None:
+        self._executor.submit(self._connection.close).result()
+        self._executor.shutdown()
+
+
+def serve_stream(
+    input_stream: TextIO,
+    output_stream: TextIO,
+    writer: IndexWriter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_delay: float = DEFAULT_MAX_DELAY,
+) -> tuple[int, int]:
+    """
+    Upserts one circular per line of input_stream until EOF, writing one
+    JSON response per line to output_stream. Returns (records acknowledged,
+    lines rejected).
+
+    Lines are numbered from 1, blank ones aside. Valid records are gathered
+    into batches of up to batch_size, and a batch is written once it is
+    full, or once no more lines are waiting and its first record arrived at
+    least max_delay seconds ago. Once it is committed, {"ok": true, "ack":
+    n, "records": ..., "changed": ...} says every record up to line n is in
+    the index. A line that is not a valid circular is answered straight
+    away with {"ok": false, "line": n, "error": ...} and left out; a batch
+    that cannot be written is answered with {"ok": false, "lines": [first,
+    last], "error": ...}.
+    """
+    lines: queue.Queue[str | None] = queue.Queue(maxsize=batch_size * READ_AHEAD_BATCHES)
+
+    def read() -> None:
+        try:
+            for line in input_stream:
+                lines.put(line)
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+
+    def respond(response: dict[str, Any]) -> None:
+        try:
+            output_stream.write(json.dumps(response) + "\n")
+            output_stream.flush()
+        except (OSError, ValueError):
+            # The producer hung up; what was committed stays committed.
+            pass
+
+    acknowledged = 0
+    rejected = 0
+    line_number = 0
+    batch: list[PreparedCircular] = []
+    batch_lines: list[int] = []
+    deadline: float | None = None
+
+    def flush() -> None:
+        nonlocal acknowledged, deadline
+        if not batch:
+            return
+        try:
+            changed = writer.write(batch)
+        except sqlite3.Error as exc:
+            respond({"ok": False, "lines": [batch_lines[0], batch_lines[-1]], "error": str(exc)})
+        else:
+            acknowledged += len(batch)
+            respond({"ok": True, "ack": batch_lines[-1], "records": len(batch), "changed": changed})
+        batch.clear()
+        batch_lines.clear()
+        deadline = None
+
+    while True:
+        try:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            line = lines.get(timeout=timeout)
+        except queue.Empty:
+            flush()
+            continue
+        if line is None:
+            break
+
+        line = line.strip()
+        if not line:
+            continue
+        line_number += 1
+
+        try:
+            prepared = parse_line(line)
+        except ValueError as exc:
+            rejected += 1
+            respond({"ok": False, "line": line_number, "error": str(exc)})
+            continue
+
+        batch.append(prepared)
+        batch_lines.append(line_number)
+        if deadline is None:
+            deadline = time.monotonic() + max_delay
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return acknowledged, rejected
+
+
+class StreamIngestHandler(socketserver.StreamRequestHandler):
+    """
+    Serves one producer connected to a StreamIngestServer.
+    """
+
+    def handle(self) -> None:
+        server: StreamIngestServer = self.server  # type: ignore[assignment]
+        serve_stream(
+            io.TextIOWrapper(self.rfile, encoding="utf-8"),
+            io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True),
+            server.writer,
+            server.batch_size,
+            server.max_delay,
+        )
+
+
+class StreamIngestServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Accepts producers on a Unix socket, each served by serve_stream on a
+    thread of its own, all writing through one IndexWriter. The socket is
+    only accessible to its owner.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str | Path,
+        writer: IndexWriter,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ) -> None:
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.socket_path = os.fspath(socket_path)
+        self._bound = False
+        remove_stale_socket(self.socket_path)
+        super().__init__(self.socket_path, StreamIngestHandler)
+        self._bound = True
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self._bound:
+            self._bound = False
+            os.unlink(self.socket_path)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """
+    Removes a socket left at socket_path by a server that did not shut down
+    cleanly. Raises OSError if a server is still listening on it; anything
+    other than a socket is left for bind to refuse.
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise OSError(errno.EADDRINUSE, "A server is already listening", socket_path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Command line entry point: python -m src.stream_ingest <db_path> [--socket PATH]
+    """
+    parser = argparse.ArgumentParser(
+        description="Upsert NDJSON circulars from stdin or a Unix socket into the index"
+    )
+    parser.add_argument("db_path", help="SQLite index to write, e.g. gcn.sqlite")
+    parser.add_argument(
+        "--socket",
+        help="listen on this Unix socket instead of reading stdin",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"records written per batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=DEFAULT_MAX_DELAY,
+        help=f"seconds a record may wait for more to join its batch (default {DEFAULT_MAX_DELAY:g})",
+    )
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1 or args.max_delay < 0:
+        parser.error("--batch-size must be at least 1 and --max-delay at least 0")
+
+    writer = IndexWriter(args.db_path)
+    try:
+        if args.socket:
+            with StreamIngestServer(args.socket, writer, args.batch_size, args.max_delay) as server:
+                print(f"Listening on {args.socket}", file=sys.stderr, flush=True)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+        else:
+            acknowledged, rejected = serve_stream(
+                sys.stdin, sys.stdout, writer, args.batch_size, args.max_delay
+            )
+            print(f"Ingested {acknowledged} records, rejected {rejected}", file=sys.stderr)
+    finally:
+        writer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
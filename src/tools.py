@@ -5,14 +5,15 @@ from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime, timezone
 import json
+import os
 import re
 import ollama
 
-from search import search_circulars
+from search import search_cache_stats, search_circulars_page
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
-DEFAULT_DB_PATH = str(PROJECT_ROOT / "gcn.sqlite")
+DEFAULT_DB_PATH = os.environ.get("GCN_DB_PATH", str(PROJECT_ROOT / "gcn.sqlite"))
 DEFAULT_DATA_DIR = str(PROJECT_ROOT / "data")
 
 
@@ -36,7 +37,8 @@ def format_search_results(results: list[dict], empty_message: str = "No matching
                     f"Subject: {r['subject']}\n"
                     f"Created on: {format_timestamp(r['created_on'])}\n"
                     f"Score: {r['score']}\n"
-                    f"Snippet: {r['snippet'] or ''}"
+                    + (f"Relevance: {r['relevance']:.2f}\n" if r.get("relevance") is not None else "")
+                    + f"Snippet: {r['snippet'] or ''}"
                 )
             )
         )
@@ -81,7 +83,9 @@ async def list_tools() -> List[Tool]:
                 "If the user asks for a specific number of results, always set the limit field to that number. "
                 "The event field is optional and should only be used for an exact specific event name such as "
                 "'GRB 260120B' or 'EP260119a'. "
-                "Do not use broad values like 'GRB' in the event field."
+                "Do not use broad values like 'GRB' in the event field. "
+                "When more results exist the last item is a 'Next cursor' line; pass that value as cursor, "
+                "with the same query, event and sort, to get the next page."
             ),
             input_schema={
                 "properties": {
@@ -97,6 +101,15 @@ async def list_tools() -> List[Tool]:
                         "type": "integer",
                         "description": "Maximum number of results to return; set this when the user asks for a specific number"
                     },
+                    "sort": {
+                        "type": "string",
+                        "enum": ["relevance", "date"],
+                        "description": "Order results by text relevance (default) or newest first"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Next cursor returned by a previous call with the same query, event and sort; fetches the following page"
+                    },
                 }
             }
         ),
@@ -154,6 +167,9 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[Any]:
     if name == "ping_python":
         return [TextContext(text=json.dumps({"message": "pong from python"}, ensure_ascii=False))]
     
+    if name == "search_cache_stats":
+        return [TextContext(text=json.dumps(search_cache_stats(), ensure_ascii=False))]
+
     if name == "fetch_gcn_circulars":
         results = load_circular_files(
             arguments.get("data_dir", DEFAULT_DATA_DIR),
@@ -164,13 +180,18 @@ async def call_tool(name: str, arguments: Dict[str, Any]) -> List[Any]:
 
     if name == "search_gcn_circulars":
         try:
-            results = search_circulars(
+            page = search_circulars_page(
                 db_path=DEFAULT_DB_PATH,
                 query=arguments.get("query", "") or "",
                 event=arguments.get("event"),
                 limit=int(arguments.get("limit", 10)),
+                sort=arguments.get("sort") or "relevance",
+                cursor=arguments.get("cursor") or None,
             )
-            return format_search_results(results)
+            contexts = format_search_results(page["results"])
+            if page["next_cursor"]:
+                contexts.append(TextContext(text=f"Next cursor: {page['next_cursor']}"))
+            return contexts
         except Exception as e:
             return [TextContext(text=f"Error in {name}: {e}")]
 
@@ -11,6 +11,14 @@ EVENT_PATTERNS = [
     r"\b(SWIFT\s?J\d+(?:\.\d+)?[+-]\d+(?:\.\d+)?)\b",
 ]
 
+# All of EVENT_PATTERNS as one alternation, so a text is scanned once rather
+# than once per pattern. Every pattern is word-bounded and starts with its own
+# letter prefix, so no two can match overlapping text and the combined scan
+# finds exactly the matches of the separate ones, already in text order.
+EVENT_REGEX = re.compile("|".join(EVENT_PATTERNS), re.IGNORECASE)
+
+WHITESPACE_REGEX = re.compile(r"\s+")
+
 def clean_text(text: Optional[str]) -> str:
     """
     Normalize text into a safe string to use e.g. None becomes "", null bytes removed, whitespace trimmed.
@@ -26,7 +34,7 @@ def normalize_event(event: Optional[str]) -> Optional[str]:
     """
     if not event:
         return None
-    return re.sub(r"\s+", "", event).upper()
+    return WHITESPACE_REGEX.sub("", event).upper()
 
 def extract_matches(text: str) -> list[str]:
     """
@@ -34,20 +42,13 @@ def extract_matches(text: str) -> list[str]:
 
     Returns normalized event names with dupes removed.
     """
-    found = []
-
-    for pattern in EVENT_PATTERNS:
-        for match in re.finditer(pattern, text, flags=re.IGNORECASE):
-            raw = match.group(1)
-            norm = normalize_event(raw)
-            if norm:
-                found.append((match.start(), norm))
-    found.sort(key=lambda x: x[0])
-
     results = []
     seen = set()
-    for _, norm in found:
-        if norm not in seen:
+
+    for match in EVENT_REGEX.finditer(text):
+        # Each pattern contributes one group; lastindex is the one that matched.
+        norm = normalize_event(match.group(match.lastindex))
+        if norm and norm not in seen:
             seen.add(norm)
             results.append(norm)
     return results
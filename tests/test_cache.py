@@ -0,0 +1,146 @@
+"""
+tests/test_cache.py — tests for src/cache.py
+
+Covers:
+  - LRUCache: hits and misses, least-recently-used eviction, TTL expiry,
+      generation-based invalidation per group, disabled when max_size is 0,
+      clear(), stats() counters and hit rate
+"""
+
+from cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# ── hits and misses ──────────────────────────────────────────────────────────
+
+def test_get_returns_stored_value():
+    cache = LRUCache(4)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.hits == 1 and cache.misses == 0
+
+
+def test_get_missing_returns_default_and_counts_miss():
+    cache = LRUCache(4)
+    assert cache.get("a") is None
+    assert cache.get("a", "fallback") == "fallback"
+    assert cache.misses == 2
+
+
+# ── eviction ─────────────────────────────────────────────────────────────────
+
+def test_full_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_overwriting_key_does_not_evict():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+    assert cache.evictions == 0
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+# ── TTL ──────────────────────────────────────────────────────────────────────
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(4, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_no_ttl_keeps_entries():
+    clock = FakeClock()
+    cache = LRUCache(4, ttl=None, clock=clock)
+    cache.put("a", 1)
+    clock.now = 1e9
+    assert cache.get("a") == 1
+
+
+# ── generations ──────────────────────────────────────────────────────────────
+
+def test_new_generation_drops_only_that_group():
+    cache = LRUCache(8)
+    cache.observe_generation("db1", 1)
+    cache.observe_generation("db2", 1)
+    cache.put("x", 1, group="db1")
+    cache.put("y", 2, group="db2")
+
+    cache.observe_generation("db1", 2)
+    assert cache.get("x") is None
+    assert cache.get("y") == 2
+    assert cache.invalidations == 1
+
+
+def test_same_generation_keeps_entries():
+    cache = LRUCache(8)
+    cache.observe_generation("db", 5)
+    cache.put("x", 1, group="db")
+    cache.observe_generation("db", 5)
+    assert cache.get("x") == 1
+
+
+def test_first_generation_seen_keeps_entries():
+    cache = LRUCache(8)
+    cache.put("x", 1, group="db")
+    cache.observe_generation("db", 3)
+    assert cache.get("x") == 1
+
+
+# ── clear / stats ────────────────────────────────────────────────────────────
+
+def test_clear_empties_cache():
+    cache = LRUCache(4)
+    cache.put("a", 1)
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_stats_reports_counters():
+    cache = LRUCache(1, ttl=30)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.put("b", 2)
+    stats = cache.stats()
+    assert stats == {
+        "size": 1,
+        "max_size": 1,
+        "ttl": 30,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+        "evictions": 1,
+        "expirations": 0,
+        "invalidations": 0,
+    }
@@ -7,14 +7,54 @@ Covers:
   - Schema idempotency (safe to open the same DB twice)
   - All expected tables and indexes exist with the right column names
   - Correct PK and UNIQUE constraints on circulars / circular_events
-  - FTS5 virtual table supports MATCH queries on subject and body
+  - FTS5 external-content table: MATCH on subject and body, rowid shared
+      with the circulars INTEGER PRIMARY KEY (stable across VACUUM), trigger
+      sync on update/delete, rebuild_fts repair, migrations from the
+      standalone FTS table and from rowid-keyed circulars
+  - Schema migrations: user_version stamping, no DDL on an up-to-date DB,
+      upgrade of pre-versioning databases, per-step rollback, newer-DB guard,
+      callable migration steps
+  - Record hashes: hash_indexed_fields versioning, type and boundary
+      sensitivity; migration 6 rehashes legacy rows without touching FTS;
+      integer_affinity matches what an INTEGER column stores
+  - Read-only connections: writes rejected, mmap/cache PRAGMAs applied,
+      immutable snapshots, missing or outdated DBs prepared before opening
+      (never for immutable snapshots), newer DBs rejected
+  - Cached connections: reused per thread and path, separate across threads,
+      schema created on first use, closed by close_cached_connections,
+      reopened when the file is replaced
+  - Bulk loading: deferred indexes and FTS triggers restored with the FTS
+      index built, replace_database leaves no stale WAL behind and fsyncs
+      the new file before the rename and its directory after
+  - Index generation: starts at 0, bump_generation increments it,
+      rebuild_fts bumps it
 """
 
+import os
 import sqlite3
+import threading
+from stat import S_ISDIR
 
 import pytest
 
-from src.db import get_connection
+from src.db import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    bump_generation,
+    close_cached_connections,
+    defer_secondary_schema,
+    get_cached_connection,
+    get_connection,
+    get_generation,
+    get_readonly_connection,
+    hash_indexed_fields,
+    integer_affinity,
+    migrate,
+    rebuild_fts,
+    replace_database,
+    restore_secondary_schema,
+    schema_version,
+)
 
 
 # ── helpers ──────────────────────────────────────────────────────────────────
@@ -23,7 +63,14 @@ def _open(tmp_path):
     return get_connection(tmp_path / "test.sqlite")
 
 
-def _insert_circular(conn, circular_id_raw="43493", circular_id_int=43493, record_hash="abc"):
+def _insert_circular(
+    conn,
+    circular_id_raw="43493",
+    circular_id_int=43493,
+    record_hash="abc",
+    subject="GRB 260120B: Swift-BAT refined analysis",
+    body="Further analysis of BAT GRB 260120B.",
+):
     conn.execute(
         """
         INSERT INTO circulars (
@@ -35,8 +82,8 @@ def _insert_circular(conn, circular_id_raw="43493", circular_id_int=43493, recor
         """,
         (
             circular_id_raw, circular_id_int,
-            "GRB 260120B: Swift-BAT refined analysis",
-            "Further analysis of BAT GRB 260120B.",
+            subject,
+            body,
             1769036892952, "Tester", "text/plain",
             "GRB 260120B", "GRB 260120B", "GRB260120B",
             "eventId", None, record_hash,
@@ -93,7 +140,7 @@ def test_schema_is_idempotent(tmp_path):
 
 # ── tables exist ─────────────────────────────────────────────────────────────
 
-@pytest.mark.parametrize("table", ["circulars", "circular_events", "circulars_fts"])
+@pytest.mark.parametrize("table", ["circulars", "circular_events", "circulars_fts", "index_meta", "source_files", "ingest_checkpoints", "fetch_state"])
 def test_table_exists(tmp_path, table):
     conn = _open(tmp_path)
     try:
@@ -260,18 +307,17 @@ def test_one_circular_can_have_multiple_events(tmp_path):
 
 # ── FTS5 virtual table ────────────────────────────────────────────────────────
 
+def _fts_match(conn, query):
+    return conn.execute(
+        "SELECT rowid, subject FROM circulars_fts WHERE circulars_fts MATCH ?", (query,)
+    ).fetchall()
+
+
 def test_fts_match_on_subject(tmp_path):
     conn = _open(tmp_path)
     try:
-        conn.execute(
-            "INSERT INTO circulars_fts (circular_id_raw, subject, body) VALUES (?,?,?)",
-            ("43493", "GRB 260120B Swift-BAT refined analysis", "Further analysis."),
-        )
-        conn.commit()
-        rows = conn.execute(
-            "SELECT * FROM circulars_fts WHERE circulars_fts MATCH ?", ("refined",)
-        ).fetchall()
-        assert len(rows) == 1
+        _insert_circular(conn, subject="GRB 260120B Swift-BAT refined analysis", body="Further analysis.")
+        assert len(_fts_match(conn, "refined")) == 1
     finally:
         conn.close()
 
@@ -279,15 +325,8 @@ def test_fts_match_on_subject(tmp_path):
 def test_fts_match_on_body(tmp_path):
     conn = _open(tmp_path)
     try:
-        conn.execute(
-            "INSERT INTO circulars_fts (circular_id_raw, subject, body) VALUES (?,?,?)",
-            ("43493", "Optical follow-up", "Spectroscopic redshift z = 1.23 was measured."),
-        )
-        conn.commit()
-        rows = conn.execute(
-            "SELECT * FROM circulars_fts WHERE circulars_fts MATCH ?", ("redshift",)
-        ).fetchall()
-        assert len(rows) == 1
+        _insert_circular(conn, subject="Optical follow-up", body="Spectroscopic redshift z = 1.23 was measured.")
+        assert len(_fts_match(conn, "redshift")) == 1
     finally:
         conn.close()
 
@@ -295,15 +334,8 @@ def test_fts_match_on_body(tmp_path):
 def test_fts_no_match_returns_empty(tmp_path):
     conn = _open(tmp_path)
     try:
-        conn.execute(
-            "INSERT INTO circulars_fts (circular_id_raw, subject, body) VALUES (?,?,?)",
-            ("43493", "Some subject", "Some body text."),
-        )
-        conn.commit()
-        rows = conn.execute(
-            "SELECT * FROM circulars_fts WHERE circulars_fts MATCH ?", ("xyznonexistent",)
-        ).fetchall()
-        assert rows == []
+        _insert_circular(conn, subject="Some subject", body="Some body text.")
+        assert _fts_match(conn, "xyznonexistent") == []
     finally:
         conn.close()
 
@@ -311,18 +343,601 @@ def test_fts_no_match_returns_empty(tmp_path):
 def test_fts_multiple_rows_distinct_match(tmp_path):
     conn = _open(tmp_path)
     try:
-        conn.execute(
-            "INSERT INTO circulars_fts (circular_id_raw, subject, body) VALUES (?,?,?)",
-            ("1", "GRB afterglow optical", "Detected optical transient."),
-        )
-        conn.execute(
-            "INSERT INTO circulars_fts (circular_id_raw, subject, body) VALUES (?,?,?)",
-            ("2", "Radio observations", "No optical detected at the position."),
+        _insert_circular(conn, "1", 1, subject="GRB afterglow optical", body="Detected optical transient.")
+        _insert_circular(conn, "2", 2, subject="Radio observations", body="No optical detected at the position.")
+        assert len(_fts_match(conn, "optical")) == 2
+    finally:
+        conn.close()
+
+
+def test_circulars_has_integer_primary_key(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        cols = {r["name"]: r for r in conn.execute("PRAGMA table_info(circulars)").fetchall()}
+        assert cols["id"]["pk"] == 1
+        assert cols["id"]["type"] == "INTEGER"
+    finally:
+        conn.close()
+
+
+def test_fts_rowid_matches_circulars_id(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        _insert_circular(conn, subject="Optical follow-up", body="redshift measured")
+        fts_rowid = _fts_match(conn, "redshift")[0]["rowid"]
+        row = conn.execute("SELECT circular_id_raw FROM circulars WHERE id = ?", (fts_rowid,)).fetchone()
+        assert row["circular_id_raw"] == "43493"
+    finally:
+        conn.close()
+
+
+def test_fts_rowid_survives_vacuum(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        _insert_circular(conn, "1", 1, subject="first", body="alpha")
+        _insert_circular(conn, "2", 2, subject="second", body="beta")
+        conn.execute("DELETE FROM circulars WHERE circular_id_raw = '1'")
+        conn.commit()
+        conn.execute("VACUUM")
+        fts_rowid = _fts_match(conn, "beta")[0]["rowid"]
+        row = conn.execute("SELECT circular_id_raw FROM circulars WHERE id = ?", (fts_rowid,)).fetchone()
+        assert row["circular_id_raw"] == "2"
+    finally:
+        conn.close()
+
+
+def test_rebuild_fts_repairs_desynced_index(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        _insert_circular(conn, subject="Optical follow-up", body="redshift measured")
+        conn.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('delete-all')")
+        conn.commit()
+        assert _fts_match(conn, "redshift") == []
+        rebuild_fts(conn)
+        assert len(_fts_match(conn, "redshift")) == 1
+    finally:
+        conn.close()
+
+
+def test_fts_follows_updates_to_circulars(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        _insert_circular(conn, subject="Optical follow-up", body="redshift measured")
+        conn.execute("UPDATE circulars SET body = 'neutrino flux limit' WHERE circular_id_raw = '43493'")
+        conn.commit()
+        assert _fts_match(conn, "redshift") == []
+        assert len(_fts_match(conn, "neutrino")) == 1
+    finally:
+        conn.close()
+
+
+def test_fts_follows_deletes_from_circulars(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        _insert_circular(conn, subject="Optical follow-up", body="redshift measured")
+        conn.execute("DELETE FROM circulars WHERE circular_id_raw = '43493'")
+        conn.commit()
+        assert _fts_match(conn, "redshift") == []
+    finally:
+        conn.close()
+
+
+def test_fts_does_not_store_a_copy_of_the_text(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'circulars_fts_content'"
+        ).fetchone()
+        assert row is None
+    finally:
+        conn.close()
+
+
+def test_rowid_keyed_database_keeps_ids_when_migrated(tmp_path):
+    db_path = tmp_path / "v2.sqlite"
+    legacy = sqlite3.connect(db_path)
+    migrate(legacy, MIGRATIONS[:2])
+    for raw in ("5", "6"):
+        legacy.execute(
+            "INSERT INTO circulars (circular_id_raw, subject, body, record_hash) VALUES (?, 'subject', ?, 'h')",
+            (raw, f"body{raw}"),
         )
+    legacy.execute("INSERT INTO circular_events (circular_id_raw, event_norm) VALUES ('6', 'GRB1')")
+    legacy.commit()
+    rowids = dict(legacy.execute("SELECT circular_id_raw, rowid FROM circulars").fetchall())
+    legacy.close()
+
+    conn = get_connection(db_path)
+    try:
+        ids = {r["circular_id_raw"]: r["id"] for r in conn.execute("SELECT circular_id_raw, id FROM circulars")}
+        assert ids == rowids
+        assert _fts_match(conn, "body6")[0]["rowid"] == ids["6"]
+        assert conn.execute("SELECT COUNT(*) FROM circular_events").fetchone()[0] == 1
+        assert conn.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_standalone_fts_database_is_migrated_and_rebuilt(tmp_path):
+    db_path = tmp_path / "v1.sqlite"
+    legacy = sqlite3.connect(db_path)
+    migrate(legacy, MIGRATIONS[:1])
+    legacy.execute(
+        "INSERT INTO circulars (circular_id_raw, circular_id_int, subject, body, record_hash) "
+        "VALUES ('7', 7, 'Optical follow-up', 'redshift measured', 'h')"
+    )
+    legacy.execute(
+        "INSERT INTO circulars_fts (circular_id_raw, subject, body) "
+        "VALUES ('7', 'Optical follow-up', 'redshift measured')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    conn = get_connection(db_path)
+    try:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert len(_fts_match(conn, "redshift")) == 1
+    finally:
+        conn.close()
+
+
+# ── schema migrations ─────────────────────────────────────────────────────────
+
+def test_new_database_is_stamped_with_schema_version(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        assert schema_version(conn) == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def test_up_to_date_database_skips_ddl(tmp_path):
+    """Dropping an index and reopening must not recreate it: no DDL runs."""
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    conn.execute("DROP INDEX idx_circulars_created_on")
+    conn.commit()
+    conn.close()
+
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_circulars_created_on'"
+        ).fetchone()
+        assert row is None
+    finally:
+        conn.close()
+
+
+def test_unversioned_database_is_upgraded_in_place(tmp_path):
+    db_path = tmp_path / "legacy.sqlite"
+    legacy = sqlite3.connect(db_path)
+    for statement in MIGRATIONS[0]:
+        legacy.execute(statement)
+    legacy.execute("INSERT INTO circulars (circular_id_raw, record_hash) VALUES ('1', 'h')")
+    legacy.commit()
+    assert legacy.execute("PRAGMA user_version").fetchone()[0] == 0
+    legacy.close()
+
+    conn = get_connection(db_path)
+    try:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM circulars").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_migrations_apply_in_order(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.sqlite")
+    try:
+        migrations = [
+            ("CREATE TABLE a (x INTEGER)",),
+            ("ALTER TABLE a ADD COLUMN y INTEGER",),
+        ]
+        assert migrate(conn, migrations) == 2
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(a)").fetchall()]
+        assert cols == ["x", "y"]
+    finally:
+        conn.close()
+
+
+def test_failed_migration_rolls_back_only_that_step(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.sqlite")
+    try:
+        migrations = [
+            ("CREATE TABLE a (x INTEGER)",),
+            ("CREATE TABLE b (x INTEGER)", "THIS IS NOT SQL"),
+        ]
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(conn, migrations)
+        assert schema_version(conn) == 1
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "a" in tables
+        assert "b" not in tables
+    finally:
+        conn.close()
+
+
+def test_migration_steps_may_be_callables(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.sqlite")
+    try:
+        migrations = [
+            ("CREATE TABLE a (x INTEGER)",),
+            (lambda connection: connection.executemany("INSERT INTO a VALUES (?)", [(1,), (2,)]),),
+        ]
+        assert migrate(conn, migrations) == 2
+        assert conn.execute("SELECT COUNT(*) FROM a").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_newer_database_is_rejected(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.sqlite")
+    try:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        with pytest.raises(RuntimeError, match="newer"):
+            migrate(conn)
+    finally:
+        conn.close()
+
+
+# ── record hashes ─────────────────────────────────────────────────────────────
+
+HASH_FIELDS = ("43493", "GRB 260120B: subject", "body text", 1769036892952, "Tester", "text/plain", None)
+
+
+def test_hash_indexed_fields_is_versioned():
+    assert hash_indexed_fields(*HASH_FIELDS).startswith("2:")
+    assert hash_indexed_fields(*HASH_FIELDS) == hash_indexed_fields(*HASH_FIELDS)
+
+
+@pytest.mark.parametrize("changed", [
+    ("43493", "GRB 260120B: subjec", "tbody text", 1769036892952, "Tester", "text/plain", None),
+    ("43493", "GRB 260120B: subject", "body text", "1769036892952", "Tester", "text/plain", None),
+    ("43493", "GRB 260120B: subject", "body text", 1769036892952, "Tester", "text/plain", ""),
+    ("43493", "GRB 260120B: subject", "body text!", 1769036892952, "Tester", "text/plain", None),
+])
+def test_hash_indexed_fields_distinguishes_fields(changed):
+    assert hash_indexed_fields(*changed) != hash_indexed_fields(*HASH_FIELDS)
+
+
+def test_migration_rehashes_legacy_records(tmp_path):
+    db_path = tmp_path / "legacy.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    migrate(conn, MIGRATIONS[:5])
+    _insert_circular(conn, record_hash="0" * 40)
+    fts_before = _fts_match(conn, "refined")
+    conn.close()
+
+    conn = get_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT circular_id_raw, subject, body, created_on, submitter, format, raw_event_id, record_hash "
+            "FROM circulars"
+        ).fetchone()
+        assert row["record_hash"] == hash_indexed_fields(*tuple(row)[:7])
+        assert _fts_match(conn, "refined") == fts_before
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("value", [
+    1769036892952, "1769036892952", " 17\n", "+17", "-0", "00017", "1.7e12", "1E5", "5.", "1.0",
+    "1.5", ".5", "9223372036854775807", "9223372036854775808", "1e400", "0x10", "1_000",
+    "inf", "nan", "abc", "", 1.7e12, 1.5, -0.0, 2.0**63, float("nan"), True, None,
+])
+def test_integer_affinity_matches_stored_value(value):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    stored = conn.execute("SELECT x FROM t").fetchone()[0]
+    assert integer_affinity(value) == stored
+    assert type(integer_affinity(value)) is type(stored)
+    conn.close()
+
+
+# ── read-only connections ─────────────────────────────────────────────────────
+
+def test_readonly_connection_reads_existing_rows(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    _insert_circular(conn)
+    conn.close()
+
+    ro = get_readonly_connection(db_path)
+    try:
+        row = ro.execute("SELECT circular_id_int FROM circulars").fetchone()
+        assert isinstance(row, sqlite3.Row)
+        assert row["circular_id_int"] == 43493
+    finally:
+        ro.close()
+
+
+def test_readonly_connection_rejects_writes(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    get_connection(db_path).close()
+    ro = get_readonly_connection(db_path)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            _insert_circular(ro)
+    finally:
+        ro.close()
+
+
+def test_readonly_connection_applies_tuning(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    get_connection(db_path).close()
+    ro = get_readonly_connection(db_path, mmap_size=1 << 20, cache_size=-2048)
+    try:
+        assert ro.execute("PRAGMA mmap_size;").fetchone()[0] == 1 << 20
+        assert ro.execute("PRAGMA cache_size;").fetchone()[0] == -2048
+        assert ro.execute("PRAGMA query_only;").fetchone()[0] == 1
+    finally:
+        ro.close()
+
+
+def test_readonly_immutable_connection_reads_snapshot(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    _insert_circular(conn)
+    conn.close()
+
+    ro = get_readonly_connection(db_path, immutable=True)
+    try:
+        assert ro.execute("SELECT COUNT(*) FROM circulars").fetchone()[0] == 1
+    finally:
+        ro.close()
+
+
+def test_readonly_connection_creates_missing_database(tmp_path):
+    db_path = tmp_path / "missing.sqlite"
+    ro = get_readonly_connection(db_path)
+    try:
+        assert db_path.exists()
+        assert schema_version(ro) == SCHEMA_VERSION
+    finally:
+        ro.close()
+
+
+def test_readonly_connection_migrates_outdated_database(tmp_path):
+    db_path = tmp_path / "legacy.sqlite"
+    sqlite3.connect(db_path).close()
+
+    ro = get_readonly_connection(db_path)
+    try:
+        assert schema_version(ro) == SCHEMA_VERSION
+    finally:
+        ro.close()
+
+
+def test_readonly_immutable_connection_never_writes(tmp_path):
+    db_path = tmp_path / "legacy.sqlite"
+    with pytest.raises(FileNotFoundError):
+        get_readonly_connection(db_path, immutable=True)
+    assert not db_path.exists()
+
+    sqlite3.connect(db_path).close()
+    with pytest.raises(RuntimeError, match="older"):
+        get_readonly_connection(db_path, immutable=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert schema_version(conn) == 0
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("immutable", [False, True])
+def test_readonly_connection_rejects_newer_database(tmp_path, immutable):
+    db_path = tmp_path / "newer.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError, match="newer"):
+        get_readonly_connection(db_path, immutable=immutable)
+
+
+def test_cached_readonly_connection_is_separate_from_read_write(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    try:
+        rw = get_cached_connection(db_path)
+        ro = get_cached_connection(db_path, read_only=True)
+        assert rw is not ro
+        assert ro is get_cached_connection(db_path, read_only=True)
+        assert ro.execute("PRAGMA query_only;").fetchone()[0] == 1
+    finally:
+        close_cached_connections()
+
+
+# ── cached connections ────────────────────────────────────────────────────────
+
+def test_cached_connection_is_reused_for_same_path(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    try:
+        assert get_cached_connection(db_path) is get_cached_connection(str(db_path))
+    finally:
+        close_cached_connections()
+
+
+def test_cached_connection_differs_per_path(tmp_path):
+    try:
+        c1 = get_cached_connection(tmp_path / "a.sqlite")
+        c2 = get_cached_connection(tmp_path / "b.sqlite")
+        assert c1 is not c2
+    finally:
+        close_cached_connections()
+
+
+def test_cached_connection_differs_per_thread(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    seen = []
+
+    def worker():
+        seen.append(get_cached_connection(db_path))
+        close_cached_connections()
+
+    try:
+        main_conn = get_cached_connection(db_path)
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert seen and seen[0] is not main_conn
+    finally:
+        close_cached_connections()
+
+
+def test_cached_connection_creates_schema(tmp_path):
+    try:
+        conn = get_cached_connection(tmp_path / "test.sqlite")
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='circulars'"
+        ).fetchone()
+        assert row is not None
+        assert isinstance(conn.execute("SELECT 1 AS one").fetchone(), sqlite3.Row)
+    finally:
+        close_cached_connections()
+
+
+def test_close_cached_connections_opens_fresh_connection_next_time(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    first = get_cached_connection(db_path)
+    close_cached_connections()
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT 1")
+    second = get_cached_connection(db_path)
+    try:
+        assert second is not first
+        assert second.execute("SELECT 1").fetchone()[0] == 1
+    finally:
+        close_cached_connections()
+
+
+def test_cached_connection_reopens_replaced_database(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    replacement = tmp_path / "new.sqlite"
+    conn = get_connection(replacement)
+    _insert_circular(conn)
+    conn.close()
+    try:
+        for read_only in (False, True):
+            assert get_cached_connection(db_path, read_only).execute(
+                "SELECT COUNT(*) FROM circulars"
+            ).fetchone()[0] == 0
+        replace_database(replacement, db_path)
+        for read_only in (False, True):
+            assert get_cached_connection(db_path, read_only).execute(
+                "SELECT COUNT(*) FROM circulars"
+            ).fetchone()[0] == 1
+    finally:
+        close_cached_connections()
+
+
+# ── bulk loading ──────────────────────────────────────────────────────────────
+
+def test_deferred_schema_is_restored_with_fts_built(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        before = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        deferred = defer_secondary_schema(conn)
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'"
+        ).fetchone()[0] == 0
+        _insert_circular(conn)
+        assert _fts_match(conn, "refined") == []
+
+        restore_secondary_schema(conn, deferred)
         conn.commit()
-        rows = conn.execute(
-            "SELECT * FROM circulars_fts WHERE circulars_fts MATCH ?", ("optical",)
-        ).fetchall()
-        assert len(rows) == 2
+        after = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        assert [tuple(r) for r in after] == [tuple(r) for r in before]
+        assert len(_fts_match(conn, "refined")) == 1
+    finally:
+        conn.close()
+
+
+def test_replace_database_fsyncs_file_then_directory(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    replacement = tmp_path / "new.sqlite"
+    get_connection(replacement).close()
+    new_inode = replacement.stat().st_ino
+
+    synced = []
+    real_fsync = os.fsync
+
+    def recording_fsync(fd):
+        stat = os.fstat(fd)
+        synced.append(("dir" if S_ISDIR(stat.st_mode) else "file", stat.st_ino, db_path.exists()))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", recording_fsync)
+    replace_database(replacement, db_path)
+
+    assert synced == [("file", new_inode, False), ("dir", tmp_path.stat().st_ino, True)]
+
+
+def test_replace_database_discards_old_wal(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    old = get_connection(db_path)
+    old.execute("PRAGMA wal_autocheckpoint=0")
+    _insert_circular(old, circular_id_raw="1", circular_id_int=1)
+    reader = get_connection(db_path)
+    assert os.path.getsize(str(db_path) + "-wal") > 0
+
+    replacement = tmp_path / "new.sqlite"
+    new = get_connection(replacement)
+    _insert_circular(new, circular_id_raw="2", circular_id_int=2)
+    new.close()
+    replace_database(replacement, db_path)
+
+    fresh = get_connection(db_path)
+    try:
+        ids = [r[0] for r in fresh.execute("SELECT circular_id_raw FROM circulars")]
+        assert ids == ["2"]
+        assert fresh.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    finally:
+        fresh.close()
+        reader.close()
+        old.close()
+
+
+# ── index generation ──────────────────────────────────────────────────────────
+
+def test_generation_starts_at_zero(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        assert get_generation(conn) == 0
+    finally:
+        conn.close()
+
+
+def test_bump_generation_increments(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        with conn:
+            assert bump_generation(conn) == 1
+            assert bump_generation(conn) == 2
+        assert get_generation(conn) == 2
+    finally:
+        conn.close()
+
+
+def test_bump_generation_visible_to_readonly_connection(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    ro = get_readonly_connection(db_path)
+    try:
+        with conn:
+            bump_generation(conn)
+        assert get_generation(ro) == 1
+    finally:
+        ro.close()
+        conn.close()
+
+
+def test_rebuild_fts_bumps_generation(tmp_path):
+    conn = _open(tmp_path)
+    try:
+        rebuild_fts(conn)
+        assert get_generation(conn) == 1
     finally:
         conn.close()
@@ -0,0 +1,742 @@
+"""
+tests/test_fetch_circulars.py — tests for src/fetch_circulars.py
+
+All HTTP goes to StandIn, a local threaded server that serves fake
+circulars at /circulars/<id>.json and injects failures.
+
+Covers:
+  - TokenBucket: burst then evenly spaced tokens, pause holds every caller
+  - retry_after / retry_delay: seconds and HTTP-date headers, jittered
+      backoff within its cap, never shorter than Retry-After
+  - CircularFetcher.fetch: retries 5xx, 429 and dropped connections, gives
+      up after the retry limit, does not retry other errors
+  - CircularFetcher.fetch_many: results in request order, bounded
+      concurrency, keep-alive connections reused, stop at first 404,
+      rate limit across workers, tick called while waiting
+  - CircularFetcher conditional requests: 304 for an unchanged ETag or
+      Last-Modified, 200 once the circular changes
+  - IdBitmap: membership, iteration, size, highest ID, holes across
+      fully set bytes
+  - existing_ids (from files and the index) / save_circular (unchanged
+      content left alone) / fetch_state rows and validators
+  - IndexSink: batches written at batch_size or after flush_interval,
+      also by tick while downloads stall, unchanged circulars skipped and
+      reported as such, invalid ones rejected before archiving
+  - SegmentArchive: one JSON object per line, .part until closed, rolled
+      at max_records, segments ingestible as they are
+  - main (CLI): resumes after the highest saved ID, stops at the end,
+      reports failures, invalid options; --fill-gaps fetches holes once and
+      remembers missing ones, --revalidate refetches only changed circulars;
+      --ingest writes straight into the index (with --archive, also to a
+      segment) and resumes after the highest indexed ID
+"""
+
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.db import get_connection, get_generation
+from src.fetch_circulars import (
+    BACKOFF_CAP,
+    CircularFetcher,
+    IdBitmap,
+    IndexSink,
+    SegmentArchive,
+    TokenBucket,
+    existing_ids,
+    fetch_into,
+    fetch_state_row,
+    load_fetch_state,
+    main,
+    record_fetch_state,
+    retry_after,
+    retry_delay,
+    save_circular,
+)
+from src.indexer import ingest_path
+
+
+def make_record(circular_id):
+    return {
+        "circularId": circular_id,
+        "subject": f"GRB 260120B: circular {circular_id}",
+        "body": f"Circular {circular_id} about GRB 260120B.",
+        "eventId": "GRB 260120B",
+        "createdOn": 1769036892952,
+        "submitter": "Test Submitter <test@example.com>",
+        "format": "text/plain",
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        match = re.fullmatch(r"/circulars/(\d+)\.json", self.path)
+        circular_id = int(match.group(1)) if match else None
+        with server.lock:
+            server.requests.append(circular_id)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            faults = server.faults.get(circular_id)
+            fault = faults.pop(0) if faults else None
+        try:
+            time.sleep(server.latency)
+            if fault == "drop":
+                self.close_connection = True
+            elif fault is not None:
+                status, headers = fault if isinstance(fault, tuple) else (fault, ())
+                self.send_body(status, b"error", headers)
+            elif circular_id in server.circulars:
+                body = json.dumps(server.circulars[circular_id]).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                modified = server.modified.get(circular_id, 1769000000)
+                validators = [
+                    ("ETag", etag),
+                    ("Last-Modified", email.utils.formatdate(modified, usegmt=True)),
+                ]
+                since = self.headers.get("If-Modified-Since")
+                if self.headers.get("If-None-Match") or since:
+                    with server.lock:
+                        server.conditional.append(circular_id)
+                if self.headers.get("If-None-Match") == etag or (
+                    "If-None-Match" not in self.headers
+                    and since
+                    and email.utils.parsedate_to_datetime(since).timestamp() >= modified
+                ):
+                    self.send_body(304, headers=validators)
+                else:
+                    self.send_body(200, body, [("Content-Type", "application/json"), *validators])
+            else:
+                self.send_body(404, b"not found")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class StandIn(ThreadingHTTPServer):
+    """
+    Serves make_record(id) for each ID in circulars, with an ETag and a
+    Last-Modified (from modified, else a fixed time) and 304s for matching
+    conditional requests. faults maps an ID to what its next requests get
+    instead, in order: a status, a (status, headers) pair, or "drop" to
+    hang up without answering.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, circular_ids=(), latency=0.0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.circulars = {i: make_record(i) for i in circular_ids}
+        self.faults = {}
+        self.modified = {}
+        self.latency = latency
+        self.requests = []
+        self.conditional = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def edit(self, circular_id, subject):
+        self.circulars[circular_id] = {**self.circulars[circular_id], "subject": subject}
+        self.modified[circular_id] = 1769000000 + 3600
+
+    @property
+    def base_url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}/circulars"
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn(range(1, 31))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+
+
+def fetcher_for(server, **options):
+    options.setdefault("rate", None)
+    options.setdefault("backoff", 0)
+    return CircularFetcher(server.base_url, **options)
+
+
+# ── TokenBucket ───────────────────────────────────────────────────────────────
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+def test_token_bucket_allows_burst_then_spaces_tokens():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.slept == pytest.approx([0.1, 0.2])
+
+    clock.slept.clear()
+    clock.now += 1.0
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.slept == pytest.approx([0.1])
+
+
+def test_token_bucket_pause_holds_every_caller():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+    bucket.pause(2.0)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == pytest.approx([2.1, 2.2])
+
+    clock.slept.clear()
+    clock.now += 2.2
+    bucket.acquire()
+    assert clock.slept == pytest.approx([0.1])
+
+
+# ── retry_after / retry_delay ─────────────────────────────────────────────────
+
+def response_with(headers):
+    response = requests.Response()
+    response.status_code = 429
+    response.headers.update(headers)
+    return response
+
+
+def test_retry_after_reads_seconds_and_dates():
+    assert retry_after(None) is None
+    assert retry_after(response_with({})) is None
+    assert retry_after(response_with({"Retry-After": "7"})) == 7
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < retry_after(response_with({"Retry-After": later})) <= 60
+    assert retry_after(response_with({"Retry-After": "soon"})) is None
+
+
+def test_retry_delay_is_jittered_within_its_cap():
+    delays = [retry_delay(attempt, backoff=0.5) for attempt in range(12) for _ in range(20)]
+    assert all(0 <= delay <= BACKOFF_CAP for delay in delays)
+    assert len(set(delays)) > 1
+    assert max(retry_delay(0, backoff=0.5) for _ in range(50)) <= 0.5
+    assert retry_delay(0, response_with({"Retry-After": "3"}), backoff=0.5) >= 3
+
+
+# ── CircularFetcher.fetch ─────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("fault", [500, 502, 503, 504, (429, [("Retry-After", "0")]), "drop"])
+def test_fetch_retries_transient_failures(stand_in, fault):
+    stand_in.faults[5] = [fault, fault]
+    with fetcher_for(stand_in, rate=1000) as fetcher:
+        response = fetcher.fetch(5)
+    assert response.status_code == 200
+    assert response.json() == make_record(5)
+    assert stand_in.requests == [5, 5, 5]
+
+
+def test_fetch_gives_up_after_retry_limit(stand_in):
+    stand_in.faults[5] = [503] * 10
+    stand_in.faults[6] = ["drop"] * 10
+    with fetcher_for(stand_in, retries=2) as fetcher:
+        assert fetcher.fetch(5).status_code == 503
+        with pytest.raises(requests.ConnectionError):
+            fetcher.fetch(6)
+    assert stand_in.requests == [5, 5, 5, 6, 6, 6]
+
+
+def test_fetch_does_not_retry_other_errors(stand_in):
+    stand_in.faults[5] = [403]
+    with fetcher_for(stand_in) as fetcher:
+        assert fetcher.fetch(5).status_code == 403
+        assert fetcher.fetch(99).status_code == 404
+    assert stand_in.requests == [5, 99]
+
+
+# ── CircularFetcher.fetch_many ────────────────────────────────────────────────
+
+def test_fetch_many_yields_results_in_order(stand_in):
+    stand_in.faults[3] = [503]
+    stand_in.faults[4] = [503] * 10
+    with fetcher_for(stand_in, workers=4, retries=1) as fetcher:
+        results = list(fetcher.fetch_many(range(1, 31)))
+
+    assert [circular_id for circular_id, _, _ in results] == list(range(1, 31))
+    statuses = {circular_id: response.status_code for circular_id, response, _ in results}
+    assert statuses[4] == 503
+    assert all(status == 200 for circular_id, status in statuses.items() if circular_id != 4)
+    assert results[0][1].json() == make_record(1)
+
+
+def test_fetch_many_reports_connection_errors(stand_in):
+    stand_in.faults[2] = ["drop"] * 10
+    with fetcher_for(stand_in, retries=1) as fetcher:
+        results = list(fetcher.fetch_many([1, 2, 3]))
+    assert results[1][0] == 2 and results[1][1] is None and results[1][2]
+    assert results[2][1].status_code == 200
+
+
+def test_fetch_many_bounds_concurrency_and_reuses_connections(stand_in):
+    stand_in.latency = 0.02
+    with fetcher_for(stand_in, workers=3) as fetcher:
+        assert len(list(fetcher.fetch_many(range(1, 31)))) == 30
+    assert stand_in.max_in_flight == 3
+    assert stand_in.connections <= 3
+
+
+def test_fetch_many_stops_at_first_missing(stand_in):
+    with fetcher_for(stand_in, workers=2) as fetcher:
+        results = list(fetcher.fetch_many(range(25, 1000), stop_at_missing=True))
+    assert [circular_id for circular_id, _, _ in results] == list(range(25, 32))
+    assert results[-1][1].status_code == 404
+    # Only the few IDs queued ahead were requested past the end.
+    assert max(stand_in.requests) < 40
+
+
+def test_fetch_many_is_rate_limited(stand_in):
+    with fetcher_for(stand_in, workers=4, rate=50) as fetcher:
+        start = time.monotonic()
+        assert len(list(fetcher.fetch_many(range(1, 15)))) == 14
+        elapsed = time.monotonic() - start
+    # A burst of 4, then 10 more at 50 per second.
+    assert elapsed >= 0.18
+
+
+def test_fetch_many_ticks_while_waiting(stand_in):
+    stand_in.latency = 0.2
+    ticks = []
+
+    def tick():
+        ticks.append(time.monotonic())
+        return 0.02
+
+    with fetcher_for(stand_in, workers=1) as fetcher:
+        assert len(list(fetcher.fetch_many([1, 2], tick=tick))) == 2
+    assert len(ticks) >= 10
+
+
+# ── conditional requests ──────────────────────────────────────────────────────
+
+def test_fetch_revalidates_with_etag(stand_in):
+    with fetcher_for(stand_in) as fetcher:
+        first = fetcher.fetch(5)
+        validators = (first.headers["ETag"], None)
+        assert fetcher.fetch(5, validators).status_code == 304
+
+        stand_in.edit(5, "GRB 260120B: revised")
+        changed = fetcher.fetch(5, validators)
+    assert changed.status_code == 200
+    assert changed.json()["subject"] == "GRB 260120B: revised"
+    assert changed.headers["ETag"] != validators[0]
+    assert stand_in.conditional == [5, 5]
+
+
+def test_fetch_revalidates_with_last_modified(stand_in):
+    with fetcher_for(stand_in) as fetcher:
+        validators = (None, fetcher.fetch(5).headers["Last-Modified"])
+        assert fetcher.fetch(5, validators).status_code == 304
+        stand_in.edit(5, "GRB 260120B: revised")
+        assert fetcher.fetch(5, validators).status_code == 200
+
+
+def test_fetch_many_uses_validators_per_id(stand_in):
+    with fetcher_for(stand_in) as fetcher:
+        etag = fetcher.fetch(2).headers["ETag"]
+        results = list(fetcher.fetch_many([1, 2, 3], validators={2: (etag, None)}))
+    assert [response.status_code for _, response, _ in results] == [200, 304, 200]
+
+
+# ── IdBitmap ──────────────────────────────────────────────────────────────────
+
+def test_id_bitmap_holds_ids():
+    ids = IdBitmap([3, 17, 0, 17, 43493])
+    assert 17 in ids and 0 in ids and 43493 in ids
+    assert 4 not in ids and -1 not in ids and 10**9 not in ids and "17" not in ids
+    assert list(ids) == [0, 3, 17, 43493]
+    assert len(ids) == 4
+    assert ids.max() == 43493
+    assert IdBitmap().max() is None
+    with pytest.raises(ValueError):
+        ids.add(-3)
+
+
+def test_id_bitmap_lists_holes():
+    ids = IdBitmap(i for i in range(1, 100) if i not in (5, 40, 41, 99))
+    assert list(ids.missing(1, 98)) == [5, 40, 41]
+    assert list(ids.missing(0, 110)) == [0, 5, 40, 41, *range(99, 111)]
+    assert list(ids.missing(50, 60)) == []
+
+
+def test_id_bitmap_is_compact():
+    ids = IdBitmap(range(1, 50001))
+    assert len(ids._bits) <= 50001 // 8 + 1
+
+
+# ── files and state ───────────────────────────────────────────────────────────
+
+def test_existing_ids_and_save_circular(tmp_path):
+    save_circular(tmp_path, 12, json.dumps(make_record(12)))
+    save_circular(tmp_path, 3, "{}")
+    (tmp_path / "notes.json").write_text("{}", encoding="utf-8")
+    assert set(existing_ids(tmp_path)) == {3, 12}
+    assert json.loads((tmp_path / "12.json").read_text(encoding="utf-8")) == make_record(12)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["12.json", "3.json", "notes.json"]
+
+
+def test_existing_ids_include_the_index(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    save_circular(data_dir, 2, "{}")
+    records = tmp_path / "records.json"
+    records.write_text(json.dumps([make_record(5), make_record(9)]), encoding="utf-8")
+    ingest_path(tmp_path / "test.sqlite", records)
+
+    conn = get_connection(tmp_path / "test.sqlite")
+    assert set(existing_ids(data_dir, conn)) == {2, 5, 9}
+    conn.close()
+
+
+def test_save_circular_leaves_unchanged_files_alone(tmp_path):
+    assert save_circular(tmp_path, 1, "{}") is True
+    path = tmp_path / "1.json"
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert save_circular(tmp_path, 1, "{}") is False
+    assert path.stat().st_mtime_ns == 1_000_000_000
+    assert save_circular(tmp_path, 1, '{"a": 1}') is True
+    assert path.read_text(encoding="utf-8") == '{"a": 1}'
+
+
+def test_fetch_state_keeps_validators_across_304s(stand_in, tmp_path):
+    conn = get_connection(tmp_path / "test.sqlite")
+    with fetcher_for(stand_in) as fetcher:
+        first = fetcher.fetch(5)
+        record_fetch_state(conn, [fetch_state_row(5, first), fetch_state_row(99, fetcher.fetch(99))])
+        validators, missing = load_fetch_state(conn)
+        assert validators == {5: (first.headers["ETag"], first.headers["Last-Modified"])}
+        assert list(missing) == [99]
+
+        not_modified = fetcher.fetch(5, validators[5])
+        not_modified.headers.pop("ETag")
+        record_fetch_state(conn, [fetch_state_row(5, not_modified)])
+    assert load_fetch_state(conn)[0] == validators
+    conn.close()
+
+
+# ── IndexSink / SegmentArchive ────────────────────────────────────────────────
+
+def indexed_ids(db_path):
+    conn = get_connection(db_path)
+    try:
+        return [row[0] for row in conn.execute(
+            "SELECT circular_id_int FROM circulars ORDER BY circular_id_int"
+        )]
+    finally:
+        conn.close()
+
+
+def test_index_sink_writes_full_batches(tmp_path):
+    conn = get_connection(tmp_path / "test.sqlite")
+    sink = IndexSink(conn, batch_size=2, flush_interval=60)
+    for circular_id in (1, 2, 3):
+        assert sink.save(circular_id, json.dumps(make_record(circular_id))) is True
+    assert indexed_ids(tmp_path / "test.sqlite") == [1, 2]
+    assert get_generation(conn) == 1
+
+    sink.flush()
+    assert indexed_ids(tmp_path / "test.sqlite") == [1, 2, 3]
+    assert (sink.written, sink.changed) == (3, 3)
+
+    assert sink.save(3, json.dumps(make_record(3))) is False
+    sink.flush()
+    assert (sink.written, sink.changed) == (3, 3)
+    assert get_generation(conn) == 2
+
+    assert sink.save(3, json.dumps({**make_record(3), "subject": "GRB 260120B: revised"})) is True
+    sink.flush()
+    assert (sink.written, sink.changed) == (4, 4)
+    conn.close()
+
+
+def test_index_sink_commits_after_flush_interval(tmp_path):
+    clock = FakeClock()
+    conn = get_connection(tmp_path / "test.sqlite")
+    sink = IndexSink(conn, batch_size=100, flush_interval=1.0, clock=clock)
+    sink.save(1, json.dumps(make_record(1)))
+    clock.now += 0.5
+    sink.save(2, json.dumps(make_record(2)))
+    assert indexed_ids(tmp_path / "test.sqlite") == []
+
+    clock.now += 0.5
+    sink.save(3, json.dumps(make_record(3)))
+    assert indexed_ids(tmp_path / "test.sqlite") == [1, 2, 3]
+    conn.close()
+
+
+def test_index_sink_tick_commits_when_due(tmp_path):
+    clock = FakeClock()
+    conn = get_connection(tmp_path / "test.sqlite")
+    sink = IndexSink(conn, batch_size=100, flush_interval=1.0, clock=clock)
+    assert sink.tick() is None
+    sink.save(1, json.dumps(make_record(1)))
+    clock.now += 0.25
+    assert sink.tick() == pytest.approx(0.75)
+    assert indexed_ids(tmp_path / "test.sqlite") == []
+
+    clock.now += 0.75
+    assert sink.tick() is None
+    assert indexed_ids(tmp_path / "test.sqlite") == [1]
+    conn.close()
+
+
+def test_fetch_into_commits_while_downloads_stall(stand_in, tmp_path):
+    # Circular 2 is held up by a Retry-After; circular 1 must not wait for it.
+    stand_in.faults[2] = [(503, [("Retry-After", "1")])]
+    db_path = tmp_path / "test.sqlite"
+    counts = {"downloaded": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0}
+
+    def run():
+        conn = get_connection(db_path)
+        sink = IndexSink(conn, flush_interval=0.05)
+        with fetcher_for(stand_in, workers=1) as fetcher:
+            fetch_into(fetcher, [1, 2], sink, IdBitmap(), counts)
+        conn.close()
+
+    get_connection(db_path).close()
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.5)
+    assert thread.is_alive()
+    assert indexed_ids(db_path) == [1]
+    thread.join(timeout=10)
+    assert indexed_ids(db_path) == [1, 2]
+    assert counts["downloaded"] == 2
+
+
+def test_index_sink_rejects_invalid_circulars(tmp_path):
+    conn = get_connection(tmp_path / "test.sqlite")
+    archive = SegmentArchive(tmp_path / "archive")
+    sink = IndexSink(conn, archive=archive)
+    with pytest.raises(ValueError):
+        sink.save(1, "error")
+    with pytest.raises(ValueError, match="circularId"):
+        sink.save(2, json.dumps({"subject": "no id"}))
+    sink.flush()
+    archive.close()
+    assert archive.segments == []
+    assert sink.written == 0
+    conn.close()
+
+
+def read_segment(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_segment_archive_appends_lines_and_renames_when_closed(tmp_path):
+    archive = SegmentArchive(tmp_path)
+    archive.append(4, json.dumps(make_record(4)))
+    archive.append(5, json.dumps(make_record(5), indent=2))
+    archive.flush()
+    assert [p.name.endswith(".part") for p in tmp_path.iterdir()] == [True]
+
+    archive.close()
+    [segment] = archive.segments
+    assert segment.name.startswith("circulars-") and segment.name.endswith("-4-5.jsonl.gz")
+    assert list(tmp_path.iterdir()) == [segment]
+    assert read_segment(segment) == [make_record(4), make_record(5)]
+
+
+def test_segment_archive_rolls_segments(tmp_path):
+    archive = SegmentArchive(tmp_path, max_records=2)
+    for circular_id in range(1, 6):
+        archive.append(circular_id, json.dumps(make_record(circular_id)))
+    archive.close()
+    assert [read_segment(p)[0]["circularId"] for p in archive.segments] == [1, 3, 5]
+    assert sorted(tmp_path.iterdir()) == sorted(archive.segments)
+
+    ingest_path(tmp_path / "rebuilt.sqlite", tmp_path)
+    assert indexed_ids(tmp_path / "rebuilt.sqlite") == [1, 2, 3, 4, 5]
+
+
+# ── command line ──────────────────────────────────────────────────────────────
+
+def run_main(stand_in, data_dir, *flags):
+    return main([str(data_dir), "--base-url", stand_in.base_url, "--rate", "0", *flags])
+
+
+def test_cli_fetches_after_highest_saved_id(stand_in, tmp_path, capsys):
+    save_circular(tmp_path, 20, "{}")
+    assert run_main(stand_in, tmp_path, "--workers", "3") == 0
+
+    assert set(existing_ids(tmp_path)) == set(range(20, 31))
+    assert json.loads((tmp_path / "30.json").read_text(encoding="utf-8")) == make_record(30)
+    output = capsys.readouterr().out
+    assert "Current max circular ID: 20" in output
+    assert "404 at 31" in output
+    assert "Downloaded 10 circulars" in output
+
+
+def test_cli_skips_saved_ids_and_respects_count(stand_in, tmp_path):
+    save_circular(tmp_path, 2, "{}")
+    assert run_main(stand_in, tmp_path, "--start", "1", "--count", "4") == 0
+    assert set(existing_ids(tmp_path)) == {1, 2, 3, 4}
+    assert 2 not in stand_in.requests
+
+
+def test_cli_reports_failures(stand_in, tmp_path, capsys):
+    stand_in.faults[2] = [503] * 10
+    assert run_main(stand_in, tmp_path, "--start", "1", "--count", "3", "--retries", "0") == 1
+    assert set(existing_ids(tmp_path)) == {1, 3}
+    output = capsys.readouterr().out
+    assert "Error 2: HTTP 503" in output
+    assert "1 failed" in output
+
+
+def test_cli_fills_gaps_and_remembers_missing_ids(stand_in, tmp_path, capsys):
+    del stand_in.circulars[7]
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for circular_id in [1, 2, 3, 5, 6, 8, 9, 10]:
+        save_circular(data_dir, circular_id, "{}")
+    db = str(tmp_path / "test.sqlite")
+
+    assert run_main(stand_in, data_dir, "--db", db, "--fill-gaps", "--count", "5") == 0
+    assert set(existing_ids(data_dir)) == {*range(1, 7), *range(8, 16)}
+    assert sorted(stand_in.requests) == [4, 7, *range(11, 16)]
+    assert "Downloaded 6 circulars" in capsys.readouterr().out
+
+    stand_in.requests.clear()
+    assert run_main(stand_in, data_dir, "--db", db, "--fill-gaps") == 0
+    # 7 is known to be missing; the new run starts after 15 and ends at 31.
+    assert min(stand_in.requests) == 16
+    assert set(range(16, 32)) <= set(stand_in.requests)
+    conn = get_connection(db)
+    statuses = dict(conn.execute("SELECT circular_id, status FROM fetch_state"))
+    conn.close()
+    assert statuses[7] == 404 and statuses[4] == 200
+    assert 31 not in statuses
+
+
+def test_cli_fill_gaps_without_index(stand_in, tmp_path):
+    save_circular(tmp_path, 3, "{}")
+    assert run_main(stand_in, tmp_path, "--fill-gaps", "--count", "1") == 0
+    assert set(existing_ids(tmp_path)) == {1, 2, 3, 4}
+
+
+def test_cli_revalidates_only_changed_circulars(stand_in, tmp_path, capsys):
+    db = str(tmp_path / "test.sqlite")
+    assert run_main(stand_in, tmp_path, "--db", db) == 0
+    capsys.readouterr()
+
+    stand_in.edit(12, "GRB 260120B: revised")
+    stand_in.requests.clear()
+    assert run_main(stand_in, tmp_path, "--db", db, "--revalidate") == 0
+
+    assert sorted(stand_in.conditional) == list(range(1, 31))
+    saved = json.loads((tmp_path / "12.json").read_text(encoding="utf-8"))
+    assert saved["subject"] == "GRB 260120B: revised"
+    output = capsys.readouterr().out
+    assert "Updated 12" in output
+    assert "updated 1, 29 unchanged" in output
+
+
+def test_cli_revalidate_needs_index(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--revalidate"])
+
+
+def test_cli_ingests_straight_into_index(stand_in, tmp_path, capsys):
+    db = tmp_path / "test.sqlite"
+    data_dir = tmp_path / "data"
+    archive = tmp_path / "archive"
+    stand_in.faults[9] = [(200, [])]
+    flags = ["--db", str(db), "--ingest", "--archive", str(archive), "--count", "20"]
+
+    assert run_main(stand_in, data_dir, *flags) == 1
+    assert not data_dir.exists()
+    assert indexed_ids(db) == [*range(1, 9), *range(10, 21)]
+    output = capsys.readouterr().out
+    assert "Error 9:" in output
+    assert f"Downloaded 19 circulars into {db}" in output
+
+    [segment] = archive.iterdir()
+    assert [r["circularId"] for r in read_segment(segment)] == [*range(1, 9), *range(10, 21)]
+    conn = get_connection(db)
+    assert conn.execute("SELECT COUNT(*) FROM fetch_state").fetchone()[0] == 19
+    conn.close()
+
+    # Resumes after the highest indexed circular, and the gap is filled.
+    stand_in.requests.clear()
+    assert run_main(stand_in, data_dir, *flags[:-2], "--fill-gaps") == 0
+    assert indexed_ids(db) == list(range(1, 31))
+    assert min(stand_in.requests) == 9
+    assert len(list(archive.iterdir())) == 2
+
+
+def test_cli_ingest_reports_unchanged_circulars(stand_in, tmp_path, capsys):
+    db = tmp_path / "test.sqlite"
+    flags = ["--db", str(db), "--ingest", "--count", "3"]
+    assert run_main(stand_in, tmp_path, *flags) == 0
+    conn = get_connection(db)
+    with conn:
+        conn.execute("DELETE FROM fetch_state")
+    conn.close()
+    stand_in.edit(2, "GRB 260120B: revised")
+    capsys.readouterr()
+
+    # Without validators every held circular comes back in full.
+    assert run_main(stand_in, tmp_path, *flags, "--revalidate") == 0
+    output = capsys.readouterr().out
+    assert "Updated 2" in output
+    assert "Updated 1" not in output and "Updated 3" not in output
+    assert "updated 1, 2 unchanged" in output
+
+
+def test_cli_ingest_and_archive_need_their_options(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--ingest"])
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--db", str(tmp_path / "test.sqlite"), "--archive", str(tmp_path)])
+
+
+@pytest.mark.parametrize("flags", [["--workers", "0"], ["--count", "0"], ["--rate", "-1"], ["--batch-size", "0"]])
+def test_cli_rejects_invalid_options(tmp_path, flags):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), *flags])
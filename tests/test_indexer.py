@@ -5,27 +5,93 @@ Covers:
   - sha1_text: determinism, sensitivity to input, output format
   - parse_circular_id: int, whole-float, fractional float, numeric string,
       non-numeric string, None, empty string
+  - parse_line: valid circular, invalid JSON, non-object, missing or blank
+      circularId, fields of the wrong type, createdOn coerced to an integer
+      or rejected, integers beyond 64 bits rejected
   - upsert_circular: full insert into all three tables, field mapping,
       idempotency on unchanged records, update on changed records,
       FTS sync on update, event extraction fallbacks (subject/body/none),
-      multi-event records, null-byte sanitisation, missing circularId error
+      multi-event records, null-byte sanitisation, missing circularId error,
+      record hash taken over the stored indexed fields only (createdOn as
+      the INTEGER column stores it), legacy hashes rehashed by migration so
+      re-ingest writes nothing
+  - upsert_circulars: batch insert into all three tables, skips unchanged
+      records, updates changed ones, last copy of a repeated ID wins, hash
+      lookups beyond one IN-list chunk
   - iter_json_records: single object, list, JSONL, blank JSONL lines,
       directory of .json, directory with .jsonl, unsupported extension,
-      missing path
-  - ingest_path: return count, DB population, idempotency, directory ingestion
+      missing path, scandir walk in the same order as sorted rglob,
+      skipping to a start record in .json and .jsonl files
+  - iter_json_array: same values as json.loads at any chunk size, numbers
+      split across chunks, malformed, trailing and non-array input rejected;
+      large .json arrays streamed (with start skipping) and ingested the same
+      as loaded ones, large .json objects still loaded
+  - compressed inputs: gzip/bzip2/xz .json and .jsonl files, tar (plain and
+      compressed) and zip archives read in member order without extracting,
+      non-record members skipped, start skipping, large members and
+      compressed arrays of any size streamed,
+      listed after plain files in a directory, ingest same as the extracted
+      files (serial and parallel), unchanged archives skipped by the
+      manifest, interrupted ingest resumed
+  - ingest_path: return count, DB population, idempotency, directory ingestion,
+      index generation bumped only when records change, same result for any
+      batch size, invalid batch size
+  - parallel ingest (workers > 1): same index as a serial ingest with IDs
+      repeated across files, unchanged re-ingest writes nothing, write_prepared
+      last copy wins, invalid worker count
+  - source file manifest: unchanged files skipped without being read, touched
+      but identical files skipped after hashing, same-size rewrites inside the
+      racy window re-read, new files picked up, force re-reads everything,
+      files hashed block by block
+  - chunked commits: generation bumped per chunk, interrupted ingest keeps
+      committed chunks and resumes from its checkpoint (serial and parallel),
+      checkpoint ignored once its file changes, invalid commit_every
+  - bulk_load: same index as ingest_path, schema and FTS triggers restored,
+      generation and fetch_state carried over from the replaced file,
+      failed load leaves the old index and no temporary file
+  - watch mode: inotify reports files once closed or moved in, new
+      subdirectories, a single watched file; polling reports new and replaced
+      files and new subdirectories once settled, in-place
+      rewrites on its full scan, a single watched file, and never waits past
+      its timeout; backend selection and
+      fallback; watch_path ingests new and changed files (both backends),
+      skips an unreadable file until it changes, debounces changes into one
+      batch, rescans the tree when changes are lost, invalid options
+  - main (CLI): ingest (with --batch-size, --workers, --force, --commit-every,
+      --bulk and --watch) and rebuild-fts commands
 """
 
+import bz2
+import gzip
+import hashlib
+import io
 import json
+import lzma
+import os
+import sys
+import tarfile
+import threading
+import time
+import zipfile
 
 import pytest
 
-from src.db import get_connection
+from src.db import get_connection, get_generation, hash_indexed_fields, rehash_records
+from src import indexer
 from src.indexer import (
+    bulk_load,
+    content_hash,
     ingest_path,
+    iter_input_files,
     iter_json_records,
+    main,
     parse_circular_id,
+    parse_line,
+    prepare_record,
     sha1_text,
     upsert_circular,
+    upsert_circulars,
+    write_prepared,
 )
 
 
@@ -103,6 +169,46 @@ def test_parse_circular_id_non_numeric_string():
     assert integer is None
 
 
+# ── parse_line ────────────────────────────────────────────────────────────────
+
+def test_parse_line_prepares_record():
+    row, events = parse_line(json.dumps(make_record(42)))
+    assert row[0] == "42"
+    assert events
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ("{not json", "Expecting"),
+        ("[1, 2]", "JSON object"),
+        (json.dumps({"subject": "no id"}), "circularId"),
+        (json.dumps({"circularId": "  "}), "circularId"),
+        (json.dumps({"circularId": 1, "body": 123}), "Invalid record"),
+        (json.dumps({"circularId": 1, "createdOn": [1, 2]}), "Invalid createdOn"),
+        (json.dumps({"circularId": 1, "createdOn": {"ms": 1}}), "Invalid createdOn"),
+        (json.dumps({"circularId": 1, "createdOn": "yesterday"}), "Invalid createdOn"),
+        (json.dumps({"circularId": 1, "createdOn": 1.5}), "Invalid createdOn"),
+        (json.dumps({"circularId": 1, "createdOn": True}), "Invalid createdOn"),
+        (json.dumps({"circularId": 1, "createdOn": 2**63}), "Invalid createdOn"),
+        (json.dumps({"circularId": 10**30}), "Invalid circularId"),
+        (json.dumps({"circularId": -(2**63) - 1}), "Invalid circularId"),
+    ],
+)
+def test_parse_line_rejects_invalid_records(line, message):
+    with pytest.raises(ValueError, match=message):
+        parse_line(line)
+
+
+@pytest.mark.parametrize(
+    "created_on, stored",
+    [(1769036892952, 1769036892952), (1.769036892952e12, 1769036892952), ("1769036892952", 1769036892952), (None, None)],
+)
+def test_parse_line_coerces_created_on(created_on, stored):
+    row, _ = parse_line(json.dumps(dict(make_record(42), createdOn=created_on)))
+    assert row[4] == stored
+
+
 # ── upsert_circular — basic insert ────────────────────────────────────────────
 
 def test_upsert_inserts_into_circulars(tmp_path):
@@ -181,6 +287,56 @@ def test_upsert_skips_unchanged_record(tmp_path):
     conn.close()
 
 
+def test_upsert_ignores_fields_that_are_not_indexed(tmp_path):
+    conn = fresh_db(tmp_path)
+    upsert_circular(conn, make_record())
+    assert upsert_circular(conn, dict(make_record(), editedOn=1769040000000)) is False
+    assert upsert_circular(conn, make_record(subject="  GRB 260120B: Swift-BAT refined analysis\n")) is False
+    conn.close()
+
+
+def test_record_hash_matches_stored_columns(tmp_path):
+    conn = fresh_db(tmp_path)
+    upsert_circular(conn, make_record())
+    row = conn.execute(
+        "SELECT circular_id_raw, subject, body, created_on, submitter, format, raw_event_id, record_hash "
+        "FROM circulars"
+    ).fetchone()
+    assert row["record_hash"] == hash_indexed_fields(*tuple(row)[:7])
+    conn.close()
+
+
+@pytest.mark.parametrize("created_on", ["1769036892952", 1.769036892952e12, "1.5", 2.5, None])
+def test_record_hash_matches_rehash_for_coerced_created_on(tmp_path, created_on):
+    conn = fresh_db(tmp_path)
+    upsert_circular(conn, make_record(created_on=created_on))
+    ingested = conn.execute("SELECT record_hash FROM circulars").fetchone()[0]
+    rehash_records(conn)
+    assert conn.execute("SELECT record_hash FROM circulars").fetchone()[0] == ingested
+    assert upsert_circular(conn, make_record(created_on=created_on)) is False
+    conn.close()
+
+
+def test_rehashed_legacy_database_is_not_rewritten(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+    conn = get_connection(db_path)
+    conn.execute("UPDATE circulars SET record_hash = 'legacy-sha1'")
+    conn.execute("DROP TABLE ingest_checkpoints")
+    conn.execute("DROP TABLE fetch_state")
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+
+    assert ingest_path(db_path, json_path, force=True) == 2
+    conn = get_connection(db_path)
+    assert get_generation(conn) == 1
+    conn.close()
+
+
 def test_upsert_updates_subject_when_record_changes(tmp_path):
     conn = fresh_db(tmp_path)
     record = make_record()
@@ -307,6 +463,108 @@ def test_upsert_raises_on_missing_circular_id(tmp_path):
     conn.close()
 
 
+# ── upsert_circulars — batches ────────────────────────────────────────────────
+
+def dump_index(conn):
+    """Everything ingest writes, in a comparable form."""
+    circulars = conn.execute(
+        "SELECT circular_id_raw, subject, body, primary_event_norm, record_hash "
+        "FROM circulars ORDER BY circular_id_raw"
+    ).fetchall()
+    events = conn.execute(
+        "SELECT circular_id_raw, event_norm, is_primary FROM circular_events "
+        "ORDER BY circular_id_raw, event_norm"
+    ).fetchall()
+    fts = conn.execute(
+        "SELECT c.circular_id_raw FROM circulars_fts JOIN circulars c ON c.id = circulars_fts.rowid "
+        "WHERE circulars_fts MATCH 'analysis' ORDER BY c.circular_id_raw"
+    ).fetchall()
+    return [tuple(r) for r in circulars], [tuple(r) for r in events], [tuple(r) for r in fts]
+
+
+def test_upsert_circulars_inserts_batch(tmp_path):
+    conn = fresh_db(tmp_path)
+    records = [make_record(i) for i in range(1, 6)]
+    with conn:
+        assert upsert_circulars(conn, records) == 5
+    circulars, events, fts = dump_index(conn)
+    assert [c[0] for c in circulars] == ["1", "2", "3", "4", "5"]
+    assert all(e[1] == "GRB260120B" and e[2] == 1 for e in events)
+    assert len(fts) == 5
+    conn.close()
+
+
+def test_upsert_circulars_matches_single_upserts(tmp_path):
+    records = [
+        make_record(1),
+        make_record(2, subject="EP260119a and GRB 260120B: joint analysis", event_id=None),
+        make_record(3, body="No designation here, only analysis.", event_id=None, subject="Report"),
+    ]
+    batched = get_connection(tmp_path / "batched.sqlite")
+    single = get_connection(tmp_path / "single.sqlite")
+    with batched:
+        upsert_circulars(batched, records)
+    with single:
+        for record in records:
+            upsert_circular(single, record)
+    assert dump_index(batched) == dump_index(single)
+    batched.close()
+    single.close()
+
+
+def test_upsert_circulars_skips_unchanged(tmp_path):
+    conn = fresh_db(tmp_path)
+    records = [make_record(i) for i in range(1, 4)]
+    with conn:
+        upsert_circulars(conn, records)
+        records[1] = make_record(2, subject="GRB 260120B: revised analysis")
+        assert upsert_circulars(conn, records) == 1
+    row = conn.execute("SELECT subject FROM circulars WHERE circular_id_raw = '2'").fetchone()
+    assert row["subject"] == "GRB 260120B: revised analysis"
+    conn.close()
+
+
+def test_upsert_circulars_updates_events(tmp_path):
+    conn = fresh_db(tmp_path)
+    with conn:
+        upsert_circulars(conn, [make_record(1)])
+        upsert_circulars(conn, [make_record(1, event_id="EP260119a")])
+    events = conn.execute("SELECT event_norm FROM circular_events WHERE circular_id_raw = '1'").fetchall()
+    assert [e[0] for e in events] == ["EP260119A"]
+    conn.close()
+
+
+def test_upsert_circulars_last_duplicate_wins(tmp_path):
+    conn = fresh_db(tmp_path)
+    first = make_record(1, subject="GRB 260120B: first")
+    second = make_record(1, subject="GRB 260120B: second")
+    with conn:
+        upsert_circulars(conn, [second])
+        # The stored copy equals the last one in the batch; the earlier copy
+        # must not be written over it.
+        upsert_circulars(conn, [first, second])
+    row = conn.execute("SELECT subject FROM circulars WHERE circular_id_raw = '1'").fetchone()
+    assert row["subject"] == "GRB 260120B: second"
+    conn.close()
+
+
+def test_upsert_circulars_hash_lookup_spans_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(indexer, "HASH_LOOKUP_CHUNK", 2)
+    conn = fresh_db(tmp_path)
+    records = [make_record(i) for i in range(1, 8)]
+    with conn:
+        assert upsert_circulars(conn, records) == 7
+        assert upsert_circulars(conn, records) == 0
+    conn.close()
+
+
+def test_upsert_circulars_missing_id_raises(tmp_path):
+    conn = fresh_db(tmp_path)
+    with pytest.raises(ValueError, match="circularId"):
+        upsert_circulars(conn, [make_record(1), {"subject": "no id"}])
+    conn.close()
+
+
 # ── iter_json_records ─────────────────────────────────────────────────────────
 
 def test_iter_single_json_object(tmp_path):
@@ -377,6 +635,277 @@ def test_iter_raises_for_missing_path(tmp_path):
         list(iter_json_records(tmp_path / "nonexistent_dir"))
 
 
+def test_iter_input_files_matches_sorted_rglob(tmp_path):
+    data = tmp_path / "data"
+    (data / "b" / "deep").mkdir(parents=True)
+    (data / "a").mkdir()
+    for name in ["b/deep/3.json", "b/2.json", "a/10.json", "a/9.jsonl", "1.jsonl", "notes.txt"]:
+        (data / name).write_text(json.dumps(make_record()), encoding="utf-8")
+    expected = sorted(data.rglob("*.json")) + sorted(data.rglob("*.jsonl"))
+    assert iter_input_files(data) == expected
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_iter_file_records_skips_to_start(tmp_path, suffix):
+    path = tmp_path / f"data{suffix}"
+    records = [make_record(i) for i in range(1, 6)]
+    if suffix == ".json":
+        path.write_text(json.dumps(records), encoding="utf-8")
+    else:
+        path.write_text("\n\n".join(json.dumps(r) for r in records), encoding="utf-8")
+    ids = [r["circularId"] for r in indexer.iter_file_records(path, start=3)]
+    assert ids == [4, 5]
+
+
+# ── streamed JSON arrays ──────────────────────────────────────────────────────
+
+def stream_array(text, chunk_size):
+    return list(indexer.iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 4096])
+def test_iter_json_array_matches_json_loads(chunk_size):
+    values = [
+        make_record(1),
+        [],
+        {},
+        "quoted \"], [\" text",
+        -2.5e-10,
+        12345678901234567890,
+        1.5,
+        None,
+        True,
+        {"nested": [1, [2, {"deep": "é"}]]},
+    ]
+    for text in [json.dumps(values), json.dumps(values, indent=2) + "\n", "[]", " [ ] "]:
+        assert stream_array(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_iter_json_array_keeps_numbers_split_across_chunks(chunk_size):
+    text = "[1.5e+10, -0.25, 100, 7E-3]"
+    assert stream_array(text, chunk_size) == [1.5e10, -0.25, 100, 7e-3]
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ('{"circularId": 1}', "Expected a JSON array"),
+        ("", "Expected a JSON array"),
+        ("[1 2]", "Expected ',' or ']'"),
+        ("[1,]", "Expecting value"),
+        ("[1, 2", "Expected ',' or ']'"),
+        ("[1] [2]", "Extra data"),
+        ("[1.5e]", "Expected ',' or ']'"),
+    ],
+)
+def test_iter_json_array_rejects_malformed_input(text, message):
+    with pytest.raises(ValueError, match=message):
+        stream_array(text, 2)
+
+
+@pytest.fixture
+def stream_every_json_file(monkeypatch):
+    monkeypatch.setattr(indexer, "STREAM_JSON_MIN_SIZE", 0)
+    monkeypatch.setattr(indexer, "STREAM_CHUNK_SIZE", 16)
+
+
+def test_large_json_array_is_streamed(tmp_path, monkeypatch, stream_every_json_file):
+    path = tmp_path / "many.json"
+    path.write_text(json.dumps([make_record(i) for i in range(1, 6)]), encoding="utf-8")
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("json.load called on a streamed file")
+
+    monkeypatch.setattr(indexer.json, "load", fail_load)
+    assert [r["circularId"] for r in indexer.iter_file_records(path)] == [1, 2, 3, 4, 5]
+    assert [r["circularId"] for r in indexer.iter_file_records(path, start=3)] == [4, 5]
+
+
+def test_large_json_object_is_still_read(tmp_path, stream_every_json_file):
+    path = tmp_path / "one.json"
+    path.write_text("\n  " + json.dumps(make_record(7)), encoding="utf-8")
+    assert [r["circularId"] for r in indexer.iter_file_records(path)] == [7]
+
+
+def test_streamed_ingest_matches_loaded_ingest(tmp_path, monkeypatch):
+    path = tmp_path / "many.json"
+    path.write_text(
+        json.dumps([make_record(i, body=f"body {i}") for i in range(1, 40)], indent=1),
+        encoding="utf-8",
+    )
+    ingest_path(tmp_path / "loaded.db", path)
+
+    monkeypatch.setattr(indexer, "STREAM_JSON_MIN_SIZE", 0)
+    monkeypatch.setattr(indexer, "STREAM_CHUNK_SIZE", 5)
+    ingest_path(tmp_path / "streamed.db", path)
+
+    loaded = get_connection(tmp_path / "loaded.db")
+    streamed = get_connection(tmp_path / "streamed.db")
+    assert dump_index(streamed) == dump_index(loaded)
+    loaded.close()
+    streamed.close()
+
+
+# ── compressed inputs ─────────────────────────────────────────────────────────
+
+COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def write_compressed(path, text):
+    with COMPRESSORS[path.suffix](path, "wt", encoding="utf-8") as f:
+        f.write(text)
+
+
+def pack_archive(directory, archive_path):
+    """
+    Packs the files of directory into a tar or zip archive in ingest order,
+    under a subdirectory, with a stray non-record member first.
+    """
+    members = [("archive/README.txt", b"not records")] + [
+        (f"archive/{path.name}", path.read_bytes()) for path in indexer.iter_input_files(directory)
+    ]
+    if archive_path.suffix == ".zip":
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, data in members:
+                archive.writestr(name, data)
+        return
+
+    mode = {".tar": "w", ".tgz": "w:gz", ".gz": "w:gz", ".bz2": "w:bz2", ".xz": "w:xz"}[archive_path.suffix]
+    with tarfile.open(archive_path, mode) as archive:
+        directory_info = tarfile.TarInfo("archive")
+        directory_info.type = tarfile.DIRTYPE
+        archive.addfile(directory_info)
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+@pytest.mark.parametrize("compression", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_iter_compressed_file(tmp_path, suffix, compression):
+    path = tmp_path / f"data{suffix}{compression}"
+    records = [make_record(i) for i in range(1, 6)]
+    if suffix == ".json":
+        write_compressed(path, json.dumps(records))
+    else:
+        write_compressed(path, "\n".join(json.dumps(r) for r in records))
+    assert [r["circularId"] for r in iter_json_records(path)] == [1, 2, 3, 4, 5]
+    assert [r["circularId"] for r in indexer.iter_file_records(path, start=3)] == [4, 5]
+
+
+@pytest.mark.parametrize("compression", [".gz", ".bz2", ".xz"])
+def test_small_compressed_json_array_is_streamed(tmp_path, monkeypatch, compression):
+    # The compressed size says nothing about the text's, so even a small
+    # file takes the streaming path; a plain file that small does not.
+    streamed = []
+    original = indexer.iter_json_array
+
+    def recording(f, *args, **kwargs):
+        streamed.append(f)
+        return original(f, *args, **kwargs)
+
+    monkeypatch.setattr(indexer, "iter_json_array", recording)
+    records = [make_record(i) for i in range(1, 6)]
+    path = tmp_path / f"small.json{compression}"
+    write_compressed(path, json.dumps(records))
+    plain = tmp_path / "small.json"
+    plain.write_text(json.dumps(records), encoding="utf-8")
+
+    assert [r["circularId"] for r in indexer.iter_file_records(path)] == [1, 2, 3, 4, 5]
+    assert len(streamed) == 1
+    assert [r["circularId"] for r in indexer.iter_file_records(plain)] == [1, 2, 3, 4, 5]
+    assert len(streamed) == 1
+
+
+def test_iter_compressed_json_array_is_streamed(tmp_path, stream_every_json_file):
+    path = tmp_path / "many.json.gz"
+    write_compressed(path, json.dumps([make_record(i) for i in range(1, 6)]))
+    assert [r["circularId"] for r in indexer.iter_file_records(path, start=1)] == [2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("archive_name", ["dump.tar", "dump.tgz", "dump.tar.bz2", "dump.tar.xz", "dump.zip"])
+def test_iter_archive_members_in_order(tmp_path, archive_name):
+    records = write_split_archive(tmp_path / "files")
+    archive_path = tmp_path / archive_name
+    pack_archive(tmp_path / "files", archive_path)
+
+    ids = [r["circularId"] for r in iter_json_records(archive_path)]
+    assert ids == [r["circularId"] for r in records]
+    skipped = [r["circularId"] for r in indexer.iter_file_records(archive_path, start=4)]
+    assert skipped == ids[4:]
+
+
+def test_iter_archive_streams_large_json_member(tmp_path, stream_every_json_file):
+    (tmp_path / "files").mkdir()
+    (tmp_path / "files" / "all.json").write_text(
+        json.dumps([make_record(i) for i in range(1, 6)]), encoding="utf-8"
+    )
+    pack_archive(tmp_path / "files", tmp_path / "dump.tgz")
+    assert [r["circularId"] for r in iter_json_records(tmp_path / "dump.tgz")] == [1, 2, 3, 4, 5]
+
+
+def test_iter_input_files_lists_compressed_inputs_last(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    names = ["b.jsonl.gz", "a.tar.gz", "c.json", "d.jsonl", "e.zip", "f.json.xz", "g.gz", "h.tar.zst"]
+    for name in names:
+        (data / name).write_bytes(b"")
+    assert [path.name for path in iter_input_files(data)] == [
+        "c.json", "d.jsonl", "a.tar.gz", "b.jsonl.gz", "e.zip", "f.json.xz",
+    ]
+
+
+def test_iter_raises_for_unsupported_compressed_file(tmp_path):
+    path = tmp_path / "data.csv.gz"
+    write_compressed(path, "col1,col2\n1,2\n")
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        list(iter_json_records(path))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ingest_archive_matches_extracted_files(tmp_path, workers):
+    write_split_archive(tmp_path / "files")
+    pack_archive(tmp_path / "files", tmp_path / "dump.tar.gz")
+
+    ingest_path(tmp_path / "files.sqlite", tmp_path / "files")
+    ingest_path(tmp_path / "archive.sqlite", tmp_path / "dump.tar.gz", workers=workers)
+
+    extracted = get_connection(tmp_path / "files.sqlite")
+    archived = get_connection(tmp_path / "archive.sqlite")
+    assert dump_index(archived) == dump_index(extracted)
+    extracted.close()
+    archived.close()
+
+
+def test_ingest_skips_unchanged_archive(tmp_path, monkeypatch):
+    records = write_split_archive(tmp_path / "files")
+    pack_archive(tmp_path / "files", tmp_path / "dump.zip")
+    age_file(tmp_path / "dump.zip")
+    db_path = tmp_path / "test.sqlite"
+    assert ingest_path(db_path, tmp_path / "dump.zip") == len(records)
+
+    reads = count_file_reads(monkeypatch)
+    assert ingest_path(db_path, tmp_path / "dump.zip") == 0
+    assert reads == []
+
+
+def test_interrupted_compressed_ingest_resumes_from_checkpoint(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    path = tmp_path / "data.jsonl.gz"
+    write_compressed(path, "\n".join(json.dumps(make_record(i)) for i in range(1, 11)))
+
+    interrupt_after(monkeypatch, "upsert_circulars", 4)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_path(db_path, path, batch_size=2, commit_every=4)
+    assert circular_count(db_path) == 4
+    monkeypatch.undo()
+
+    assert ingest_path(db_path, path, batch_size=2, commit_every=4) == 6
+    assert circular_count(db_path) == 10
+
+
 # ── ingest_path ───────────────────────────────────────────────────────────────
 
 def test_ingest_returns_correct_count(tmp_path):
@@ -431,3 +960,843 @@ def test_ingest_creates_db_if_not_exists(tmp_path):
     assert not db_path.exists()
     ingest_path(db_path, json_path)
     assert db_path.exists()
+
+
+def test_ingest_bumps_generation_only_on_change(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+
+    def generation():
+        conn = get_connection(db_path)
+        try:
+            return get_generation(conn)
+        finally:
+            conn.close()
+
+    ingest_path(db_path, json_path)
+    assert generation() == 1
+
+    ingest_path(db_path, json_path)
+    assert generation() == 1
+
+    json_path.write_text(json.dumps(make_record(subject="GRB 260120B: revised")), encoding="utf-8")
+    ingest_path(db_path, json_path)
+    assert generation() == 2
+
+
+def test_upsert_circular_reports_whether_it_wrote(tmp_path):
+    conn = fresh_db(tmp_path)
+    try:
+        assert upsert_circular(conn, make_record()) is True
+        assert upsert_circular(conn, make_record()) is False
+        assert upsert_circular(conn, make_record(body="Changed body.")) is True
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 1000])
+def test_ingest_same_result_for_any_batch_size(tmp_path, batch_size):
+    records = [make_record(i, subject=f"GRB 260120B: analysis part {i}") for i in range(1, 8)]
+    records.append(make_record(3, subject="GRB 260120B: analysis part 3, revised"))
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+
+    reference = get_connection(tmp_path / "reference.sqlite")
+    with reference:
+        for record in records:
+            upsert_circular(reference, record)
+
+    db_path = tmp_path / f"batch{batch_size}.sqlite"
+    assert ingest_path(db_path, json_path, batch_size=batch_size) == len(records)
+    conn = get_connection(db_path)
+    assert dump_index(conn) == dump_index(reference)
+    conn.close()
+    reference.close()
+
+
+def test_ingest_rejects_invalid_batch_size(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    with pytest.raises(ValueError, match="batch_size"):
+        ingest_path(tmp_path / "test.sqlite", json_path, batch_size=0)
+
+
+# ── source file manifest ──────────────────────────────────────────────────────
+
+def age_file(path, seconds=3600):
+    """
+    Backdates path's mtime so its manifest entry is outside the racy window.
+    """
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def count_file_reads(monkeypatch):
+    reads = []
+    original = indexer.iter_file_records
+
+    def counting(path):
+        reads.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(indexer, "iter_file_records", counting)
+    return reads
+
+
+def test_content_hash_reads_in_blocks(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    data = json.dumps([make_record(i) for i in range(1, 50)]).encode("utf-8")
+    path.write_bytes(data)
+    whole = content_hash(path)
+    monkeypatch.setattr(indexer, "HASH_BLOCK_SIZE", 7)
+    assert content_hash(path) == whole
+    assert whole == hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def test_manifest_skips_unchanged_file_without_reading_it(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    age_file(json_path)
+    assert ingest_path(db_path, json_path) == 2
+
+    def fail_hash(data):
+        raise AssertionError("unchanged file was read")
+
+    monkeypatch.setattr(indexer, "content_hash", fail_hash)
+    assert ingest_path(db_path, json_path) == 0
+
+
+def test_manifest_records_source_file(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    ingest_path(db_path, json_path)
+    conn = get_connection(db_path)
+    row = conn.execute("SELECT path, size, mtime_ns FROM source_files").fetchone()
+    conn.close()
+    assert tuple(row) == (str(json_path.resolve()), json_path.stat().st_size, json_path.stat().st_mtime_ns)
+
+
+def test_manifest_skips_touched_file_with_same_content(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    age_file(json_path)
+    ingest_path(db_path, json_path)
+
+    os.utime(json_path)
+    reads = count_file_reads(monkeypatch)
+    assert ingest_path(db_path, json_path) == 0
+    assert reads == []
+
+
+def test_manifest_rereads_same_size_rewrite_in_racy_window(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record(subject="GRB 260120B: first")), encoding="utf-8")
+    stat = json_path.stat()
+    ingest_path(db_path, json_path)
+
+    json_path.write_text(json.dumps(make_record(subject="GRB 260120B: other")), encoding="utf-8")
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert ingest_path(db_path, json_path) == 1
+    conn = get_connection(db_path)
+    assert conn.execute("SELECT subject FROM circulars").fetchone()[0] == "GRB 260120B: other"
+    conn.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_manifest_reads_only_new_files(tmp_path, monkeypatch, workers):
+    db_path = tmp_path / "test.sqlite"
+    data = tmp_path / "data"
+    data.mkdir()
+    for cid in [1, 2, 3]:
+        (data / f"{cid}.json").write_text(json.dumps(make_record(cid)), encoding="utf-8")
+        age_file(data / f"{cid}.json")
+    assert ingest_path(db_path, data, workers=workers) == 3
+
+    (data / "4.json").write_text(json.dumps(make_record(4)), encoding="utf-8")
+    assert ingest_path(db_path, data, workers=workers) == 1
+    conn = get_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM circulars").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM source_files").fetchone()[0] == 4
+    conn.close()
+
+
+def test_manifest_force_rereads_every_file(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    age_file(json_path)
+    ingest_path(db_path, json_path)
+    assert ingest_path(db_path, json_path) == 0
+    assert ingest_path(db_path, json_path, force=True) == 2
+
+
+# ── chunked commits and resume ────────────────────────────────────────────────
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records), encoding="utf-8")
+
+
+def interrupt_after(monkeypatch, name, calls):
+    """
+    Makes indexer.<name> raise on its calls-th call, like a crash mid-ingest.
+    """
+    original = getattr(indexer, name)
+    seen = []
+
+    def failing(*args, **kwargs):
+        seen.append(1)
+        if len(seen) == calls:
+            raise KeyboardInterrupt
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(indexer, name, failing)
+
+
+def circular_count(db_path):
+    conn = get_connection(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM circulars").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_ingest_bumps_generation_per_chunk(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    write_jsonl(tmp_path / "data.jsonl", [make_record(i) for i in range(1, 7)])
+    ingest_path(db_path, tmp_path / "data.jsonl", batch_size=2, commit_every=2)
+    conn = get_connection(db_path)
+    assert get_generation(conn) == 3
+    assert conn.execute("SELECT COUNT(*) FROM ingest_checkpoints").fetchone()[0] == 0
+    conn.close()
+
+
+@pytest.mark.parametrize("workers, writer", [(1, "upsert_circulars"), (2, "write_prepared")])
+def test_interrupted_ingest_resumes_from_checkpoint(tmp_path, monkeypatch, workers, writer):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.jsonl"
+    write_jsonl(json_path, [make_record(i) for i in range(1, 11)])
+
+    interrupt_after(monkeypatch, writer, 4)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_path(db_path, json_path, batch_size=2, commit_every=4, workers=workers)
+    assert circular_count(db_path) == 4
+    monkeypatch.undo()
+
+    reads = []
+    original = indexer.iter_file_records
+    monkeypatch.setattr(
+        indexer, "iter_file_records",
+        lambda path, start=0: reads.append(start) or original(path, start),
+    )
+    assert ingest_path(db_path, json_path, batch_size=2, commit_every=4) == 6
+    assert reads == [4]
+    assert circular_count(db_path) == 10
+
+
+def test_checkpoint_ignored_when_file_changes(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.jsonl"
+    write_jsonl(json_path, [make_record(i) for i in range(1, 11)])
+
+    interrupt_after(monkeypatch, "upsert_circulars", 4)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_path(db_path, json_path, batch_size=2, commit_every=4)
+    monkeypatch.undo()
+
+    write_jsonl(json_path, [make_record(i) for i in range(1, 12)])
+    assert ingest_path(db_path, json_path, batch_size=2, commit_every=4) == 11
+    assert circular_count(db_path) == 11
+
+
+def test_interrupted_directory_ingest_skips_finished_files(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.sqlite"
+    data = tmp_path / "data"
+    data.mkdir()
+    for cid in range(1, 7):
+        (data / f"{cid}.json").write_text(json.dumps(make_record(cid)), encoding="utf-8")
+
+    interrupt_after(monkeypatch, "upsert_circulars", 3)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_path(db_path, data, batch_size=2, commit_every=2)
+    assert circular_count(db_path) == 4
+    monkeypatch.undo()
+
+    assert ingest_path(db_path, data, batch_size=2, commit_every=2) == 2
+    assert circular_count(db_path) == 6
+
+
+def test_ingest_rejects_invalid_commit_every(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    with pytest.raises(ValueError, match="commit_every"):
+        ingest_path(tmp_path / "test.sqlite", json_path, commit_every=0)
+
+
+# ── bulk_load ─────────────────────────────────────────────────────────────────
+
+def schema_objects(conn):
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+    ).fetchall()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_load_matches_ingest_path(tmp_path, workers):
+    write_split_archive(tmp_path / "archive")
+    ingest_path(tmp_path / "ingest.sqlite", tmp_path / "archive", batch_size=4)
+    assert bulk_load(tmp_path / "bulk.sqlite", tmp_path / "archive", batch_size=4, workers=workers) == 17
+
+    ingested = get_connection(tmp_path / "ingest.sqlite")
+    bulk = get_connection(tmp_path / "bulk.sqlite")
+    assert dump_index(bulk) == dump_index(ingested)
+    assert [tuple(r) for r in schema_objects(bulk)] == [tuple(r) for r in schema_objects(ingested)]
+    assert bulk.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    ingested.close()
+    bulk.close()
+
+
+def test_bulk_loaded_index_keeps_fts_in_sync(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    db_path = tmp_path / "test.sqlite"
+    bulk_load(db_path, json_path)
+
+    conn = get_connection(db_path)
+    with conn:
+        upsert_circular(conn, make_record(body="Neutrino counterpart search."))
+    assert conn.execute(
+        "SELECT COUNT(*) FROM circulars_fts WHERE circulars_fts MATCH 'neutrino'"
+    ).fetchone()[0] == 1
+    conn.close()
+
+
+def test_bulk_load_replaces_index_and_continues_generation(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    old_path = tmp_path / "old.json"
+    old_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    ingest_path(db_path, old_path)
+
+    new_path = tmp_path / "new.json"
+    new_path.write_text(json.dumps([make_record(3)]), encoding="utf-8")
+    bulk_load(db_path, new_path)
+
+    conn = get_connection(db_path)
+    ids = [r[0] for r in conn.execute("SELECT circular_id_raw FROM circulars")]
+    assert ids == ["3"]
+    assert get_generation(conn) == 2
+    conn.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.json", "old.json", "test.sqlite"]
+
+
+def test_bulk_load_keeps_fetch_state(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute("INSERT INTO fetch_state VALUES (7, 200, '\"abc\"', NULL, 1700000000)")
+    conn.close()
+
+    data = tmp_path / "data.json"
+    data.write_text(json.dumps([make_record(7)]), encoding="utf-8")
+    bulk_load(db_path, data)
+
+    conn = get_connection(db_path)
+    assert [tuple(r) for r in conn.execute("SELECT * FROM fetch_state")] == [
+        (7, 200, '"abc"', None, 1700000000)
+    ]
+    conn.close()
+
+
+def test_failed_bulk_load_keeps_old_index(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps(make_record(1)), encoding="utf-8")
+    ingest_path(db_path, good)
+
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps([make_record(2), {"subject": "no id"}]), encoding="utf-8")
+    with pytest.raises(ValueError, match="circularId"):
+        bulk_load(db_path, bad)
+
+    conn = get_connection(db_path)
+    assert [r[0] for r in conn.execute("SELECT circular_id_raw FROM circulars")] == ["1"]
+    conn.close()
+    assert not list(tmp_path.glob("*.bulk-*"))
+
+
+# ── parallel ingest ───────────────────────────────────────────────────────────
+
+def write_split_archive(directory):
+    """
+    Writes records over several .json and .jsonl files with IDs repeated
+    across files, and returns them in ingest order.
+    """
+    directory.mkdir()
+    ordered = []
+    for n in range(5):
+        records = [make_record(n * 3 + i, subject=f"GRB 2601{n}0A: part {i}") for i in range(1, 4)]
+        (directory / f"part{n}.json").write_text(json.dumps(records), encoding="utf-8")
+        ordered.extend(records)
+    revised = [make_record(2, subject="GRB 260100A: part 2, revised"), make_record(99)]
+    (directory / "late.jsonl").write_text(
+        "\n".join(json.dumps(record) for record in revised), encoding="utf-8"
+    )
+    return ordered + revised
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_ingest_matches_serial(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(indexer, "FILES_PER_TASK", 2)
+    records = write_split_archive(tmp_path / "archive")
+
+    serial_db = tmp_path / "serial.sqlite"
+    parallel_db = tmp_path / "parallel.sqlite"
+    assert ingest_path(serial_db, tmp_path / "archive", batch_size=4) == len(records)
+    assert ingest_path(parallel_db, tmp_path / "archive", batch_size=4, workers=workers) == len(records)
+
+    serial = get_connection(serial_db)
+    parallel = get_connection(parallel_db)
+    assert dump_index(parallel) == dump_index(serial)
+    subject = parallel.execute(
+        "SELECT subject FROM circulars WHERE circular_id_raw = '2'"
+    ).fetchone()[0]
+    assert subject == "GRB 260100A: part 2, revised"
+    serial.close()
+    parallel.close()
+
+
+def test_parallel_reingest_leaves_generation_alone(tmp_path):
+    write_split_archive(tmp_path / "archive")
+    db_path = tmp_path / "test.sqlite"
+    ingest_path(db_path, tmp_path / "archive", workers=2)
+    conn = get_connection(db_path)
+    generation = get_generation(conn)
+    conn.close()
+
+    ingest_path(db_path, tmp_path / "archive", workers=2)
+    conn = get_connection(db_path)
+    assert get_generation(conn) == generation
+    conn.close()
+
+
+def test_write_prepared_last_duplicate_wins(tmp_path):
+    conn = get_connection(tmp_path / "test.sqlite")
+    prepared = [
+        prepare_record(make_record(1, subject="GRB 260120B: first")),
+        prepare_record(make_record(1, subject="GRB 260120B: second")),
+    ]
+    assert write_prepared(conn, prepared) == 1
+    assert write_prepared(conn, prepared) == 0
+    subject = conn.execute("SELECT subject FROM circulars").fetchone()[0]
+    assert subject == "GRB 260120B: second"
+    conn.close()
+
+
+def test_ingest_rejects_invalid_workers(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    with pytest.raises(ValueError, match="workers"):
+        ingest_path(tmp_path / "test.sqlite", json_path, workers=0)
+
+
+# ── watch mode ────────────────────────────────────────────────────────────────
+
+inotify_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+
+def collect_changes(watcher, timeout=5.0):
+    """
+    Changes reported by watcher until some arrive or timeout passes.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        changed = watcher.changes(0.05)
+        if changed or changed is None:
+            return changed
+    return set()
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def watching(tmp_path, quick_settle):
+    """
+    Runs watch_path over tmp_path/data in a thread until the test ends.
+    """
+    data = tmp_path / "data"
+    data.mkdir(exist_ok=True)
+    db_path = tmp_path / "test.sqlite"
+    stop = threading.Event()
+    messages = []
+    threads = []
+
+    def start(backend="auto", **options):
+        options.setdefault("debounce", 0.05)
+        options.setdefault("poll_interval", 0.05)
+        thread = threading.Thread(
+            target=indexer.watch_path,
+            args=(db_path, data),
+            kwargs={"backend": backend, "report": messages.append, "stop": stop, **options},
+        )
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: messages)
+        return db_path, messages
+
+    yield start
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+
+@inotify_only
+def test_inotify_watcher_reports_closed_files(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    watcher = indexer.InotifyWatcher(data)
+    try:
+        with open(data / "1.json", "w", encoding="utf-8") as f:
+            f.write(json.dumps(make_record(1)))
+            f.flush()
+            assert watcher.changes(0.1) == set()
+        assert collect_changes(watcher) == {str(data / "1.json")}
+
+        (data / "notes.txt").write_text("ignored by ingest, but reported", encoding="utf-8")
+        (data / "sub").mkdir()
+        (data / "sub" / "2.jsonl").write_text(json.dumps(make_record(2)), encoding="utf-8")
+        changed = collect_changes(watcher)
+        changed |= watcher.changes(0.2)
+        assert str(data / "sub" / "2.jsonl") in changed
+    finally:
+        watcher.close()
+
+
+@inotify_only
+def test_inotify_watcher_reports_moved_in_files(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    staged = tmp_path / "staged.json"
+    staged.write_text(json.dumps(make_record(1)), encoding="utf-8")
+    watcher = indexer.InotifyWatcher(data)
+    try:
+        os.replace(staged, data / "1.json")
+        assert collect_changes(watcher) == {str(data / "1.json")}
+    finally:
+        watcher.close()
+
+
+@inotify_only
+def test_inotify_watcher_on_one_file_ignores_its_neighbours(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text("", encoding="utf-8")
+    watcher = indexer.InotifyWatcher(path)
+    try:
+        (tmp_path / "other.jsonl").write_text("", encoding="utf-8")
+        write_jsonl(path, [make_record(1)])
+        assert collect_changes(watcher) == {str(path)}
+    finally:
+        watcher.close()
+
+
+def replace_file(path, text):
+    """
+    Rewrites path atomically, as exports usually do: a new file renamed over it.
+    """
+    staged = path.with_name(path.name + ".tmp")
+    staged.write_text(text, encoding="utf-8")
+    os.replace(staged, path)
+
+
+@pytest.fixture
+def quick_settle(monkeypatch):
+    monkeypatch.setattr(indexer, "WATCH_SETTLE", 0.1)
+
+
+def test_polling_watcher_reports_files_once_settled(tmp_path, quick_settle):
+    data = tmp_path / "data"
+    (data / "sub").mkdir(parents=True)
+    (data / "old.json").write_text(json.dumps(make_record(1)), encoding="utf-8")
+    watcher = indexer.PollingWatcher(data, interval=0.01)
+
+    (data / "new.json").write_text(json.dumps(make_record(2)), encoding="utf-8")
+    (data / "notes.txt").write_text("not an input file", encoding="utf-8")
+    assert watcher.changes(1.0) == set()
+    assert collect_changes(watcher) == {str(data / "new.json")}
+
+    replace_file(data / "old.json", json.dumps(make_record(1, subject="revised")))
+    (data / "sub" / "deeper").mkdir()
+    (data / "sub" / "deeper" / "3.jsonl").write_text(json.dumps(make_record(3)), encoding="utf-8")
+    changed = collect_changes(watcher)
+    changed |= collect_changes(watcher, timeout=0.5)
+    assert changed == {str(data / "old.json"), str(data / "sub" / "deeper" / "3.jsonl")}
+
+
+def test_polling_watcher_finds_in_place_rewrites_on_full_scan(tmp_path, quick_settle):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(make_record(1)), encoding="utf-8")
+    age_file(path)
+    watcher = indexer.PollingWatcher(tmp_path, interval=0.01, full_scan_interval=0.5)
+
+    with open(path, "r+", encoding="utf-8") as f:
+        f.write(json.dumps(make_record(2)))
+    assert watcher.changes(0.1) == set()
+    assert collect_changes(watcher) == {str(path)}
+
+
+def test_polling_watcher_on_one_file_ignores_its_neighbours(tmp_path, quick_settle):
+    path = tmp_path / "data.jsonl"
+    path.write_text("", encoding="utf-8")
+    watcher = indexer.PollingWatcher(path, interval=0.01)
+    (tmp_path / "other.jsonl").write_text("", encoding="utf-8")
+    replace_file(path, json.dumps(make_record(1)))
+    assert collect_changes(watcher) == {str(path)}
+
+
+def test_polling_watcher_waits_no_longer_than_timeout(tmp_path):
+    watcher = indexer.PollingWatcher(tmp_path, interval=60)
+    start = time.monotonic()
+    assert watcher.changes(0.01) == set()
+    assert time.monotonic() - start < 1
+
+
+def test_open_watcher_picks_backend(tmp_path, monkeypatch):
+    assert isinstance(indexer.open_watcher(tmp_path, backend="poll"), indexer.PollingWatcher)
+    with pytest.raises(ValueError, match="backend"):
+        indexer.open_watcher(tmp_path, backend="kqueue")
+
+    def no_inotify(path):
+        raise OSError("inotify is only available on Linux")
+
+    monkeypatch.setattr(indexer, "InotifyWatcher", no_inotify)
+    assert isinstance(indexer.open_watcher(tmp_path), indexer.PollingWatcher)
+    with pytest.raises(OSError):
+        indexer.open_watcher(tmp_path, backend="inotify")
+
+
+@pytest.mark.parametrize("backend", [
+    pytest.param("inotify", marks=inotify_only),
+    "poll",
+])
+def test_watch_ingests_new_and_changed_files(tmp_path, watching, backend):
+    write_jsonl(tmp_path / "data" / "existing.jsonl", [make_record(1), make_record(2)])
+    db_path, messages = watching(backend)
+    assert circular_count(db_path) == 2
+
+    (tmp_path / "data" / "sub").mkdir()
+    (tmp_path / "data" / "sub" / "3.json").write_text(json.dumps(make_record(3)), encoding="utf-8")
+    wait_for(lambda: circular_count(db_path) == 3)
+
+    replace_file(
+        tmp_path / "data" / "existing.jsonl",
+        "\n".join(json.dumps(record) for record in [make_record(1), make_record(2, subject="revised")]),
+    )
+    conn = get_connection(db_path)
+    wait_for(lambda: conn.execute(
+        "SELECT subject FROM circulars WHERE circular_id_raw = '2'"
+    ).fetchone()[0] == "revised")
+    assert conn.execute("SELECT COUNT(*) FROM source_files").fetchone()[0] == 2
+    conn.close()
+
+
+def test_watch_skips_unreadable_file_and_keeps_going(tmp_path, watching):
+    db_path, messages = watching("poll")
+    (tmp_path / "data" / "bad.json").write_text("{not json", encoding="utf-8")
+    (tmp_path / "data" / "good.json").write_text(json.dumps(make_record(5)), encoding="utf-8")
+    wait_for(lambda: circular_count(db_path) == 1)
+    wait_for(lambda: any(message.startswith("Skipped") for message in messages))
+    assert any("bad.json" in message for message in messages if message.startswith("Skipped"))
+
+    replace_file(tmp_path / "data" / "bad.json", json.dumps(make_record(6)))
+    wait_for(lambda: circular_count(db_path) == 2)
+
+
+class ScriptedWatcher:
+    """
+    Stands in for a watcher, returning queued results then nothing.
+    """
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    def changes(self, timeout):
+        if self.results:
+            return self.results.pop(0)
+        time.sleep(0.01)
+        return set()
+
+    def close(self):
+        pass
+
+
+def run_watch(tmp_path, monkeypatch, results, **options):
+    watcher = ScriptedWatcher(results)
+    monkeypatch.setattr(indexer, "open_watcher", lambda *args: watcher)
+    batches = []
+    original = indexer.ingest_changed_paths
+    monkeypatch.setattr(
+        indexer, "ingest_changed_paths",
+        lambda conn, paths, *args: batches.append(sorted(paths)) or original(conn, paths, *args),
+    )
+
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=indexer.watch_path,
+        args=(tmp_path / "test.sqlite", tmp_path / "data"),
+        kwargs={"stop": stop, **options},
+    )
+    thread.start()
+    wait_for(lambda: not watcher.results and (batches or not results))
+    time.sleep(0.1)
+    stop.set()
+    thread.join(timeout=10)
+    return batches
+
+
+def test_watch_debounces_changes_into_one_batch(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    paths = [str(data / f"{i}.json") for i in range(3)]
+    batches = run_watch(
+        tmp_path, monkeypatch, [{paths[0]}, set(), {paths[1]}, {paths[2]}], debounce=0.3
+    )
+    assert batches == [paths]
+
+
+def test_watch_rescans_tree_when_changes_are_lost(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "1.json").write_text(json.dumps(make_record(1)), encoding="utf-8")
+    age_file(data / "1.json")
+    batches = run_watch(tmp_path, monkeypatch, [None], debounce=0)
+    assert batches == [[str(data / "1.json")]]
+    assert circular_count(tmp_path / "test.sqlite") == 1
+
+
+def test_watch_rejects_invalid_options(tmp_path):
+    with pytest.raises(ValueError):
+        indexer.watch_path(tmp_path / "test.sqlite", tmp_path, debounce=-1)
+    with pytest.raises(ValueError):
+        indexer.watch_path(tmp_path / "test.sqlite", tmp_path, poll_interval=0)
+
+
+# ── command line ──────────────────────────────────────────────────────────────
+
+def test_cli_ingest_populates_database(tmp_path, capsys):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    assert main(["ingest", str(db_path), str(json_path)]) == 0
+    assert "Ingested 2 records" in capsys.readouterr().out
+    conn = get_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM circulars").fetchone()[0] == 2
+    conn.close()
+
+
+def test_cli_ingest_accepts_batch_size(tmp_path, capsys):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(i) for i in range(1, 6)]), encoding="utf-8")
+    assert main(["ingest", str(db_path), str(json_path), "--batch-size", "2"]) == 0
+    assert "Ingested 5 records" in capsys.readouterr().out
+
+
+def test_cli_ingest_rejects_zero_batch_size(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main(["ingest", str(tmp_path / "test.sqlite"), str(json_path), "--batch-size", "0"])
+
+
+def test_cli_ingest_accepts_workers(tmp_path, capsys):
+    write_split_archive(tmp_path / "archive")
+    db_path = tmp_path / "test.sqlite"
+    assert main(["ingest", str(db_path), str(tmp_path / "archive"), "--workers", "2"]) == 0
+    assert "Ingested 17 records" in capsys.readouterr().out
+
+
+def test_cli_ingest_rejects_zero_workers(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps(make_record()), encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main(["ingest", str(tmp_path / "test.sqlite"), str(json_path), "--workers", "0"])
+
+
+def test_cli_ingest_force_rereads_files(tmp_path, capsys):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    main(["ingest", str(db_path), str(json_path)])
+    main(["ingest", str(db_path), str(json_path)])
+    assert "Ingested 0 records" in capsys.readouterr().out
+    main(["ingest", str(db_path), str(json_path), "--force"])
+    assert "Ingested 2 records" in capsys.readouterr().out
+
+
+def test_cli_ingest_accepts_commit_every(tmp_path, capsys):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(i) for i in range(1, 6)]), encoding="utf-8")
+    assert main(["ingest", str(db_path), str(json_path), "--commit-every", "2"]) == 0
+    assert "Ingested 5 records" in capsys.readouterr().out
+    conn = get_connection(db_path)
+    assert get_generation(conn) == 3
+    conn.close()
+
+
+def test_cli_ingest_bulk_rebuilds_index(tmp_path, capsys):
+    db_path = tmp_path / "test.sqlite"
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps([make_record(1), make_record(2)]), encoding="utf-8")
+    main(["ingest", str(db_path), str(json_path)])
+    assert main(["ingest", str(db_path), str(json_path), "--bulk"]) == 0
+    assert "Ingested 2 records" in capsys.readouterr().out.splitlines()[-1]
+
+
+def test_cli_ingest_watch_runs_until_interrupted(tmp_path, monkeypatch, capsys):
+    calls = []
+
+    def fake_watch_path(*args, **kwargs):
+        calls.append((args, kwargs))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(indexer, "watch_path", fake_watch_path)
+    argv = ["ingest", str(tmp_path / "test.sqlite"), str(tmp_path), "--watch", "--debounce", "0.5"]
+    assert main(argv) == 0
+    assert calls[0][1]["debounce"] == 0.5
+    assert calls[0][1]["poll_interval"] == indexer.WATCH_POLL_INTERVAL
+    assert "Stopped watching" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("flags", [["--watch", "--bulk"], ["--watch", "--force"], ["--debounce", "-1"]])
+def test_cli_ingest_rejects_invalid_watch_options(tmp_path, flags):
+    with pytest.raises(SystemExit):
+        main(["ingest", str(tmp_path / "test.sqlite"), str(tmp_path), *flags])
+
+
+def test_cli_rebuild_fts_restores_matches(tmp_path):
+    db_path = tmp_path / "test.sqlite"
+    conn = get_connection(db_path)
+    upsert_circular(conn, make_record())
+    conn.execute("INSERT INTO circulars_fts(circulars_fts) VALUES ('delete-all')")
+    conn.commit()
+    conn.close()
+
+    assert main(["rebuild-fts", str(db_path)]) == 0
+
+    conn = get_connection(db_path)
+    rows = conn.execute(
+        "SELECT rowid FROM circulars_fts WHERE circulars_fts MATCH ?", ("refined",)
+    ).fetchall()
+    conn.close()
+    assert len(rows) == 1
@@ -13,12 +13,21 @@ Covers:
   - fetch_gcn_circulars with real data dir → ok: true, result is a list
   - check_for_grb_regex on a GRB circular → ok: true, is_grb true
   - check_for_grb_regex out-of-range → ok: true, error in result
+  - --serve mode: several requests per process, ids echoed, bad lines answered
+      without killing the worker
+  - serve_async with a stubbed slow tool: quick requests overtake slow ones,
+      concurrency limit, queue-depth rejection, handler exceptions
 """
 
+import asyncio
+import importlib.util
+import io
 import json
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
 
 import pytest
@@ -27,6 +36,17 @@ BRIDGE_SCRIPT = Path(__file__).resolve().parent.parent / "leanmcp_bridge" / "py_
 PYTHON_BIN = sys.executable
 
 
+def load_bridge_module():
+    """Import py_bridge.py in-process so serve_async can be driven with stub handlers."""
+    spec = importlib.util.spec_from_file_location("py_bridge", BRIDGE_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+py_bridge = load_bridge_module()
+
+
 def call_bridge(payload: str | None) -> dict:
     """Run py_bridge.py with the given stdin payload and return the parsed JSON output."""
     proc = subprocess.run(
@@ -40,6 +60,19 @@ def call_bridge(payload: str | None) -> dict:
     return json.loads(proc.stdout.strip())
 
 
+def call_serve(lines: list[str]) -> list[dict]:
+    """Feed newline-delimited requests to `py_bridge.py --serve` and return every response."""
+    proc = subprocess.run(
+        [PYTHON_BIN, str(BRIDGE_SCRIPT), "--serve"],
+        input="".join(line + "\n" for line in lines),
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert proc.returncode == 0, f"Stderr: {proc.stderr}"
+    return [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+
+
 def make_payload(tool: str, arguments: dict | None = None) -> str:
     return json.dumps({"tool": tool, "arguments": arguments or {}})
 
@@ -216,3 +249,136 @@ def test_missing_arguments_field_defaults_to_empty():
     payload_str = json.dumps({"tool": "ping_python"})
     result = call_bridge(payload_str)
     assert result["ok"] is True
+
+
+# ── --serve mode ──────────────────────────────────────────────────────────────
+
+def make_request(request_id, tool: str, arguments: dict | None = None) -> str:
+    return json.dumps({"id": request_id, "tool": tool, "arguments": arguments or {}})
+
+
+def test_serve_answers_every_request_in_one_process():
+    responses = call_serve([make_request(i, "ping_python") for i in range(1, 4)])
+    assert sorted(r["id"] for r in responses) == [1, 2, 3]
+    assert all(r["ok"] is True for r in responses)
+    inner = json.loads(responses[0]["result"][0]["text"])
+    assert inner["message"] == "pong from python"
+
+
+def test_serve_echoes_string_ids():
+    responses = call_serve([make_request("req-a", "ping_python")])
+    assert responses[0]["id"] == "req-a"
+
+
+def test_serve_invalid_json_line_does_not_stop_worker():
+    responses = call_serve(["not json", make_request(7, "ping_python")])
+    assert len(responses) == 2
+    assert responses[0]["ok"] is False
+    assert responses[0]["id"] is None
+    assert "Invalid JSON" in responses[0]["error"]
+    assert responses[1]["id"] == 7
+    assert responses[1]["ok"] is True
+
+
+def test_serve_missing_tool_returns_error_with_id():
+    responses = call_serve([json.dumps({"id": 3, "arguments": {}})])
+    assert responses[0]["id"] == 3
+    assert responses[0]["ok"] is False
+    assert "tool" in responses[0]["error"]
+
+
+def test_serve_skips_blank_lines():
+    responses = call_serve(["", make_request(1, "ping_python"), "   "])
+    assert len(responses) == 1
+
+
+def test_serve_runs_tools_against_real_files(tmp_path):
+    data_dir = make_data_dir_with_records(tmp_path)
+    responses = call_serve([
+        make_request(1, "check_for_grb_regex", {"data_dir": str(data_dir), "index": 0}),
+        make_request(2, "check_for_grb_regex", {"data_dir": str(data_dir), "index": 1}),
+    ])
+    by_id = {r["id"]: r for r in responses}
+    first = json.loads(by_id[1]["result"][0]["text"])
+    second = json.loads(by_id[2]["result"][0]["text"])
+    assert first["is_grb"] is True
+    assert second["is_grb"] is False
+
+
+# ── serve_async with stubbed tools ────────────────────────────────────────────
+
+def run_serve(lines: list[str], handler, **kwargs) -> list[dict]:
+    input_stream = io.StringIO("".join(line + "\n" for line in lines))
+    output_stream = io.StringIO()
+    code = asyncio.run(py_bridge.serve_async(input_stream, output_stream, handler=handler, **kwargs))
+    assert code == 0
+    return [json.loads(line) for line in output_stream.getvalue().splitlines()]
+
+
+async def stub_handler(payload):
+    """Pretend tool: 'slow' blocks its thread like an Ollama call, others return at once."""
+    if payload["tool"] == "slow":
+        time.sleep(0.3)
+    return {"ok": True, "result": [{"type": "text", "text": payload["tool"]}]}
+
+
+def test_serve_quick_requests_overtake_slow_one():
+    responses = run_serve(
+        [make_request(1, "slow"), make_request(2, "fast"), make_request(3, "fast")],
+        stub_handler,
+        concurrency=2,
+    )
+    assert [r["id"] for r in responses] == [2, 3, 1]
+    assert all(r["ok"] for r in responses)
+
+
+def test_serve_respects_concurrency_limit():
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    async def counting_handler(payload):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return {"ok": True, "result": []}
+
+    responses = run_serve([make_request(i, "t") for i in range(8)], counting_handler, concurrency=3)
+    assert len(responses) == 8
+    assert peak == 3
+
+
+def test_serve_rejects_requests_beyond_max_pending():
+    responses = run_serve(
+        [make_request(i, "slow") for i in range(3)],
+        stub_handler,
+        concurrency=1,
+        max_pending=2,
+    )
+    by_id = {r["id"]: r for r in responses}
+    assert by_id[0]["ok"] and by_id[1]["ok"]
+    assert by_id[2]["ok"] is False
+    assert "queue is full" in by_id[2]["error"]
+
+
+def test_serve_handler_exception_becomes_error_response():
+    async def broken_handler(payload):
+        raise RuntimeError("tool exploded")
+
+    responses = run_serve([make_request(5, "boom")], broken_handler)
+    assert responses == [{"id": 5, "ok": False, "error": "tool exploded"}]
+
+
+def test_serve_cli_rejects_zero_concurrency():
+    proc = subprocess.run(
+        [PYTHON_BIN, str(BRIDGE_SCRIPT), "--serve", "--concurrency", "0"],
+        input="",
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert proc.returncode != 0
@@ -3,13 +3,25 @@ tests/test_search.py — tests for src/search.py
 
 Covers:
   - parse_fts_terms: stopword filtering, AND-joining, single-char filtering,
-      empty input, query with only stopwords
+      empty input, query with only stopwords, quoting of hyphenated/decimal terms
   - remove_event_from_query: event with space, without space, None event,
       case-insensitivity, preserves other terms
   - row_to_result: correct key mapping from sqlite.Row
   - search_circulars: keyword-only, event-only, keyword+event, event inference
-      from query string, limit enforcement, score ranking (3/2/1),
-      recency ordering within same score, empty results
+      from query string, correctness after re-ingest, limit enforcement, score ranking (3/2/1),
+      recency ordering within same score, empty results, bm25 relevance with
+      configurable subject/body weights, sort="date", invalid sort, secondary
+      event matches produced once with score 2
+  - search_circulars_page: keyset cursors walk every search shape page by page
+      in the same order as one large search, tied and undated rows are neither
+      skipped nor repeated, foreign or malformed cursors are rejected, limits
+      below 1 are rejected
+  - result cache: repeated and equivalent searches hit, re-ingest with
+      changes invalidates, returned pages are copies, cursor pages cached
+      separately, size 0 disables caching
+  - build_search_query: EXPLAIN QUERY PLAN has no DISTINCT temp B-tree, event
+      filters use their indexes, keyword top-k is picked before snippets,
+      listing pages after a cursor seek idx_circulars_created_on
   - get_event_circulars: filters by event, returns correct cluster
   - get_circular: fetches by integer ID, returns None for missing ID
 """
@@ -18,16 +30,21 @@ import json
 
 import pytest
 
+import search
+from cache import LRUCache
+
 from src.db import get_connection
 from src.indexer import ingest_path
 
 # search.py uses bare imports — conftest.py inserts src/ into sys.path
 from search import (
+    build_search_query,
     get_circular,
     get_event_circulars,
     parse_fts_terms,
     remove_event_from_query,
     search_circulars,
+    search_circulars_page,
 )
 
 
@@ -128,6 +145,14 @@ def test_parse_fts_terms_single_valid_term():
     assert parse_fts_terms("redshift") == "redshift"
 
 
+def test_parse_fts_terms_quotes_hyphenated_terms():
+    assert parse_fts_terms("x-ray afterglow") == '"x-ray" AND afterglow'
+
+
+def test_parse_fts_terms_quotes_decimal_terms():
+    assert parse_fts_terms("z 1.23") == '"1.23"'
+
+
 def test_parse_fts_terms_three_terms():
     result = parse_fts_terms("optical afterglow redshift")
     parts = result.split(" AND ")
@@ -168,15 +193,35 @@ def test_remove_event_preserves_unrelated_terms():
 # ── search_circulars — keyword only ──────────────────────────────────────────
 
 def test_keyword_search_returns_matching_results(tmp_path):
-    # NOTE: keyword-only FTS search currently returns 0 results due to a known bug
-    # in search.py: the FTS virtual table rowid (auto-incremented 1, 2, 3...) is
-    # joined against circular_id_int (e.g. 43450), which never matches.
-    # This test documents the current behaviour. Fix: store circular_id_int as the
-    # FTS rowid during upsert, or rewrite the JOIN to use circular_id_raw.
     db_path = build_db(tmp_path)
     results = search_circulars(db_path=db_path, query="optical counterpart", limit=10)
-    # Current behaviour: returns empty due to broken FTS rowid JOIN
-    assert isinstance(results, list)  # doesn't crash
+    ids = {r["circular_id"] for r in results}
+    assert ids == {"43450", "43452", "43469", "43483"}
+
+
+def test_keyword_search_matches_subject_only_term(tmp_path):
+    db_path = build_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="refined", limit=10)
+    assert [r["circular_id"] for r in results] == ["43493"]
+    assert "[refined]" in results[0]["snippet"]
+
+
+def test_keyword_search_still_correct_after_reingest(tmp_path):
+    db_path = build_db(tmp_path)
+    updated = make_record(
+        43450,
+        "EP260119a: COLIBRÍ neutrino search",
+        "No neutrino counterpart was found.",
+        "EP260119a",
+        created_on=1_768_822_574_334,
+    )
+    json_path = tmp_path / "update.json"
+    json_path.write_text(json.dumps(updated), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+    assert [r["circular_id"] for r in search_circulars(db_path=db_path, query="neutrino")] == ["43450"]
+    optical = {r["circular_id"] for r in search_circulars(db_path=db_path, query="optical counterpart")}
+    assert "43450" not in optical
 
 
 def test_keyword_search_returns_empty_for_nonsense_query(tmp_path):
@@ -191,6 +236,91 @@ def test_keyword_search_respects_limit(tmp_path):
     assert len(results) <= 2
 
 
+def test_keyword_search_handles_hyphenated_terms(tmp_path):
+    db_path = build_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="gamma-ray", limit=10)
+    assert [r["circular_id"] for r in results] == ["43493"]
+
+
+# ── search_circulars — bm25 relevance and sort ───────────────────────────────
+
+def build_ranking_db(tmp_path):
+    """Subject hit on an old circular vs repeated body hits on a newer one."""
+    db_path = tmp_path / "rank.sqlite"
+    records = [
+        make_record(
+            1, "Afterglow detection", "Routine observation of the field.", None,
+            created_on=1_000,
+        ),
+        make_record(
+            2, "Routine observations", "An afterglow candidate; the afterglow is fading.", None,
+            created_on=2_000,
+        ),
+        make_record(
+            3, "Unrelated report", "Nothing to see here.", None,
+            created_on=3_000,
+        ),
+    ]
+    json_path = tmp_path / "rank.json"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+    return db_path
+
+
+def test_relevance_ranks_subject_match_above_body_match(tmp_path):
+    db_path = build_ranking_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="afterglow")
+    assert [r["circular_id"] for r in results] == ["1", "2"]
+
+
+def test_relevance_weights_are_configurable(tmp_path):
+    db_path = build_ranking_db(tmp_path)
+    results = search_circulars(
+        db_path=db_path, query="afterglow", subject_weight=1.0, body_weight=10.0
+    )
+    assert [r["circular_id"] for r in results] == ["2", "1"]
+
+
+def test_relevance_is_reported_and_descending(tmp_path):
+    db_path = build_ranking_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="afterglow")
+    relevances = [r["relevance"] for r in results]
+    assert all(isinstance(x, float) for x in relevances)
+    assert relevances == sorted(relevances, reverse=True)
+
+
+def test_event_only_search_has_no_relevance(tmp_path):
+    db_path = build_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="", event="GRB 260120B")
+    assert all(r["relevance"] is None for r in results)
+
+
+def test_sort_by_date_orders_newest_first(tmp_path):
+    db_path = build_ranking_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="afterglow", sort="date")
+    assert [r["circular_id"] for r in results] == ["2", "1"]
+
+
+def test_sort_by_date_with_event_orders_newest_first(tmp_path):
+    db_path = build_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="optical", event="EP260119a", sort="date")
+    created = [r["created_on"] for r in results]
+    assert created == sorted(created, reverse=True)
+
+
+def test_invalid_sort_raises(tmp_path):
+    db_path = build_db(tmp_path)
+    with pytest.raises(ValueError, match="sort"):
+        search_circulars(db_path=db_path, query="optical", sort="popularity")
+
+
+def test_keyword_with_event_ranks_event_score_before_relevance(tmp_path):
+    db_path = build_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="optical", event="GRB 260120B")
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert results and results[0]["primary_event_norm"] == "GRB260120B"
+
+
 # ── search_circulars — event only ─────────────────────────────────────────────
 
 def test_event_only_returns_cluster(tmp_path):
@@ -216,13 +346,12 @@ def test_event_only_unknown_event_returns_empty(tmp_path):
 # ── search_circulars — keyword + event ───────────────────────────────────────
 
 def test_keyword_and_event_filters_to_event(tmp_path):
-    # NOTE: keyword+event search is also broken by the same FTS rowid JOIN bug.
-    # Documents current behaviour; fix is the same as test_keyword_search_returns_matching_results.
     db_path = build_db(tmp_path)
     results = search_circulars(
         db_path=db_path, query="optical counterpart", event="EP260119a", limit=10
     )
-    assert isinstance(results, list)  # doesn't crash
+    assert {r["circular_id"] for r in results} == {"43450", "43452", "43469"}
+    assert all(r["primary_event_norm"] == "EP260119A" for r in results)
 
 
 def test_keyword_and_event_excludes_other_events(tmp_path):
@@ -236,16 +365,14 @@ def test_keyword_and_event_excludes_other_events(tmp_path):
 # ── search_circulars — event inference from query ─────────────────────────────
 
 def test_event_inferred_from_query_string(tmp_path):
-    # NOTE: event-inferred-from-query triggers the keyword path (with event filter),
-    # which also fails due to the FTS rowid JOIN bug.
-    # Documents current behaviour.
     db_path = build_db(tmp_path)
     results = search_circulars(
         db_path=db_path,
         query="optical counterpart reports for EP260119a",
         limit=10,
     )
-    assert isinstance(results, list)  # doesn't crash
+    assert {r["circular_id"] for r in results} == {"43450", "43452", "43469"}
+    assert all(r["score"] == 3 for r in results)
 
 
 # ── search_circulars — score and ordering ────────────────────────────────────
@@ -263,16 +390,324 @@ def test_results_ordered_by_recency_within_same_score(tmp_path):
     assert ids == sorted(ids, reverse=True)
 
 
+def build_multi_event_db(tmp_path):
+    """One circular naming two events plus one circular for the second event."""
+    db_path = tmp_path / "multi.sqlite"
+    records = [
+        make_record(
+            10,
+            "GRB 260120B and EP260119a: joint optical analysis",
+            "Optical follow-up covering both sources.",
+            None,
+            created_on=3_000,
+        ),
+        make_record(
+            11,
+            "EP260119a: optical imaging",
+            "Optical imaging of the field.",
+            "EP260119a",
+            created_on=2_000,
+        ),
+    ]
+    json_path = tmp_path / "multi.json"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+    return db_path
+
+
+def test_secondary_event_match_scores_2(tmp_path):
+    db_path = build_multi_event_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="", event="EP260119a")
+    assert [(r["circular_id"], r["score"]) for r in results] == [("11", 3), ("10", 2)]
+
+
+def test_keyword_and_secondary_event_scores_2(tmp_path):
+    db_path = build_multi_event_db(tmp_path)
+    results = search_circulars(db_path=db_path, query="optical", event="EP260119a")
+    assert [(r["circular_id"], r["score"]) for r in results] == [("11", 3), ("10", 2)]
+
+
+def test_circular_linked_twice_to_event_is_returned_once(tmp_path):
+    # Circular 10 has GRB260120B as primary event and as a circular_events row.
+    db_path = build_multi_event_db(tmp_path)
+    for query in ("", "optical"):
+        results = search_circulars(db_path=db_path, query=query, event="GRB 260120B")
+        assert [r["circular_id"] for r in results] == ["10"]
+
+
+# ── search result cache ──────────────────────────────────────────────────────
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = LRUCache(16)
+    monkeypatch.setattr(search, "_result_cache", cache)
+    return cache
+
+
+def test_cache_repeated_search_hits(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    first = search_circulars(db_path=db_path, query="optical")
+    second = search_circulars(db_path=db_path, query="optical")
+    assert first == second
+    assert fresh_cache.hits == 1 and fresh_cache.misses == 1
+
+
+def test_cache_equivalent_queries_share_entry(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    first = search_circulars(db_path=db_path, query="optical counterpart")
+    second = search_circulars(db_path=db_path, query="  Optical   COUNTERPART for the ")
+    assert first == second
+    assert fresh_cache.hits == 1
+
+
+def test_cache_distinguishes_limit_sort_and_event(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    search_circulars(db_path=db_path, query="optical", limit=2)
+    search_circulars(db_path=db_path, query="optical", limit=3)
+    search_circulars(db_path=db_path, query="optical", sort="date")
+    search_circulars(db_path=db_path, query="optical", event="GRB 260120B")
+    assert fresh_cache.hits == 0 and fresh_cache.misses == 4
+
+
+def test_cache_invalidated_by_changing_ingest(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    assert search_circulars(db_path=db_path, query="kilonova") == []
+
+    json_path = tmp_path / "new.json"
+    json_path.write_text(json.dumps(make_record(
+        43500, "GRB 260120B: kilonova candidate", "A kilonova candidate.", "GRB 260120B",
+    )), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+    results = search_circulars(db_path=db_path, query="kilonova")
+    assert [r["circular_id"] for r in results] == ["43500"]
+    assert fresh_cache.invalidations >= 1
+
+
+def test_cache_kept_across_unchanged_ingest(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    search_circulars(db_path=db_path, query="optical")
+    ingest_path(db_path, tmp_path / "records.json")
+    search_circulars(db_path=db_path, query="optical")
+    assert fresh_cache.hits == 1
+
+
+def test_cache_returns_copies(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    first = search_circulars(db_path=db_path, query="optical")
+    first[0]["subject"] = "tampered"
+    first.clear()
+    second = search_circulars(db_path=db_path, query="optical")
+    assert second and second[0]["subject"] != "tampered"
+
+
+def test_cache_pages_cached_per_cursor(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    first = walk_pages(db_path, 2, query="")
+    second = walk_pages(db_path, 2, query="")
+    assert first == second
+    assert fresh_cache.hits == first[1]
+
+
+def test_cache_disabled_when_size_zero(tmp_path, monkeypatch):
+    cache = LRUCache(0)
+    monkeypatch.setattr(search, "_result_cache", cache)
+    db_path = build_db(tmp_path)
+    search_circulars(db_path=db_path, query="optical")
+    search_circulars(db_path=db_path, query="optical")
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_search_cache_stats_reports_module_cache(tmp_path, fresh_cache):
+    db_path = build_db(tmp_path)
+    search_circulars(db_path=db_path, query="optical")
+    stats = search.search_cache_stats()
+    assert stats["misses"] == 1 and stats["size"] == 1
+
+
+# ── build_search_query — query plans ─────────────────────────────────────────
+
+def query_plan(db_path, **kwargs):
+    sql, params = build_search_query(**kwargs)
+    conn = get_connection(db_path)
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    finally:
+        conn.close()
+
+
+def top_k_plan(plan):
+    """Plan lines for the CTE that picks the top rows, before snippets."""
+    start = next(i for i, line in enumerate(plan) if line.startswith(("CO-ROUTINE top", "MATERIALIZE top")))
+    end = next(i for i, line in enumerate(plan) if line == "SCAN top")
+    return plan[start + 1:end]
+
+
+PLAN_CASES = [
+    {"query": "optical"},
+    {"query": "optical", "sort": "date"},
+    {"query": "optical", "event": "EP260119a"},
+    {"query": "optical", "event": "EP260119a", "sort": "date"},
+    {"query": "", "event": "EP260119a"},
+    {"query": ""},
+]
+
+
+@pytest.mark.parametrize("kwargs", PLAN_CASES)
+def test_query_plan_has_no_distinct_temp_btree(tmp_path, kwargs):
+    plan = query_plan(build_db(tmp_path), **kwargs)
+    assert not any("DISTINCT" in line for line in plan), plan
+
+
+@pytest.mark.parametrize("kwargs", [c for c in PLAN_CASES if "event" in c])
+def test_query_plan_event_filter_uses_indexes(tmp_path, kwargs):
+    plan = query_plan(build_db(tmp_path), **kwargs)
+    assert any("idx_circulars_primary_event_norm" in line for line in plan), plan
+    assert any("idx_circular_events_event_norm" in line for line in plan), plan
+    assert not any(line.startswith(("SCAN c ", "SCAN circulars ", "SCAN e ")) for line in plan), plan
+
+
+@pytest.mark.parametrize("kwargs", [c for c in PLAN_CASES if c["query"]])
+def test_query_plan_top_k_reads_each_table_by_key(tmp_path, kwargs):
+    plan = query_plan(build_db(tmp_path), **kwargs)
+    top_k = top_k_plan(plan)
+    assert sum("circulars_fts" in line for line in top_k) == 1, plan
+    assert any(line.startswith("SEARCH c USING INTEGER PRIMARY KEY") for line in top_k), plan
+
+
+@pytest.mark.parametrize("kwargs", [c for c in PLAN_CASES if c["query"]])
+def test_query_plan_snippets_come_from_top_k_rows(tmp_path, kwargs):
+    # The outer query walks the top rows and looks each one up in the FTS
+    # table, rather than rescanning every match to compute snippets.
+    plan = query_plan(build_db(tmp_path), **kwargs)
+    outer = plan[plan.index("SCAN top"):]
+    assert not any(line.startswith("SCAN c ") for line in outer), plan
+    fts_lines = [line for line in outer if "circulars_fts" in line]
+    assert len(fts_lines) == 1 and ":=" in fts_lines[0], plan
+
+
+# ── search_circulars_page — keyset cursors ──────────────────────────────────
+
+def walk_pages(db_path, page_size, **kwargs):
+    """Follow next_cursor to the end; returns circular IDs and page count."""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page = search_circulars_page(db_path=db_path, limit=page_size, cursor=cursor, **kwargs)
+        ids.extend(r["circular_id"] for r in page["results"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+        assert pages < 50, "cursor walk did not terminate"
+
+
+WALK_CASES = [
+    {"query": ""},
+    {"query": "optical"},
+    {"query": "optical", "sort": "date"},
+    {"query": "", "event": "EP260119a"},
+    {"query": "optical", "event": "EP260119a"},
+    {"query": "GRB 260120B"},
+]
+
+
+@pytest.mark.parametrize("kwargs", WALK_CASES)
+def test_page_walk_matches_single_search(tmp_path, kwargs):
+    db_path = build_db(tmp_path)
+    expected = [r["circular_id"] for r in search_circulars(db_path=db_path, limit=100, **kwargs)]
+    assert expected
+    for page_size in (1, 2, 3):
+        ids, _ = walk_pages(db_path, page_size, **kwargs)
+        assert ids == expected
+
+
+def test_page_next_cursor_none_on_last_page(tmp_path):
+    db_path = build_db(tmp_path)
+    page = search_circulars_page(db_path=db_path, query="", limit=5)
+    assert len(page["results"]) == 5
+    assert page["next_cursor"] is None
+
+
+def test_page_next_cursor_set_when_more_rows(tmp_path):
+    db_path = build_db(tmp_path)
+    page = search_circulars_page(db_path=db_path, query="", limit=4)
+    assert len(page["results"]) == 4
+    assert isinstance(page["next_cursor"], str)
+
+
+def test_page_walk_handles_tied_relevance(tmp_path):
+    db_path = tmp_path / "ties.sqlite"
+    records = [
+        make_record(i, "Identical afterglow report", "Same text.", None, created_on=1_000)
+        for i in range(1, 8)
+    ]
+    json_path = tmp_path / "ties.json"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+    for kwargs in ({"query": "afterglow"}, {"query": "afterglow", "sort": "date"}, {"query": ""}):
+        ids, pages = walk_pages(db_path, 2, **kwargs)
+        assert sorted(ids, key=int) == [str(i) for i in range(1, 8)]
+        assert pages == 4
+
+
+def test_page_walk_includes_undated_circulars(tmp_path):
+    db_path = tmp_path / "undated.sqlite"
+    records = [make_record(i, f"Report {i}", "Text.", None, created_on=i * 1_000) for i in range(1, 5)]
+    records += [make_record(i, f"Report {i}", "Text.", None, created_on=None) for i in range(5, 8)]
+    json_path = tmp_path / "undated.json"
+    json_path.write_text(json.dumps(records), encoding="utf-8")
+    ingest_path(db_path, json_path)
+
+    expected = ["4", "3", "2", "1", "7", "6", "5"]
+    assert [r["circular_id"] for r in search_circulars(db_path=db_path, limit=10)] == expected
+    for page_size in (1, 2, 3, 4):
+        ids, _ = walk_pages(db_path, page_size, query="")
+        assert ids == expected
+
+
+def test_page_cursor_from_other_search_rejected(tmp_path):
+    db_path = build_db(tmp_path)
+    cursor = search_circulars_page(db_path=db_path, query="optical", limit=1)["next_cursor"]
+    with pytest.raises(ValueError, match="cursor"):
+        search_circulars_page(db_path=db_path, query="redshift", limit=1, cursor=cursor)
+    with pytest.raises(ValueError, match="cursor"):
+        search_circulars_page(db_path=db_path, query="optical", sort="date", limit=1, cursor=cursor)
+
+
+def test_page_malformed_cursor_rejected(tmp_path):
+    db_path = build_db(tmp_path)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        search_circulars_page(db_path=db_path, query="optical", cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_page_limit_below_one_rejected(tmp_path, limit):
+    db_path = build_db(tmp_path)
+    with pytest.raises(ValueError, match="limit"):
+        search_circulars_page(db_path=db_path, query="optical", limit=limit)
+    with pytest.raises(ValueError, match="limit"):
+        search_circulars(db_path=db_path, query="", limit=limit)
+
+
+def test_query_plan_listing_after_cursor_seeks_created_on_index(tmp_path):
+    plan = query_plan(build_db(tmp_path), query="", after=[1_768_902_318_897, 3])
+    assert any(
+        line.startswith("SEARCH circulars USING COVERING INDEX idx_circulars_created_on (created_on<?)")
+        for line in plan
+    ), plan
+    assert not any(line.startswith(("SCAN c ", "SCAN circulars ")) for line in plan), plan
+
+
 # ── search_circulars — result dict shape ──────────────────────────────────────
 
 def test_result_has_expected_keys(tmp_path):
     db_path = build_db(tmp_path)
-    # Use event-only search (not broken by FTS rowid bug) to get a real result
     results = search_circulars(db_path=db_path, query="", event="GRB 260120B", limit=1)
     assert results, "Expected at least one result from event-only search"
     r = results[0]
     for key in ("circular_id", "primary_event", "primary_event_norm", "subject",
-                "created_on", "extraction_source", "snippet", "score"):
+                "created_on", "extraction_source", "snippet", "score", "relevance"):
         assert key in r, f"Missing key: {key}"
 
 
@@ -0,0 +1,284 @@
+"""
+tests/test_stream_ingest.py — tests for src/stream_ingest.py
+
+Covers:
+  - serve_stream: records written in batches of batch_size and acknowledged
+      with the last line of each, blank lines not counted, invalid lines
+      rejected without stopping the stream or failing their batch, partial
+      batch written after max_delay while the producer is still connected,
+      unchanged records acknowledged without moving the generation, failed
+      writes answered with their line range
+  - IndexWriter: writes from several threads share one connection
+  - StreamIngestServer: concurrent producers over a Unix socket, socket
+      only accessible to its owner, stale socket replaced but a live one
+      or another file left alone, socket file removed on close
+  - main (CLI): stdin mode, invalid options
+"""
+
+import io
+import json
+import os
+import socket
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.db import get_connection, get_generation
+from src.indexer import parse_line
+from src.stream_ingest import (
+    IndexWriter,
+    StreamIngestServer,
+    main,
+    serve_stream,
+)
+
+
+def make_record(circular_id, subject="GRB 260120B: Swift-BAT refined analysis"):
+    return {
+        "circularId": circular_id,
+        "subject": subject,
+        "body": f"Circular {circular_id} about GRB 260120B.",
+        "eventId": "GRB 260120B",
+        "createdOn": 1769036892952,
+        "submitter": "Test Submitter <test@example.com>",
+        "format": "text/plain",
+    }
+
+
+def ndjson(*records):
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def circular_ids(db_path):
+    conn = get_connection(db_path)
+    try:
+        return [row[0] for row in conn.execute(
+            "SELECT circular_id_raw FROM circulars ORDER BY circular_id_int"
+        )]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = IndexWriter(tmp_path / "test.sqlite")
+    yield writer
+    writer.close()
+
+
+def run_stream(writer, text, **options):
+    # Batches then only end when full or at EOF, however the reader thread
+    # is scheduled.
+    options.setdefault("max_delay", 10)
+    output = io.StringIO()
+    counts = serve_stream(io.StringIO(text), output, writer, **options)
+    return counts, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+# ── serve_stream ──────────────────────────────────────────────────────────────
+
+def test_serve_stream_writes_batches_and_acknowledges_them(tmp_path, writer):
+    text = ndjson(*[make_record(i) for i in range(1, 6)])
+    counts, responses = run_stream(writer, text.replace("\n", "\n\n", 1), batch_size=2)
+
+    assert counts == (5, 0)
+    assert responses == [
+        {"ok": True, "ack": 2, "records": 2, "changed": 2},
+        {"ok": True, "ack": 4, "records": 2, "changed": 2},
+        {"ok": True, "ack": 5, "records": 1, "changed": 1},
+    ]
+    assert circular_ids(tmp_path / "test.sqlite") == ["1", "2", "3", "4", "5"]
+
+
+def test_serve_stream_rejects_invalid_lines_and_carries_on(tmp_path, writer):
+    text = ndjson(make_record(1)) + "{broken\n" + ndjson({"subject": "no id"}, make_record(2))
+    counts, responses = run_stream(writer, text, batch_size=10)
+
+    assert counts == (2, 2)
+    assert responses[0]["ok"] is False and responses[0]["line"] == 2
+    assert responses[1] == {"ok": False, "line": 3, "error": "Record is missing circularId"}
+    assert responses[2] == {"ok": True, "ack": 4, "records": 2, "changed": 2}
+    assert circular_ids(tmp_path / "test.sqlite") == ["1", "2"]
+
+
+@pytest.mark.parametrize(
+    "bad, error",
+    [
+        ({"circularId": 99, "createdOn": [1, 2]}, "Invalid createdOn: [1, 2]"),
+        ({"circularId": 10**30}, f"Invalid circularId: {10**30}"),
+    ],
+)
+def test_serve_stream_rejects_bad_fields_without_failing_the_batch(tmp_path, writer, bad, error):
+    records = [make_record(i) for i in range(1, 6)]
+    records[2] = bad
+    counts, responses = run_stream(writer, ndjson(*records), batch_size=10)
+
+    assert counts == (4, 1)
+    assert responses[0] == {"ok": False, "line": 3, "error": error}
+    assert responses[1] == {"ok": True, "ack": 5, "records": 4, "changed": 4}
+    assert circular_ids(tmp_path / "test.sqlite") == ["1", "2", "4", "5"]
+
+
+def test_serve_stream_writes_partial_batch_after_max_delay(tmp_path, writer):
+    read_fd, write_fd = os.pipe()
+    producer = os.fdopen(write_fd, "w", encoding="utf-8")
+    output = io.StringIO()
+    thread = threading.Thread(
+        target=serve_stream,
+        args=(os.fdopen(read_fd, "r", encoding="utf-8"), output, writer),
+        kwargs={"batch_size": 100, "max_delay": 0.05},
+    )
+    thread.start()
+    try:
+        producer.write(ndjson(make_record(1), make_record(2)))
+        producer.flush()
+        deadline = time.monotonic() + 5
+        while not output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert json.loads(output.getvalue()) == {"ok": True, "ack": 2, "records": 2, "changed": 2}
+        assert circular_ids(tmp_path / "test.sqlite") == ["1", "2"]
+    finally:
+        producer.close()
+        thread.join(timeout=5)
+
+
+def test_serve_stream_skips_unchanged_records(tmp_path, writer):
+    run_stream(writer, ndjson(make_record(1), make_record(2)))
+    conn = get_connection(tmp_path / "test.sqlite")
+    generation = get_generation(conn)
+
+    _, responses = run_stream(writer, ndjson(make_record(1), make_record(2)))
+    assert responses == [{"ok": True, "ack": 2, "records": 2, "changed": 0}]
+    assert get_generation(conn) == generation
+
+    _, responses = run_stream(writer, ndjson(make_record(2, subject="GRB 260120B: revised")))
+    assert responses[0]["changed"] == 1
+    assert get_generation(conn) == generation + 1
+    conn.close()
+
+
+def test_serve_stream_reports_failed_writes(writer, monkeypatch):
+    def fail(prepared):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(writer, "write", fail)
+    counts, responses = run_stream(writer, ndjson(make_record(1), make_record(2)))
+    assert counts == (0, 0)
+    assert responses == [{"ok": False, "lines": [1, 2], "error": "database is locked"}]
+
+
+def test_index_writer_serves_many_threads(tmp_path, writer):
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda i=i: results.append(writer.write([parse_line(json.dumps(make_record(i)))]))
+        )
+        for i in range(1, 9)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8
+    assert len(circular_ids(tmp_path / "test.sqlite")) == 8
+
+
+# ── StreamIngestServer ────────────────────────────────────────────────────────
+
+@pytest.fixture
+def server(tmp_path, writer):
+    # Unix socket paths are limited to about 100 bytes, more than pytest's
+    # tmp_path may leave.
+    socket_path = os.path.join(tempfile.gettempdir(), f"gcn-test-{os.getpid()}.sock")
+    server = StreamIngestServer(socket_path, writer, batch_size=3, max_delay=10)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+
+
+def produce(socket_path, records):
+    """
+    A fake producer: sends records, hangs up its sending side and returns
+    every response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendall(ndjson(*records).encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile("r", encoding="utf-8") as responses:
+            return [json.loads(line) for line in responses]
+
+
+def test_server_accepts_concurrent_producers(tmp_path, server):
+    results = {}
+
+    def run(name, ids):
+        results[name] = produce(server.socket_path, [make_record(i) for i in ids])
+
+    threads = [
+        threading.Thread(target=run, args=("a", range(1, 8))),
+        threading.Thread(target=run, args=("b", range(101, 105))),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert [r["ack"] for r in results["a"]] == [3, 6, 7]
+    assert [r["ack"] for r in results["b"]] == [3, 4]
+    assert len(circular_ids(tmp_path / "test.sqlite")) == 11
+
+
+def test_server_socket_is_private(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_server_replaces_stale_socket_and_removes_it_on_close(writer):
+    socket_path = os.path.join(tempfile.gettempdir(), f"gcn-test-stale-{os.getpid()}.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(socket_path)
+    server = StreamIngestServer(socket_path, writer)
+    assert stat.S_ISSOCK(os.stat(socket_path).st_mode)
+    server.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_server_refuses_to_replace_a_live_socket(server, writer):
+    with pytest.raises(OSError, match="already listening"):
+        StreamIngestServer(server.socket_path, writer)
+    assert produce(server.socket_path, [make_record(1)])[0]["ack"] == 1
+
+
+def test_server_refuses_to_replace_other_files(tmp_path, writer):
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(OSError):
+        StreamIngestServer(path, writer)
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+
+# ── command line ──────────────────────────────────────────────────────────────
+
+def test_cli_reads_stdin(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO(ndjson(make_record(1)) + "nope\n"))
+    assert main([str(tmp_path / "test.sqlite"), "--max-delay", "10"]) == 0
+
+    captured = capsys.readouterr()
+    responses = [json.loads(line) for line in captured.out.splitlines()]
+    assert responses[0]["line"] == 2
+    assert responses[1] == {"ok": True, "ack": 1, "records": 1, "changed": 1}
+    assert "Ingested 1 records, rejected 1" in captured.err
+    assert circular_ids(tmp_path / "test.sqlite") == ["1"]
+
+
+@pytest.mark.parametrize("flags", [["--batch-size", "0"], ["--max-delay", "-1"]])
+def test_cli_rejects_invalid_options(tmp_path, flags):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "test.sqlite"), *flags])
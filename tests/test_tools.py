@@ -6,10 +6,11 @@ Covers:
   - format_search_results: single result shape, multiple results, empty list message
   - list_tools: expected tool names and required schema fields
   - call_tool / ping_python: JSON round-trip
+  - call_tool / search_cache_stats: JSON counters
   - call_tool / fetch_gcn_circulars: range slicing, out-of-range (graceful),
       empty data dir
   - call_tool / search_gcn_circulars: returns TextContext list, empty-result
-      message, error handling
+      message, error handling, cursor paging via a trailing "Next cursor" item
   - call_tool / check_for_grb_regex: GRB match, non-GRB subject, out-of-range
       index
   - call_tool / fetch_and_check_circular_for_grb: clean JSON, JSON wrapped in
@@ -157,6 +158,13 @@ def test_format_search_results_multiple_results():
     assert len(out) == 3
 
 
+def test_format_search_results_shows_relevance_when_present():
+    r = dict(_fake_result(), relevance=4.25)
+    out = tools.format_search_results([r])
+    assert "Relevance: 4.25" in out[0].text
+    assert "Relevance:" not in tools.format_search_results([_fake_result()])[0].text
+
+
 def test_format_search_results_none_snippet_handled():
     r = _fake_result(snippet=None)
     out = tools.format_search_results([r])
@@ -191,6 +199,16 @@ def test_ping_python_returns_pong():
     assert payload["message"] == "pong from python"
 
 
+# ── call_tool / search_cache_stats ───────────────────────────────────────────
+
+def test_search_cache_stats_returns_counters():
+    results = run(tools.call_tool("search_cache_stats", {}))
+    assert len(results) == 1
+    payload = json.loads(results[0].text)
+    for key in ("size", "max_size", "hits", "misses", "evictions", "expirations", "invalidations"):
+        assert key in payload
+
+
 # ── call_tool / fetch_gcn_circulars ──────────────────────────────────────────
 
 def test_fetch_gcn_circulars_returns_first_file(tmp_path):
@@ -231,7 +249,6 @@ def test_fetch_gcn_circulars_equal_start_end_returns_one(tmp_path):
 # ── call_tool / search_gcn_circulars ─────────────────────────────────────────
 
 def test_search_gcn_circulars_returns_results(tmp_path, monkeypatch):
-    # Use event-only query (keyword queries are broken by the FTS rowid JOIN bug)
     db_path = make_indexed_db(tmp_path)
     monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
     results = run(tools.call_tool("search_gcn_circulars", {
@@ -241,6 +258,57 @@ def test_search_gcn_circulars_returns_results(tmp_path, monkeypatch):
     assert any("Circular ID:" in r.text for r in results)
 
 
+def test_search_gcn_circulars_keyword_query_returns_results(tmp_path, monkeypatch):
+    db_path = make_indexed_db(tmp_path)
+    monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
+    results = run(tools.call_tool("search_gcn_circulars", {"query": "refined analysis"}))
+    assert len(results) == 1
+    assert "Circular ID: 43493" in results[0].text
+
+
+def test_search_gcn_circulars_passes_sort(tmp_path, monkeypatch):
+    db_path = make_indexed_db(tmp_path)
+    monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
+    results = run(tools.call_tool("search_gcn_circulars", {"query": "optical", "sort": "date"}))
+    ids = [r.text.split("\n")[0] for r in results]
+    assert ids[0] == "Circular ID: 43483"
+
+
+def test_search_gcn_circulars_invalid_sort_returns_error(tmp_path, monkeypatch):
+    db_path = make_indexed_db(tmp_path)
+    monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
+    results = run(tools.call_tool("search_gcn_circulars", {"query": "optical", "sort": "bogus"}))
+    assert results[0].text.startswith("Error in search_gcn_circulars")
+
+
+def test_search_gcn_circulars_pages_with_cursor(tmp_path, monkeypatch):
+    db_path = make_indexed_db(tmp_path)
+    monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
+    args = {"query": "", "event": "EP260119a", "limit": 1}
+
+    seen = []
+    while True:
+        results = run(tools.call_tool("search_gcn_circulars", args))
+        assert results[0].text.startswith("Circular ID:")
+        seen.append(results[0].text.split("\n")[0])
+        if len(results) == 1:
+            break
+        assert len(results) == 2
+        assert results[-1].text.startswith("Next cursor: ")
+        args = dict(args, cursor=results[-1].text[len("Next cursor: "):])
+
+    everything = run(tools.call_tool("search_gcn_circulars", {"query": "", "event": "EP260119a"}))
+    assert seen == [r.text.split("\n")[0] for r in everything]
+    assert len(seen) >= 2
+
+
+def test_search_gcn_circulars_bad_cursor_returns_error(tmp_path, monkeypatch):
+    db_path = make_indexed_db(tmp_path)
+    monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
+    results = run(tools.call_tool("search_gcn_circulars", {"query": "optical", "cursor": "bogus"}))
+    assert results[0].text.startswith("Error in search_gcn_circulars")
+
+
 def test_search_gcn_circulars_empty_returns_no_match_message(tmp_path, monkeypatch):
     db_path = make_indexed_db(tmp_path)
     monkeypatch.setattr(tools, "DEFAULT_DB_PATH", str(db_path))
@@ -5,15 +5,19 @@ Covers:
   - clean_text: None, null bytes, leading/trailing whitespace, empty string
   - normalize_event: spacing removal, uppercasing, None/empty handling
   - extract_matches: all supported event types (GRB, EP, AT, SN, IceCube, Swift J),
-      ordering, deduplication, case-insensitivity, no match
+      ordering, deduplication, case-insensitivity, no match, identical output
+      to scanning each EVENT_PATTERNS entry separately
   - extract_event_regex: priority chain (eventId > subject > body > none),
       multi-event records, None field values
   - extract_event_from_query: event in query, no event in query
 """
 
+import re
+
 import pytest
 
 from src.utils import (
+    EVENT_PATTERNS,
     clean_text,
     extract_event_from_query,
     extract_event_regex,
@@ -148,6 +152,28 @@ def test_extract_matches_multiple_event_types_in_order():
     assert result.index("GRB260120B") < result.index("EP260119A")
 
 
+def _extract_matches_per_pattern(text):
+    """Reference: one scan per pattern, merged by position (the old algorithm)."""
+    found = sorted(
+        (match.start(), normalize_event(match.group(1)))
+        for pattern in EVENT_PATTERNS
+        for match in re.finditer(pattern, text, flags=re.IGNORECASE)
+    )
+    return list(dict.fromkeys(norm for _, norm in found))
+
+
+@pytest.mark.parametrize("text", [
+    "GRB 260120B EP260119a AT 2023 SN 2024 IceCube-231004A Swift J1234.5+6789.0",
+    "GRB260120BEP260119a and EP 12AT 5 then SN1 SN 2",
+    "swift j0101-2020 ICECUBE 240105A icecube -12 GRB 2601201",
+    "EP260119a,GRB 260120B;AT2024;EP260119A (GRB 260120B)",
+    "GRB\n260120B and EP\t1A and SN  2024",
+    "",
+])
+def test_extract_matches_same_as_separate_pattern_scans(text):
+    assert extract_matches(text) == _extract_matches_per_pattern(text)
+
+
 # ── extract_event_regex ───────────────────────────────────────────────────────
 
 def test_extract_event_regex_prefers_event_id():
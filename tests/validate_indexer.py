@@ -1,5 +1,4 @@
 import json
-import hashlib
 from pathlib import Path
 from decimal import Decimal, InvalidOperation
 from typing import Any
@@ -8,7 +7,7 @@ import sys
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 
-from src.db import get_connection
+from src.db import get_connection, hash_indexed_fields
 
 
 def parse_circular_id(value: Any) -> tuple[str | None, int | None]:
@@ -44,12 +43,22 @@ def parse_circular_id(value: Any) -> tuple[str | None, int | None]:
     return text, None
 
 
-def sha1_text(text: str) -> str:
-    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+def clean_text(text: str | None) -> str:
+    if text is None:
+        return ""
+    return text.replace("\x00", " ").strip()
 
 
-def make_record_hash(record: dict[str, Any]) -> str:
-    return sha1_text(json.dumps(record, sort_keys=True, ensure_ascii=False))
+def make_record_hash(record: dict[str, Any], circular_id_raw: str) -> str:
+    return hash_indexed_fields(
+        circular_id_raw,
+        clean_text(record.get("subject")),
+        clean_text(record.get("body")),
+        record.get("createdOn"),
+        clean_text(record.get("submitter")),
+        clean_text(record.get("format")),
+        clean_text(record.get("eventId")) or None,
+    )
 
 
 def iter_raw_files(input_path: str | Path):
@@ -185,7 +194,7 @@ def validate_index(db_path: str | Path, input_path: str | Path) -> dict[str, Any
             })
             continue
 
-        raw_hash = make_record_hash(record)
+        raw_hash = make_record_hash(record, circular_id_raw)
         if db_row["record_hash"] != raw_hash:
             report["hash_mismatches"].append({
                 "circular_id_raw": circular_id_raw,